@@ -1,10 +1,17 @@
 import time
-import rp2
+try:
+    import rp2
+except ImportError:
+    rp2 = None
 import random
-from machine import mem32, Pin, I2C
+try:
+    from machine import mem32, Pin, I2C
+except ImportError:
+    mem32 = Pin = I2C = None
 import libraries.sh1107 as sh1107
-import libraries.TimeToDo as TimeToDo
+from libraries.game_loop import GameLoop
 from libraries.Mpu6050_mahony import MPU6050
+from libraries.sprite import Sprite
 
 # ==================== OLED 驅動程式 ====================
 
@@ -23,6 +30,25 @@ class OLED:
 
 # ==================== Doodler 遊戲類 ====================
 
+DOODLER_BITMAP = [
+    "0000000111100",
+    "0000001000010",
+    "0000010000001",
+    "0000100000001",
+    "1111101010001",
+    "1010000000001",
+    "1111100000001",
+    "0000111111111",
+    "0000100000001",
+    "0000100000001",
+    "0000111111111",
+    "0000010101010",
+    "0000010101010"
+]
+# 載入時編譯一次，向右移動時使用水平反轉的版本
+DOODLER_SPRITE = Sprite(DOODLER_BITMAP)
+DOODLER_SPRITE_FLIPPED = DOODLER_SPRITE.mirrored()
+
 class Doodler:
     MAX_DY = 10  # 最大下墜速度
 
@@ -38,34 +64,12 @@ class Doodler:
         self.score = 0
         self.prev_y = self.y  # 記錄上一幀的 y 位置
         self.is_flipped = False  # 是否水平反轉顯示
-    
-        self.bitmap = [
-                "0000000111100",
-                "0000001000010",
-                "0000010000001",
-                "0000100000001",
-                "1111101010001",
-                "1010000000001",
-                "1111100000001",
-                "0000111111111",
-                "0000100000001",
-                "0000100000001",
-                "0000111111111",
-                "0000010101010",
-                "0000010101010"
-            ]
+        self.bitmap = DOODLER_BITMAP
 
     def show(self, oled):
-        for row_idx, row in enumerate(self.bitmap):
-            for col_idx in range(len(row)):
-                # 根據是否反轉，選擇正序或反序顯示
-                if self.is_flipped:
-                    pixel = row[-(col_idx + 1)]  # 反轉顯示
-                else:
-                    pixel = row[col_idx]
-
-                if pixel == '1':
-                    oled.display.pixel(int(self.x - self.w//2 + col_idx), int(self.y - self.h//2 + row_idx), 1)
+        # 根據是否反轉，選擇正序或反序的圖案
+        sprite = DOODLER_SPRITE_FLIPPED if self.is_flipped else DOODLER_SPRITE
+        sprite.draw(oled.display, int(self.x - self.w//2), int(self.y - self.h//2))
 
     def lands(self, platform):
         if self.dy > 0:
@@ -137,8 +141,10 @@ class Game:
             Platform(43, 77, self.SCREEN_WIDTH, self.SCREEN_HEIGHT),
             Platform(96, 102, self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
         ]
-        self.update_timer = TimeToDo.TimeToDo(67)  # 畫面更新頻率，大約15FPS
-        self.OnTiltAnglesTimeTo = TimeToDo.TimeToDo(10)  # 傾斜讀取頻率 10 Hz
+        # 遊戲邏輯固定每 67 毫秒 (大約15FPS) 更新一次，更新後繪製畫面
+        self.loop = GameLoop(67, self.update_game, self.draw_game)
+        self.control_task = self.loop.scheduler.every(10, self.update_control)  # 傾斜讀取頻率
+        self.state_task = self.loop.scheduler.every(20, self.check_state)       # 長按離開與遊戲結束
         self.is_running = True
         self.game_over = False
 
@@ -178,27 +184,26 @@ class Game:
         print("Game is running...")
         self.is_running = True
         try:
-            while self.is_running:
-                if self.update_timer.Do(self.update_game):
-                    pass  # 遊戲狀態已在 update_game 更新
-
-                if self.OnTiltAnglesTimeTo.Do(self.update_control):
-                    pass  # 控制已在 update_control 更新
-
-                if self.check_button():
-                    print("Detected a long press, preparing to return to main menu.")
-                    self.is_running = False
-                    break
-
-                if self.game_over:
-                    self.draw_game_over()
-                    time.sleep(2)
-                    self.init_game()
-
+            self.loop.reset()  # 不補跑 init_game() 等待的時間
+            self.loop.run()    # 直到 check_state() 偵測到長按而停止
         except Exception as e:
             print(f"An error occurred: {e}")
             self.is_running = False
 
+    def check_state(self):
+        """檢查長按離開與遊戲結束"""
+        if self.check_button():
+            print("Detected a long press, preparing to return to main menu.")
+            self.is_running = False
+            self.loop.stop()
+            return
+
+        if self.game_over:
+            self.draw_game_over()
+            time.sleep(2)
+            self.init_game()
+            self.loop.reset()
+
     def update_control(self):
         """根據 MPU6050 傾斜更新 Doodler 的水平移動"""
         self.mpu.update_mahony()
@@ -239,9 +244,6 @@ class Game:
                 if self.doodler.y - self.doodler.h // 2 > self.SCREEN_HEIGHT:
                     self.game_over = True
 
-            # 繪製遊戲畫面
-            self.draw_game()
-
     def draw_game(self):
         """在 OLED 上繪製遊戲畫面"""
         self.oled.display.fill(0)  # 清空顯示
@@ -294,6 +296,7 @@ def main():
     # 初始化 MPU6050
     i2c0 = I2C(0, scl=Pin(21), sda=Pin(20), freq=400000)
     mpu = MPU6050(i2c0)
+    mpu.load_calibration()  # 只載入 main.py 存好的校正檔，遊戲開始時不會停下來校正
 
     # 創建並運行遊戲實例
     game = Game(oled, mpu)
@@ -1,14 +1,23 @@
 # game1.py
 import time
-import rp2
+try:
+    import rp2
+except ImportError:
+    rp2 = None
 import math
 import random
 import gc
-import micropython
-from machine import Pin, I2C, RTC, Timer, mem32
+try:
+    import micropython
+except ImportError:
+    micropython = None
+try:
+    from machine import Pin, I2C, RTC, Timer, mem32
+except ImportError:
+    Pin = I2C = RTC = Timer = mem32 = None
 import libraries.sh1107 as sh1107
 from libraries.Mpu6050_mahony import MPU6050
-import libraries.TimeToDo as TimeToDo
+from libraries.game_loop import GameLoop
 
 class OLED:
     def __init__(self, display):
@@ -56,11 +65,10 @@ class Game:
         # 初始化 MPU6050
         self.mpu = None
 
-        # 初始化計時器
-        self.gyro_update_timer = None
-        self.enemy_ball_timer = None
-        self.triangle_timer = None
-        self.draw_timer = None
+        # 遊戲迴圈與定時任務 (在 run() 建立)
+        self.loop = None
+        self.gyro_update_task = None
+        self.state_task = None
 
     def init_hardware(self):
         """
@@ -98,6 +106,7 @@ class Game:
 
         # 初始化 MPU6050
         self.mpu = MPU6050(self.i2c0)
+        self.mpu.load_calibration()  # 只載入 main.py 存好的校正檔，遊戲開始時不會停下來校正
 
         # =====================PICO WARE Init End====================================
 
@@ -224,6 +233,11 @@ class Game:
                     self.triangles.remove(triangle)
                     self.add_new_triangle()
 
+    def update_game(self):
+        # 固定步長的遊戲邏輯：移動敵方球與三角形
+        self.update_enemy_balls()
+        self.update_triangles()
+
     def draw_balls_and_triangles(self):
         self.oled.clear()
 
@@ -277,24 +291,13 @@ class Game:
         print("Game is running...")
         self.is_running = True
         try:
-            # 初始化計時器
-            self.gyro_update_timer = TimeToDo.TimeToDo(10)  # 每 10 毫秒更新主球
-            self.enemy_ball_timer = TimeToDo.TimeToDo(50)  # 每 50 毫秒更新敵方球
-            self.triangle_timer = TimeToDo.TimeToDo(50)  # 每 50 毫秒更新三角形
-            self.draw_timer = TimeToDo.TimeToDo(50)  # 每 50 毫秒繪製畫面
-
-            while self.is_running:
-                # 更新按鈕狀態
-                if self.check_button():
-                    print("Game detected a long press, preparing to return to main menu.")
-                    self.is_running = False
-                    break
-
-                # 執行定時任務
-                self.gyro_update_timer.Do(self.update_gyro_data)
-                self.enemy_ball_timer.Do(self.update_enemy_balls)
-                self.triangle_timer.Do(self.update_triangles)
-                self.draw_timer.Do(self.draw_balls_and_triangles)
+            # 遊戲邏輯每 50 毫秒更新一次，畫面最多每 50 毫秒繪製一次
+            self.loop = GameLoop(50, self.update_game, self.draw_balls_and_triangles)
+            self.gyro_update_task = self.loop.scheduler.every(10, self.update_gyro_data)  # 每 10 毫秒更新主球
+            self.state_task = self.loop.scheduler.every(20, self.check_state)             # 長按離開
+
+            # 執行定時任務，直到 check_state() 偵測到長按而停止
+            self.loop.run()
 
         except Exception as e:
             print(f"An error occurred: {e}")
@@ -305,6 +308,13 @@ class Game:
                 self.oled.display_text("Game Completed")
                 time.sleep(1)
 
+    def check_state(self):
+        # 更新按鈕狀態
+        if self.check_button():
+            print("Game detected a long press, preparing to return to main menu.")
+            self.is_running = False
+            self.loop.stop()
+
     def check_button(self):
         """
         Check if a long button press has occurred to exit the game.
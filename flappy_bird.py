@@ -1,9 +1,15 @@
 import time
-import rp2
+try:
+    import rp2
+except ImportError:
+    rp2 = None
 import random
-from machine import mem32, Pin, I2C
+try:
+    from machine import mem32, Pin, I2C
+except ImportError:
+    mem32 = Pin = I2C = None
 import libraries.sh1107 as sh1107
-import libraries.TimeToDo as TimeToDo
+from libraries.game_loop import GameLoop
 from libraries.Mpu6050_mahony import MPU6050
 
 # ==================== OLED 驅動程式 ====================
@@ -104,8 +110,10 @@ class Game:
         self.score = 0
         self.best_score = 0
         self.game_over = False
-        self.update_timer = TimeToDo.TimeToDo(67)  # 畫面更新頻率，大約15FPS
-        self.OnTiltAnglesTimeTo = TimeToDo.TimeToDo(10)  # 傾斜讀取頻率 10 Hz
+        # 遊戲邏輯固定每 67 毫秒 (大約15FPS) 更新一次，更新後繪製畫面
+        self.loop = GameLoop(67, self.update_game, self.draw_game)
+        self.control_task = self.loop.scheduler.every(10, self.update_control)  # 搖晃偵測頻率
+        self.state_task = self.loop.scheduler.every(20, self.check_state)       # 長按離開與遊戲結束
         self.is_running = True
         self.prev_accel = (0, 0, 0)  # 用於存儲上一個加速度值
         self.shake_threshold = 0.5  # 設置搖晃檢測的閾值
@@ -126,27 +134,26 @@ class Game:
         print("Game is running...")
         self.is_running = True
         try:
-            while self.is_running:
-                if self.update_timer.Do(self.update_game):
-                    pass
-
-                if self.OnTiltAnglesTimeTo.Do(self.update_control):
-                    pass
-
-                if self.check_button():
-                    print("Detected a long press, preparing to exit.")
-                    self.is_running = False
-                    break
-
-                if self.game_over:
-                    self.draw_game_over()
-                    time.sleep(2)
-                    self.init_game()
-
+            self.loop.reset()  # 不補跑 init_game() 等待的時間
+            self.loop.run()    # 直到 check_state() 偵測到長按而停止
         except Exception as e:
             print(f"An error occurred: {e}")
             self.is_running = False
 
+    def check_state(self):
+        """檢查長按離開與遊戲結束"""
+        if self.check_button():
+            print("Detected a long press, preparing to exit.")
+            self.is_running = False
+            self.loop.stop()
+            return
+
+        if self.game_over:
+            self.draw_game_over()
+            time.sleep(2)
+            self.init_game()
+            self.loop.reset()
+
     def update_control(self):
         """根據 MPU6050 加速度數據檢測搖晃"""
         # 讀取加速度數據
@@ -202,9 +209,6 @@ class Game:
             if self.bird.y - self.bird.radius < 0 or self.bird.y + self.bird.radius > self.SCREEN_HEIGHT:
                 self.game_over = True
 
-            # 繪製遊戲畫面
-            self.draw_game()
-
     def draw_game(self):
         """在 OLED 上繪製遊戲畫面"""
         self.oled.display.fill(0)
@@ -272,6 +276,7 @@ def main():
     # 初始化 MPU6050
     i2c0 = I2C(0, scl=Pin(21), sda=Pin(20), freq=400000)
     mpu = MPU6050(i2c0)
+    mpu.load_calibration()  # 只載入 main.py 存好的校正檔，遊戲開始時不會停下來校正
 
     # 創建並運行遊戲實例
     game = Game(oled, mpu)
@@ -26,197 +26,467 @@ mpu.update_mahony()
 mpu.calculate_tilt_angles()
 
 主要方法
-__init__(self, i2c, addr=0x68)
+__init__(self, i2c, addr=0x68, fusion=None)
     初始化 MPU6050 類別。
     參數 i2c 是必須的，它是一個已配置的 I2C 對象。
     參數 addr 是設備的 I2C 地址，默認為 0x68。
+    不再固定等待一秒：輪詢 WHO_AM_I 與 PWR_MGMT_1，感測器一可用就返回 (逾時 1 秒丟出 OSError)。
+    參數 fusion 是姿態融合引擎，默認為 MahonyFusion(two_kp=10.0, two_ki=0.0)。
+    參數 clock 是取得 ticks_us 的函式，默認為 utime.ticks_us；重播錄製資料時傳入 ReplayI2C.ticks_us，
+    見 imu_record.py 的 IMURecorder / ReplayI2C。
 calibrate(self, samples=100)
-    校準 MPU6050，減少讀數誤差。這個方法會收集多個樣本來計算平均偏差。
+    校準 MPU6050，減少讀數誤差。這個方法會收集多個樣本來計算陀螺儀偏差與 roll/pitch 的平均偏移。
+load_or_calibrate(self, path=CALIBRATION_FILE, samples=100, max_temp_delta=10.0, prompt=None)
+    開機時由 main.py 呼叫一次：flash 上有可用的校正檔 (版本相同、同一塊板子與安裝方向、溫度差在範圍內) 就直接載入，
+    否則先呼叫 prompt (螢幕提示平放) 再靜止校正一次並存檔，之後每次開機都不用再等校正。
+    遊戲本身只呼叫 load_calibration()，不會在遊戲開始時突然要求平放。
+save_calibration(self, path=CALIBRATION_FILE) / load_calibration(self, path=CALIBRATION_FILE, max_temp_delta=10.0)
+    手動存取校正檔 (JSON)，calibrate_tilt() 之後呼叫 save_calibration() 就會一起保存加速度偏移。
 update_mahony(self)
     計算mpu6050平躺的。更新姿態估計，使用 Mahony 濾波算法。
     這個方法會自動根據加速度計和陀螺儀的讀數更新四元數，從而得到較準確的姿態角。
     每秒需要進行100運算,運算結果使用get_angles() 取得
+enable_fifo(self, rate_hz=200, dlpf=3) / disable_fifo(self)
+    啟用晶片上的 FIFO 以固定取樣率取樣，之後 update_mahony() 每次把排隊的樣本全部讀出，
+    每個樣本以固定 dt 更新姿態，遊戲每幀只需要呼叫一次。
+    fifo_samples 為上次處理的樣本數，sample_time_us(i) 取得第 i 個樣本的時間戳。
 get_angles(self)
     獲取計算後的歐拉角（Roll, Pitch, Yaw）。角度以度（°）為單位。
+    歐拉角只在呼叫時才計算，並快取到下一次姿態更新。
+get_tilt_direction(self, threshold_deg=10)
+    不使用三角函數，直接由四元數的重力向量判斷傾斜方向：
+    'right'/'left' (roll 超過 ±門檻)、'up'/'down' (pitch 超過 ±門檻) 或 None。
 read_accel(self)
     讀取加速度數據，從 MPU6050 的加速度計傳感器獲取數據。返回的加速度數據經過轉換為 g 單位（重力加速度的倍數）。
 read_gyro(self)
     讀取陀螺儀數據，從 MPU6050 的陀螺儀傳感器獲取數據。返回的陀螺儀數據經過轉換為度每秒（deg/s），描述角速度。
 read_accel_raw(self)
     直接讀取原始加速度數據。
+read_all_into(self, buf=None)
+    一次 I2C 傳輸讀取加速度、溫度、陀螺儀共 14 位元組到預先配置的緩衝區，回傳 7 個原始值。
+set_fusion(self, fusion)
+    更換姿態融合引擎 (fusion.py 的 MahonyFusion、MadgwickFusion、ComplementaryFusion)，
+    也可以在建立時傳入 MPU6050(i2c0, fusion=MadgwickFusion(beta=0.1))，預設為 Mahony。
+    引擎狀態存在 array('f') 裡，每次更新由引擎的 native kernel 計算，
+    q0..q3 與 Mahony 的 twoKp、twoKi、integralFBx..z 屬性讀寫方式不變。
 calculate_tilt_angles_with_filter(self)
     計算mpu6050站立之後的傾斜角度，使用互補濾波器來平滑角度變化，以應對快速動態變化。
     此方法返回的角度以度（°）為單位，並會將角度維持在 -180° 到 180° 的範圍內。
 Get_tilt_angles(self)
     取得Get_tilt_angles計算後的角度
+enable_stats(self, name='I2C0') / disable_stats(self)
+    開始/停止統計 I2C0 的傳輸次數、位元組與微秒數，見 i2c_stats.py
 calibrate_tilt(self, num_samples=100)
     校準站立時傾斜角度，主要用於設置加速度計的偏移值。
+
+MPU6050Sampler(mpu, period_ms=10, mode='thread')
+    背景取樣器：在第二核心 (或 mode='timer' 時由 machine.Timer 排程) 固定頻率執行 update_mahony()，
+    遊戲用 sampler.get_angles() 不阻塞地取得最新角度，不需要在主迴圈中呼叫 update_mahony()。
 '''
 
 import math
 import time
 import utime
-from machine import Pin,I2C,Timer
-from machine import mem32
+try:
+    from machine import Pin,I2C,Timer,unique_id
+    from machine import mem32
+except ImportError:
+    Pin = I2C = Timer = mem32 = unique_id = None  # 電腦上 (CPython) 以假的或重播的 I2C 測試，見 imu_record.py
 from math import atan2, sqrt, pi, sin, cos,degrees
 import math
 import utime as time
-import rp2
+import struct
+import json
+from array import array
+try:
+    import rp2
+except ImportError:
+    rp2 = None
+try:
+    import _thread
+except ImportError:
+    _thread = None
+try:
+    import micropython
+except ImportError:
+    micropython = None
+
+try:
+    from libraries.fusion import MahonyFusion, state_property as _state_property
+except ImportError:
+    from fusion import MahonyFusion, state_property as _state_property
+
+_ACCEL_SCALE = 1.0 / 16384.0         # 原始值 -> g (±2g)
+_GYRO_SCALE = math.pi / 180 / 131.0  # 原始值 -> rad/s (±250 deg/s)
+_FIFO_SAMPLE_SIZE = 12               # FIFO 每個樣本：加速度 6 位元組 + 陀螺儀 6 位元組
+_FIFO_MAX_SAMPLES = 85               # 1024 位元組的 FIFO 最多放得下的完整樣本數
+CALIBRATION_FILE = 'mpu6050_calibration.json'
+_CALIBRATION_VERSION = 2             # 校正檔格式版本，欄位改變時加一，舊檔會被視為過期
+MOUNTING = 'inverted'                # 感測器的安裝方向：倒置 (讀數的 x、y 取負號，初始四元數為倒置)
+_READY_TIMEOUT_MS = 1000             # 上電後等待感測器回應的最長時間
+_READ_RETRIES = 1000                 # MPU6050Sampler.read() 最多重讀幾次，避免寫入端當掉時一直空轉
+
+
+def _fusion_property(name):
+    # 把 self.fusion.<name> 包成可讀寫的屬性 (例如 Mahony 的 twoKp)
+    def getter(self):
+        return getattr(self.fusion, name)
+
+    def setter(self, value):
+        setattr(self.fusion, name, value)
+
+    return property(getter, setter)
 
 
 class MPU6050:
-    def __init__(self, i2c, addr=0x68):
-        time.sleep(1)  # 等待一秒讓電跟上
+    q0 = _state_property(0)
+    q1 = _state_property(1)
+    q2 = _state_property(2)
+    q3 = _state_property(3)
+    integralFBx = _fusion_property('integralFBx')
+    integralFBy = _fusion_property('integralFBy')
+    integralFBz = _fusion_property('integralFBz')
+    twoKp = _fusion_property('twoKp')
+    twoKi = _fusion_property('twoKi')
+
+    def __init__(self, i2c, addr=0x68, fusion=None, clock=None):
         self.i2c = i2c
         self.addr = addr
-        self.init_device()
+        # 取得 ticks_us 時間戳的函式，重播錄製資料時換成 ReplayI2C.ticks_us (見 imu_record.py)
+        self._ticks_us = utime.ticks_us if clock is None else clock
+        self.who_am_i = None  # 感測器解除睡眠成功後才記錄
+        # 校正檔記錄的身分：板子的唯一序號 (machine.unique_id) 與安裝方向，換了板子或方向就要重新校正
+        self.board_id = ''.join('{:02x}'.format(b) for b in unique_id()) if unique_id is not None else None
+        self.mounting = MOUNTING
+        self.init_device()  # 輪詢到感測器可用為止，不再固定等一秒
         self.roll = 0
         self.pitch = 0
         self.yaw = 0
         
-        # Mahony算法相關參數
-        self.twoKp = 2.0 * 5.0  # 2 * proportional gain
-        self.twoKi = 2.0 * 0.0  # 2 * integral gain
-        self.q0 = 0.0
-        self.q1 = 1.0 #因為一開始倒置 所以設定初始狀態為倒置
-        self.q2 = 0.0
-        self.q3 = 0.0
-        self.integralFBx = 0.0
-        self.integralFBy = 0.0
-        self.integralFBz = 0.0
-        self.last_update = utime.ticks_us()
+        # 姿態融合引擎 (見 fusion.py)，預設為 Mahony；狀態存在 array('f') 裡
+        # q0..q3 與 Mahony 的 twoKp、twoKi、integralFBx..z 仍可以像以前一樣當屬性讀寫
+        if fusion is None:
+            fusion = MahonyFusion(
+                two_kp=2.0 * 5.0,  # 2 * proportional gain
+                two_ki=2.0 * 0.0)  # 2 * integral gain
+        self.set_fusion(fusion, 0.0, 1.0, 0.0, 0.0)  # 因為一開始倒置 所以設定初始狀態為倒置
+        self.last_update = self._ticks_us()
         self.inv_sample_freq = 1.0 / 100.0  # 假設採樣頻率為100Hz
         self.roll_offset = 0
         self.pitch_offset = 0
+        self._euler_dirty = False  # 四元數更新後、歐拉角尚未重新計算
+        # get_tilt_direction 依門檻角度預先算好的 sin/cos，門檻改變時才重新計算
+        self._tilt_threshold = None
+        self._tilt_sin = 0.0
+        self._tilt_cos = 1.0
         
         self.accel_x_offset = 0
         self.accel_y_offset = 0
         self.accel_z_offset = 0
+        self.gyro_x_offset = 0  # 陀螺儀靜止時的原始讀數 (偏差)，calibrate() 計算
+        self.gyro_y_offset = 0
+        self.gyro_z_offset = 0
+        self.calibration_temp = None  # 校正時的溫度 (°C)，None 表示尚未校正
         self.inCalibrate = False
         self.last_tilt_angle = 0.0
-    def init_device(self):
-        # 初始化MPU6050
-        self.i2c.writeto_mem(self.addr, 0x6B, b'\x00')  # 解除睡眠模式
+        self._raw = bytearray(14)  # 0x3B-0x48 一次讀取用的緩衝區
+        # FIFO 批次取樣 (enable_fifo)
+        self.fifo_enabled = False
+        self.fifo_rate = 0         # 實際取樣率 Hz
+        self.fifo_dt = 0.0         # 每個樣本固定的時間間隔 (秒)
+        self.fifo_samples = 0      # 上一次 update_fifo() 處理的樣本數
+        self.fifo_overflows = 0    # FIFO 滿了而被清空的次數
+        self.last_sample_us = self._ticks_us()  # 最後一個樣本的時間戳 (ticks_us)
+        self._fifo_buf = None
+        self._fifo_views = None
+        self._fifo_count = bytearray(2)
+    def init_device(self, timeout_ms=_READY_TIMEOUT_MS):
+        # 初始化MPU6050：上電後輪詢 WHO_AM_I 直到感測器回應，解除睡眠後再輪詢 PWR_MGMT_1 確認已醒來
+        # 感測器一可用就返回，超過 timeout_ms 還沒準備好則丟出 OSError
+        start = time.ticks_ms()
+        reg = bytearray(1)
+        woken = False  # 解除睡眠的指令已經成功寫入
+        awake = False
+        while True:
+            try:
+                if not woken:
+                    self.i2c.readfrom_mem_into(self.addr, 0x75, reg)  # WHO_AM_I
+                    who_am_i = reg[0]
+                    self.i2c.writeto_mem(self.addr, 0x6B, b'\x00')  # 解除睡眠模式
+                    woken = True
+                    self.who_am_i = who_am_i
+                self.i2c.readfrom_mem_into(self.addr, 0x6B, reg)  # PWR_MGMT_1
+                awake = reg[0] & 0xC0 == 0  # DEVICE_RESET 與 SLEEP 都已清除
+            except OSError:
+                if time.ticks_diff(time.ticks_ms(), start) > timeout_ms:
+                    raise  # 一直沒有回應，通常是電源或接線問題
+            if awake:
+                return
+            if time.ticks_diff(time.ticks_ms(), start) > timeout_ms:
+                raise OSError('MPU6050 not ready')
+            time.sleep_ms(1)
+
+    def enable_fifo(self, rate_hz=200, dlpf=3):
+        # 設定取樣率分頻、數位低通濾波與晶片上的 FIFO，之後 update_mahony() 改從 FIFO 批次取樣
+        # 取樣率 = 1kHz / (1 + SMPLRT_DIV)，DLPF 啟用 (1-6) 時陀螺儀輸出率為 1kHz
+        # dlpf=3 約 44Hz 頻寬，適合 100-1000Hz 取樣
+        div = max(0, min(255, 1000 // rate_hz - 1))
+        self.fifo_rate = 1000 / (1 + div)
+        self.fifo_dt = 1.0 / self.fifo_rate
+        if self._fifo_buf is None:
+            self._fifo_buf = bytearray(_FIFO_MAX_SAMPLES * _FIFO_SAMPLE_SIZE)
+            self._fifo_views = [None] * (_FIFO_MAX_SAMPLES + 1)  # 依樣本數快取 memoryview
+        self.i2c.writeto_mem(self.addr, 0x1A, bytes((dlpf & 0x07,)))  # CONFIG: DLPF
+        self.i2c.writeto_mem(self.addr, 0x19, bytes((div,)))          # SMPLRT_DIV
+        self.i2c.writeto_mem(self.addr, 0x23, b'\x00')                # FIFO_EN: 先停止寫入
+        self.i2c.writeto_mem(self.addr, 0x6A, b'\x04')                # USER_CTRL: FIFO_RESET
+        self.i2c.writeto_mem(self.addr, 0x6A, b'\x40')                # USER_CTRL: FIFO_EN
+        self.i2c.writeto_mem(self.addr, 0x23, b'\x78')                # FIFO_EN: 加速度 + 陀螺儀 XYZ
+        self.last_sample_us = self._ticks_us()
+        self.fifo_enabled = True
+
+    def disable_fifo(self):
+        # 關閉 FIFO，回到每次 update_mahony() 讀一次目前數值
+        self.i2c.writeto_mem(self.addr, 0x23, b'\x00')
+        self.i2c.writeto_mem(self.addr, 0x6A, b'\x04')
+        self.fifo_enabled = False
+        self.last_update = self._ticks_us()
+
+    def _reset_fifo(self):
+        self.i2c.writeto_mem(self.addr, 0x6A, b'\x44')  # FIFO_EN | FIFO_RESET
+
+    def update_fifo(self):
+        # 一次讀出 FIFO 中所有完整的樣本，每個樣本以固定 dt 執行一次 Mahony 更新
+        # 回傳處理的樣本數
+        self.i2c.readfrom_mem_into(self.addr, 0x72, self._fifo_count)  # FIFO_COUNT_H/L
+        count = (self._fifo_count[0] << 8) | self._fifo_count[1]
+        now = self._ticks_us()
+        if count > _FIFO_MAX_SAMPLES * _FIFO_SAMPLE_SIZE:
+            # FIFO (1024 位元組) 已滿或即將溢位，樣本邊界可能錯位，清空重新開始
+            self._reset_fifo()
+            self.fifo_overflows += 1
+            self.fifo_samples = 0
+            self.last_sample_us = now
+            return 0
+        n = count // _FIFO_SAMPLE_SIZE
+        self.fifo_samples = n
+        if n == 0:
+            return 0
+        view = self._fifo_views[n]
+        if view is None:
+            view = self._fifo_views[n] = memoryview(self._fifo_buf)[:n * _FIFO_SAMPLE_SIZE]
+        # 連續讀取 FIFO_R_W，暫存器位址不會遞增
+        self.i2c.readfrom_mem_into(self.addr, 0x74, view)
+        buf = self._fifo_buf
+        dt = self.fifo_dt
+        ox = self.gyro_x_offset
+        oy = self.gyro_y_offset
+        oz = self.gyro_z_offset
+        for i in range(n):
+            ax, ay, az, gx, gy, gz = struct.unpack_from('>hhhhhh', buf, i * _FIFO_SAMPLE_SIZE)
+            self._mahony_step(-ax * _ACCEL_SCALE, -ay * _ACCEL_SCALE, az * _ACCEL_SCALE,
+                              -(gx - ox) * _GYRO_SCALE, -(gy - oy) * _GYRO_SCALE, (gz - oz) * _GYRO_SCALE, dt)
+        # 最後一個樣本大約是剛剛取得的，第 i 個樣本的時間為 last_sample_us - (n - 1 - i) * dt
+        self.last_sample_us = now
+        self.last_update = now
+        self._euler_dirty = True
+        return n
+
+    def sample_time_us(self, index):
+        # 上一次 update_fifo() 第 index 個樣本的時間戳 (ticks_us)
+        return utime.ticks_add(self.last_sample_us, -int((self.fifo_samples - 1 - index) * self.fifo_dt * 1000000))
+
+    def enable_stats(self, name='I2C0'):
+        # 開始統計 readfrom_mem/writeto_mem 的 I2C 流量，回傳 I2CStats 物件
+        try:
+            from libraries.i2c_stats import I2CStats
+        except ImportError:
+            from i2c_stats import I2CStats
+        if not isinstance(self.i2c, I2CStats):
+            self.i2c = I2CStats(self.i2c, name)
+        return self.i2c
+
+    def disable_stats(self):
+        # 停止統計，改回直接使用原本的 I2C 物件
+        if hasattr(self.i2c, 'snapshot'):
+            self.i2c = self.i2c.i2c
         
     def calibrate(self, samples=100):
+        # 平放靜止時取樣：陀螺儀偏差、roll/pitch 偏移與當時的溫度
         print("Calibrating. Please keep the device still on a flat surface.")
+        fifo_rate = self.fifo_rate if self.fifo_enabled else 0
+        if fifo_rate:
+            self.disable_fifo()  # 校正時每次直接讀取目前數值
         roll_sum = pitch_sum = 0
+        gx_sum = gy_sum = gz_sum = temp_sum = 0
         for _ in range(samples):
             self.update_mahony()
+            _, _, _, temp, gx, gy, gz = struct.unpack_from('>hhhhhhh', self._raw)
+            gx_sum += gx
+            gy_sum += gy
+            gz_sum += gz
+            temp_sum += temp
+            self._update_euler()
             roll_sum += self.roll
             pitch_sum += self.pitch
             time.sleep_ms(10)
         
         self.roll_offset = roll_sum / samples
         self.pitch_offset = pitch_sum / samples
+        self.gyro_x_offset = gx_sum / samples
+        self.gyro_y_offset = gy_sum / samples
+        self.gyro_z_offset = gz_sum / samples
+        self.calibration_temp = temp_sum / samples / 340.0 + 36.53
+        if fifo_rate:
+            self.enable_fifo(fifo_rate)
         print("Calibration complete.")
+
+    def read_temperature(self):
+        # 晶片溫度 (°C)
+        _, _, _, temp, _, _, _ = self.read_all_into()
+        return temp / 340.0 + 36.53
+
+    def save_calibration(self, path=CALIBRATION_FILE):
+        """
+        把校正結果 (陀螺儀偏差、加速度偏移、roll/pitch 偏移與校正時的溫度) 連同板子序號與安裝方向存到 flash。
+
+        :param path: 校正檔路徑。
+        """
+        data = {
+            'version': _CALIBRATION_VERSION,
+            'board_id': self.board_id,
+            'mounting': self.mounting,
+            'temp': self.calibration_temp,
+            'gyro_offset': [self.gyro_x_offset, self.gyro_y_offset, self.gyro_z_offset],
+            'accel_offset': [self.accel_x_offset, self.accel_y_offset, self.accel_z_offset],
+            'roll_offset': self.roll_offset,
+            'pitch_offset': self.pitch_offset,
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    def load_calibration(self, path=CALIBRATION_FILE, max_temp_delta=10.0):
+        """
+        讀取 save_calibration() 存的校正結果，成功回傳 True。
+        檔案不存在、版本不同、不是這塊板子 (machine.unique_id) 存的、安裝方向不同，或目前溫度與校正時相差超過 max_temp_delta 度
+        (陀螺儀偏差會隨溫度改變) 時視為過期，不套用並回傳 False。
+
+        :param path: 校正檔路徑。
+        :param max_temp_delta: 允許的溫度差 (°C)，None 表示不檢查。
+        """
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False  # 沒有檔案或內容損壞
+        if data.get('version') != _CALIBRATION_VERSION:
+            return False
+        if data.get('board_id') != self.board_id or data.get('mounting') != self.mounting:
+            return False  # 別的板子存的，或安裝方向不同
+        temp = data.get('temp')
+        if temp is None:
+            return False
+        if max_temp_delta is not None and abs(self.read_temperature() - temp) > max_temp_delta:
+            return False
+        self.gyro_x_offset, self.gyro_y_offset, self.gyro_z_offset = data['gyro_offset']
+        self.accel_x_offset, self.accel_y_offset, self.accel_z_offset = data['accel_offset']
+        self.roll_offset = data['roll_offset']
+        self.pitch_offset = data['pitch_offset']
+        self.calibration_temp = temp
+        return True
+
+    def load_or_calibrate(self, path=CALIBRATION_FILE, samples=100, max_temp_delta=10.0, prompt=None):
+        """
+        開機時使用 (只在 main.py 呼叫一次)：有可用的校正檔就直接載入 (幾毫秒)，否則執行 calibrate() 並存檔。
+        回傳 True 表示使用了存檔，False 表示重新校正。
+
+        :param prompt: 需要校正時，開始取樣前先呼叫的函數 (例如在螢幕上提示平放並等玩家放好)。
+        """
+        if self.load_calibration(path, max_temp_delta):
+            return True
+        if prompt is not None:
+            prompt()
+        self.calibrate(samples)
+        try:
+            self.save_calibration(path)
+        except OSError:
+            pass  # flash 寫不進去時仍然使用這次的校正結果
+        return False
         
+    def read_all_into(self, buf=None):
+        # 一次讀取 0x3B-0x48 共 14 位元組 (加速度、溫度、陀螺儀)，讀進預先配置的緩衝區
+        # 回傳原始值 (ax, ay, az, temp, gx, gy, gz)
+        if buf is None:
+            buf = self._raw
+        self.i2c.readfrom_mem_into(self.addr, 0x3B, buf)
+        return struct.unpack_from('>hhhhhhh', buf)
+
     def read_accel(self):
         # 讀取加速度數據
-        data = self.i2c.readfrom_mem(self.addr, 0x3B, 6)
-        accel_x = self._combine_bytes(data[0], data[1]) / 16384.0  # 轉換為 g 單位
-        accel_y = self._combine_bytes(data[2], data[3]) / 16384.0
-        accel_z = self._combine_bytes(data[4], data[5]) / 16384.0
-        
-        # 補償反向放置的影響
-        accel_x = -accel_x
-        accel_y = -accel_y
-        return (accel_x, accel_y, accel_z)
+        ax, ay, az, _, _, _, _ = self.read_all_into()
+        # 轉換為 g 單位，並補償反向放置的影響
+        return (-ax * _ACCEL_SCALE, -ay * _ACCEL_SCALE, az * _ACCEL_SCALE)
 
     def read_gyro(self):
         # 讀取陀螺儀數據
-        data = self.i2c.readfrom_mem(self.addr, 0x43, 6)
-        gyro_x = self._combine_bytes(data[0], data[1]) / 131.0  # 轉換為 deg/s
-        gyro_y = self._combine_bytes(data[2], data[3]) / 131.0
-        gyro_z = self._combine_bytes(data[4], data[5]) / 131.0
-         # 補償反向放置的影響
-        gyro_x = -gyro_x
-        gyro_y = -gyro_y
-        
-        return (gyro_x * math.pi / 180, gyro_y * math.pi / 180, gyro_z * math.pi / 180)  # 轉換為 rad/s
-
-    def _combine_bytes(self, msb, lsb):
-        # 組合高位和低位字節
-        value = msb << 8 | lsb
-        if value >= 0x8000:
-            value = -((65535 - value) + 1)
-        return value
+        _, _, _, _, gx, gy, gz = self.read_all_into()
+        # 轉換為 rad/s，並補償反向放置的影響
+        return (-gx * _GYRO_SCALE, -gy * _GYRO_SCALE, gz * _GYRO_SCALE)
 
     def update_mahony(self):
-        ax, ay, az = self.read_accel()
-        gx, gy, gz = self.read_gyro()
+        if self.fifo_enabled:
+            # FIFO 模式：一次取出所有排隊的樣本，每個樣本用固定的 dt 更新
+            self.update_fifo()
+            return
+        # 加速度與陀螺儀在同一次 I2C 傳輸中讀取
+        ax, ay, az, _, gx, gy, gz = self.read_all_into()
+        ax = -ax * _ACCEL_SCALE  # 補償反向放置的影響
+        ay = -ay * _ACCEL_SCALE
+        az = az * _ACCEL_SCALE
+        gx = -(gx - self.gyro_x_offset) * _GYRO_SCALE  # 扣掉校正得到的陀螺儀偏差
+        gy = -(gy - self.gyro_y_offset) * _GYRO_SCALE
+        gz = (gz - self.gyro_z_offset) * _GYRO_SCALE
         
         # 計算採樣週期
-        now = utime.ticks_us()
+        now = self._ticks_us()
         dt = utime.ticks_diff(now, self.last_update) / 1000000.0
         self.last_update = now
 
-        # 正規化加速度向量
-        norm = math.sqrt(ax * ax + ay * ay + az * az)
-        if (norm==0):
-            return
-        recipNorm = 1.0 / norm
-        ax *= recipNorm
-        ay *= recipNorm
-        az *= recipNorm
-
-        # 估算方向誤差向量
-        halfvx = self.q1 * self.q3 - self.q0 * self.q2
-        halfvy = self.q0 * self.q1 + self.q2 * self.q3
-        halfvz = self.q0 * self.q0 - 0.5 + self.q3 * self.q3
-
-        # 誤差是測量值和估算值的叉積
-        halfex = (ay * halfvz - az * halfvy)
-        halfey = (az * halfvx - ax * halfvz)
-        halfez = (ax * halfvy - ay * halfvx)
-
-        # 計算並應用積分反饋（如果啟用）
-        if self.twoKi > 0.0:
-            self.integralFBx += self.twoKi * halfex * dt
-            self.integralFBy += self.twoKi * halfey * dt
-            self.integralFBz += self.twoKi * halfez * dt
-            gx += self.integralFBx
-            gy += self.integralFBy
-            gz += self.integralFBz
-        else:
-            self.integralFBx = 0.0
-            self.integralFBy = 0.0
-            self.integralFBz = 0.0
-
-        # 應用比例反饋
-        gx += self.twoKp * halfex
-        gy += self.twoKp * halfey
-        gz += self.twoKp * halfez
-
-        # 積分四元數比率並正規化
-        gx *= 0.5 * dt
-        gy *= 0.5 * dt
-        gz *= 0.5 * dt
-        qa = self.q0
-        qb = self.q1
-        qc = self.q2
-        self.q0 += (-qb * gx - qc * gy - self.q3 * gz)
-        self.q1 += (qa * gx + qc * gz - self.q3 * gy)
-        self.q2 += (qa * gy - qb * gz + self.q3 * gx)
-        self.q3 += (qa * gz + qb * gy - qc * gx)
-
-        # 正規化四元數
-        norm = math.sqrt(self.q0 * self.q0 + self.q1 * self.q1 + self.q2 * self.q2 + self.q3 * self.q3)
-        if (norm == 0):
-            return
-        recipNorm = 1.0 / norm
-        self.q0 *= recipNorm
-        self.q1 *= recipNorm
-        self.q2 *= recipNorm
-        self.q3 *= recipNorm
+        self._mahony_step(ax, ay, az, gx, gy, gz, dt)
+        self._euler_dirty = True  # 歐拉角等到 get_angles() 才計算
+
+    def _mahony_step(self, ax, ay, az, gx, gy, gz, dt):
+        # 融合引擎的一次更新，ax..az 單位 g，gx..gz 單位 rad/s，dt 單位秒
+        # 直接呼叫引擎的 kernel (MicroPython 上為 native 機器碼)，狀態存在 self._state
+        self._kernel(self._state, ax, ay, az, gx, gy, gz, dt)
 
-        # 計算歐拉角
-        self.roll = math.atan2(2.0 * (self.q0 * self.q1 + self.q2 * self.q3), 1.0 - 2.0 * (self.q1 * self.q1 + self.q2 * self.q2))
-        self.pitch = math.asin(2.0 * (self.q0 * self.q2 - self.q3 * self.q1))
-        self.yaw = math.atan2(2.0 * (self.q0 * self.q3 + self.q1 * self.q2), 1.0 - 2.0 * (self.q2 * self.q2 + self.q3 * self.q3))
+    def set_fusion(self, fusion, q0=None, q1=None, q2=None, q3=None):
+        """
+        更換姿態融合引擎 (MahonyFusion、MadgwickFusion、ComplementaryFusion)。
+
+        :param fusion: 新的引擎。
+        :param q0..q3: 起始四元數，預設延續目前的姿態。
+        """
+        if q0 is None:
+            q0, q1, q2, q3 = self.q0, self.q1, self.q2, self.q3
+        fusion.reset(q0, q1, q2, q3)
+        self.fusion = fusion
+        self._state = fusion.state
+        self._kernel = fusion.kernel
+        self._euler_dirty = True
+
+    def _update_euler(self):
+        # 計算歐拉角 (只在 get_angles() 需要且姿態有更新時執行)
+        self._euler_dirty = False
+        q0, q1, q2, q3 = self._state[0], self._state[1], self._state[2], self._state[3]
+        self.roll = math.atan2(2.0 * (q0 * q1 + q2 * q3), 1.0 - 2.0 * (q1 * q1 + q2 * q2))
+        self.pitch = math.asin(max(-1.0, min(1.0, 2.0 * (q0 * q2 - q3 * q1))))
+        self.yaw = math.atan2(2.0 * (q0 * q3 + q1 * q2), 1.0 - 2.0 * (q2 * q2 + q3 * q3))
 
     
     def get_angles(self): #回傳Eular角度
+        if self._euler_dirty:
+            self._update_euler()
         yaw = self.yaw * 57.29578  # 弧度轉度數
         pitch = self.pitch * 57.29578  # 弧度轉度數
         roll = self.roll * 57.29578 +  180 # 弧度轉度數
@@ -224,11 +494,41 @@ class MPU6050:
             roll = roll - 360
         return -roll , pitch , yaw
     
+    def get_tilt_direction(self, threshold_deg=10):
+        # 直接用四元數的重力向量判斷傾斜方向，不需要三角函數
+        # 與 get_angles() 的判斷等價：|roll| 較大時看 roll，否則看 pitch，超過門檻才算
+        # 回傳 'right' (roll > 門檻)、'left' (roll < -門檻)、'up' (pitch > 門檻)、'down' (pitch < -門檻) 或 None
+        if threshold_deg != self._tilt_threshold:
+            self._tilt_threshold = threshold_deg
+            self._tilt_sin = math.sin(math.radians(threshold_deg))
+            self._tilt_cos = math.cos(math.radians(threshold_deg))
+        state = self._state
+        q0 = state[0]
+        q1 = state[1]
+        q2 = state[2]
+        q3 = state[3]
+        # 重力在感測器座標的方向；裝置倒置安裝，所以 roll 參考的是 -vz
+        vx = 2.0 * (q1 * q3 - q0 * q2)
+        vy = 2.0 * (q0 * q1 + q2 * q3)
+        c = -(q0 * q0 - q1 * q1 - q2 * q2 + q3 * q3)
+        # |roll| > |pitch|：c < 0 時 |roll| 超過 90 度一定較大，
+        # 否則比較 sin^2，sin(roll)^2 > sin(pitch)^2  <=>  vy^2 > vx^2 * (vy^2 + c^2)
+        if c < 0 or vy * vy > vx * vx * (vy * vy + c * c):
+            # roll = atan2(vy, c)；roll > 門檻 <=> vy*cos(門檻) > c*sin(門檻)
+            if vy > 0 and vy * self._tilt_cos > c * self._tilt_sin:
+                return 'right'
+            if vy < 0 and -vy * self._tilt_cos > c * self._tilt_sin:
+                return 'left'
+        else:
+            # pitch = asin(-vx)
+            if -vx > self._tilt_sin:
+                return 'up'
+            if vx > self._tilt_sin:
+                return 'down'
+        return None
+
     def read_accel_raw(self):
-        data = self.i2c.readfrom_mem(self.addr, 0x3B, 6)
-        accel_x = self._combine_bytes(data[0], data[1])
-        accel_y = self._combine_bytes(data[2], data[3])
-        accel_z = self._combine_bytes(data[4], data[5])
+        accel_x, accel_y, accel_z, _, _, _, _ = self.read_all_into()
         # 使用校準值調整讀數
         if (self.inCalibrate == False):
             accel_x -= self.accel_x_offset
@@ -270,12 +570,17 @@ class MPU6050:
     '''
     
     def calculate_tilt_angles(self):
-        # 讀取加速度計和陀螺儀數據
-        ax, ay, az = self.read_accel_raw()
-        gx, gy, gz = self.read_gyro()
+        # 讀取加速度計和陀螺儀數據 (同一次 I2C 傳輸)
+        ax, ay, az, _, gx, gy, gz = self.read_all_into()
+        if (self.inCalibrate == False):
+            ax -= self.accel_x_offset
+            ay -= self.accel_y_offset
+            az -= self.accel_z_offset
+            gz -= self.gyro_z_offset
+        gz = gz * _GYRO_SCALE
 
         # 計算採樣週期
-        now = utime.ticks_us()
+        now = self._ticks_us()
         dt = utime.ticks_diff(now, self.last_update) / 1000000.0
         self.last_update = now
 
@@ -319,10 +624,140 @@ class MPU6050:
         self.accel_x_offset = (sum_x / num_samples ) - 16384  # 站立時 X軸應該接近 16384（即 1g）
         self.accel_y_offset = (sum_y / num_samples)  
         self.accel_z_offset = (sum_z / num_samples)
+        if self.calibration_temp is None:
+            self.calibration_temp = self.read_temperature()
         self.inCalibrate = False
-    
 
-    
+
+class MPU6050Sampler:
+    '''
+    背景取樣：讓姿態計算脫離遊戲主迴圈，在第二核心 (_thread) 或 machine.Timer 中固定頻率執行。
+    最新結果放在預先配置的 slot 中，遊戲隨時可以不阻塞地讀取。
+    啟動後 MPU6050 物件只能由取樣器使用，遊戲不要再直接呼叫 mpu.update_mahony()。
+
+    sampler = MPU6050Sampler(mpu, period_ms=10)       # 預設用第二核心
+    sampler = MPU6050Sampler(mpu, 10, mode='timer')   # 第二核心已被 SH1107 背景更新佔用時改用 Timer
+    sampler.start()
+    roll, pitch, yaw = sampler.get_angles()            # 與 mpu.get_angles() 相同的角度
+    seq = sampler.read(out)                            # out = array('f', 7)：q0..q3, roll, pitch, yaw；讀不到一致的結果時回傳 -1
+    sampler.stop()
+    '''
+    def __init__(self, mpu, period_ms=10, mode='thread'):
+        self.mpu = mpu
+        self.period_ms = period_ms
+        self.mode = mode
+        # 最新結果：q0, q1, q2, q3, roll, pitch, yaw (角度與 get_angles() 相同)
+        self.slot = array('f', [mpu.q0, mpu.q1, mpu.q2, mpu.q3, 0.0, 0.0, 0.0])
+        # 序號鎖：寫入中為奇數，寫完為偶數；讀取端看到奇數或前後不同就重讀
+        self.seq = 0
+        self.errors = 0
+        self.read_failures = 0  # read() 放棄的次數
+        self._out = array('f', [0.0] * 7)
+        self._tmp = array('f', [0.0] * 7)  # read() 先複製到這裡，確認一致後才寫到 out
+        self._running = False
+        self._alive = False
+        self._timer = None
+        self._sample_ref = self._scheduled_sample  # 預先綁定，Timer 中斷裡不配置記憶體
+
+    def start(self):
+        # 啟動取樣，回傳實際使用的模式 ('thread' 或 'timer')
+        if self._running:
+            return self.mode
+        self._running = True
+        if self.mode == 'thread' and _thread is not None:
+            self._alive = True
+            try:
+                _thread.start_new_thread(self._thread_loop, ())
+                return self.mode
+            except Exception as e:
+                print("MPU6050Sampler: thread unavailable, using Timer:", e)
+                self._alive = False
+        self.mode = 'timer'
+        self._timer = Timer(period=self.period_ms, mode=Timer.PERIODIC, callback=self._on_timer)
+        return self.mode
+
+    def stop(self):
+        self._running = False
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        while self._alive:
+            time.sleep_ms(1)
+
+    def _thread_loop(self):
+        period_us = self.period_ms * 1000
+        deadline = time.ticks_us()
+        while self._running:
+            self._sample()
+            deadline = time.ticks_add(deadline, period_us)
+            wait = time.ticks_diff(deadline, time.ticks_us())
+            if wait > 0:
+                time.sleep_us(wait)
+            else:
+                deadline = time.ticks_us()  # 落後太多時不追趕，從現在重新計時
+        self._alive = False
+
+    def _on_timer(self, timer):
+        # 中斷中不能做 I2C，交給 micropython.schedule 在主程式的安全時機執行
+        try:
+            micropython.schedule(self._sample_ref, 0)
+        except RuntimeError:
+            pass  # 排程佇列已滿，略過這一次
+
+    def _scheduled_sample(self, _):
+        if self._running:
+            self._sample()
+
+    def _sample(self):
+        mpu = self.mpu
+        try:
+            mpu.update_mahony()
+            roll, pitch, yaw = mpu.get_angles()
+        except OSError:
+            self.errors += 1  # I2C 偶發錯誤，保留上一次的結果
+            return
+        slot = self.slot
+        state = mpu._state
+        self.seq += 1
+        slot[0] = state[0]
+        slot[1] = state[1]
+        slot[2] = state[2]
+        slot[3] = state[3]
+        slot[4] = roll
+        slot[5] = pitch
+        slot[6] = yaw
+        self.seq += 1
+
+    def read(self, out, retries=_READ_RETRIES):
+        # 把最新結果複製到 out (長度至少 7 的 array('f'))，回傳對應的序號 (每次更新加 2)
+        # 試了 retries 次都讀不到一致的結果 (寫入端卡在寫入中) 時回傳 -1，out 維持原本的內容
+        slot = self.slot
+        tmp = self._tmp
+        for _ in range(retries):
+            seq = self.seq
+            if seq & 1:
+                continue  # 正在寫入
+            for i in range(7):
+                tmp[i] = slot[i]
+            if self.seq == seq:
+                for i in range(7):
+                    out[i] = tmp[i]
+                return seq
+        self.read_failures += 1
+        return -1
+
+    def get_angles(self):
+        # 最新的 roll, pitch, yaw (度)，與 MPU6050.get_angles() 相同
+        out = self._out
+        self.read(out)
+        return out[4], out[5], out[6]
+
+    def get_quaternion(self):
+        out = self._out
+        self.read(out)
+        return out[0], out[1], out[2], out[3]
+
+
 if __name__ == '__main__':
     # mpu6050 的電源
     PAD_CONTROL_REGISTER = 0x4001c05c
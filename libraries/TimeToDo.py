@@ -1,25 +1,125 @@
 import utime as time
 
+SKIP = 'skip'          # 錯過的次數直接放棄，只執行一次，之後回到原本的節拍
+CATCHUP = 'catchup'    # 連續補跑錯過的次數，每次呼叫最多 max_catchup 次
+COALESCE = 'coalesce'  # 合併成一次執行，ticks 為這次代表的週期數，讓函數自己按比例處理
+
 class TimeToDo:
-    def __init__(self, interval_ms):
+    def __init__(self, interval_ms, policy=SKIP, max_catchup=4):
         """
         初始化TimeToDo對象。
-        
+        下一次的執行時間 = 上一次的預定時間 + 間隔，不會因為晚執行而讓整個節拍往後漂移。
+
         :param interval_ms: 以毫秒為單位的執行間隔。
+        :param policy: 落後超過一個間隔時的處理方式：SKIP、CATCHUP 或 COALESCE。
+        :param max_catchup: CATCHUP 時每次 Do() 最多連續執行的次數。
         """
-        self.interval = interval_ms * 1000
+        self.interval = interval_ms * 1000  # 微秒
+        self.policy = policy
+        self.max_catchup = max_catchup
         self.last_time = time.ticks_us()
+        self.deadline = time.ticks_add(self.last_time, self.interval)  # 下一次預定執行的時間
+        self.ticks = 1  # 最近一次執行代表的週期數 (只有 COALESCE 會大於 1)
+        self.reset_stats()
+
+    @property
+    def interval_ms(self):
+        return self.interval // 1000
+
+    @interval_ms.setter
+    def interval_ms(self, ms):
+        # 調整間隔 (毫秒)，下一次的預定時間依新的間隔移動
+        interval = ms * 1000
+        self.deadline = time.ticks_add(self.deadline, interval - self.interval)
+        self.interval = interval
+
+    def set_profiler(self, profiler, name='TimeToDo'):
+        """
+        開始統計 Do() 執行的函數花費的時間與錯過的週期數，傳入 None 停止，見 profiler.py。
+        不啟用時 Do() 直接執行，沒有額外成本。
+
+        :param name: 報告中顯示的名稱。
+        """
+        if '_run' in self.__dict__:
+            del self._run  # 拿掉之前的統計，回到原本的 _run
+        if profiler is not None:
+            self._run = profiler.wrap(self._run, name, source=self)
+
+    def reset_stats(self):
+        """
+        統計歸零。
+        """
+        self.runs = 0            # 執行次數
+        self.missed = 0          # SKIP/COALESCE 放棄或合併掉的週期數，CATCHUP 超過上限放棄的週期數
+        self.late_max_us = 0     # 執行時比預定時間晚的最大微秒數
+        self.late_sum_us = 0
+        self.jitter_max_us = 0   # 相鄰兩次執行的間隔與設定間隔之差的最大值
+        self.jitter_sum_us = 0
+
+    def stats(self):
+        """
+        回傳 dict：執行次數、錯過次數、平均/最大延遲 (微秒)、平均/最大抖動 (微秒)。
+        """
+        runs = self.runs or 1
+        return {
+            'runs': self.runs,
+            'missed': self.missed,
+            'late_avg_us': self.late_sum_us // runs,
+            'late_max_us': self.late_max_us,
+            'jitter_avg_us': self.jitter_sum_us // runs,  # 補跑的次數也算在分母
+            'jitter_max_us': self.jitter_max_us,
+        }
+
+    def _run(self, now, late, func, args, kwargs):
+        # 記錄延遲與抖動後執行 (CATCHUP 同一次呼叫中補跑的部分不計抖動)
+        if now != self.last_time:
+            jitter = abs(time.ticks_diff(now, self.last_time) - self.interval)
+            self.last_time = now
+            self.jitter_sum_us += jitter
+            if jitter > self.jitter_max_us:
+                self.jitter_max_us = jitter
+        self.runs += 1
+        self.late_sum_us += late
+        if late > self.late_max_us:
+            self.late_max_us = late
+        func(*args, **kwargs)
 
     def Do(self, func, *args, **kwargs):
         """
         檢查是否應該執行指定的函數，如果時間到則執行。
-        
+
         :param func: 要執行的函數。
         :param args: 函數的參數。
         :param kwargs: 函數的關鍵字參數。
+        :return: 這次有執行時回傳 True。
         """
         current_time = time.ticks_us()
-        if time.ticks_diff(current_time, self.last_time) >= self.interval:
-            self.last_time = current_time
-            func(*args, **kwargs)
+        late = time.ticks_diff(current_time, self.deadline)
+        if late < 0:
+            return False
+        interval = self.interval
+        if interval <= 0:
+            # 間隔為 0：每次呼叫都執行
+            self.deadline = current_time
+            self._run(current_time, 0, func, args, kwargs)
+            return True
+
+        behind = late // interval  # 除了這一次以外，還錯過了幾個週期
+        if self.policy == CATCHUP:
+            runs = min(behind + 1, self.max_catchup)
+            for i in range(runs):
+                self.deadline = time.ticks_add(self.deadline, interval)
+                self._run(current_time, late - i * interval, func, args, kwargs)
+            behind -= runs - 1
+            if behind > 0:
+                # 補跑也追不上，其餘的放棄
+                self.missed += behind
+                self.deadline = time.ticks_add(self.deadline, behind * interval)
+            return True
 
+        # SKIP / COALESCE：只執行一次，預定時間跳到現在之後的下一個節拍
+        self.ticks = behind + 1 if self.policy == COALESCE else 1
+        self.missed += behind
+        self.deadline = time.ticks_add(self.deadline, (behind + 1) * interval)
+        self._run(current_time, late, func, args, kwargs)
+        return True
@@ -0,0 +1,287 @@
+'''
+這是Micropython
+fusion.py
+可互換的姿態融合引擎：Mahony、Madgwick 與計算量最小的互補濾波。
+每個引擎都把狀態放在 array('f') 裡 (state[0..3] 固定是四元數 q0..q3)，
+並提供一個 kernel(state, ax, ay, az, gx, gy, gz, dt) 函式，MicroPython 上以 @micropython.native 編譯
+(只是比較快，浮點數的中間值仍會配置記憶體，見 mahony_kernel.py)。
+ax..az 單位 g，gx..gz 單位 rad/s，dt 單位秒。
+
+使用範例
+from libraries.fusion import MahonyFusion, MadgwickFusion, ComplementaryFusion
+mpu = MPU6050(i2c0)                              # 預設 MahonyFusion(two_kp=10.0, two_ki=0.0)
+mpu.set_fusion(MadgwickFusion(beta=0.1))         # 換成 Madgwick，目前姿態會帶過去
+mpu.set_fusion(ComplementaryFusion(alpha=0.98))  # 只需要 roll/pitch 的遊戲用最便宜的互補濾波
+
+單獨使用:
+engine = MahonyFusion(two_kp=10.0)
+engine.update(ax, ay, az, gx, gy, gz, dt)
+q0, q1, q2, q3 = engine.quaternion()
+
+引擎
+MahonyFusion(two_kp=10.0, two_ki=0.0)   比例/積分回饋修正陀螺儀，狀態見 mahony_kernel.py
+MadgwickFusion(beta=0.1)               梯度下降修正，beta 越大越相信加速度計
+ComplementaryFusion(alpha=0.98)        只追蹤重力向量：陀螺儀旋轉後與加速度計加權平均，
+                                       不追蹤 yaw (get_angles() 的 yaw 沒有意義)，計算量最小
+電腦上可以用 tools/fusion_bench.py 以錄下的 IMU 資料一次掃描上千組參數，比較各引擎的準確度與計算成本。
+直接執行本檔案可以在板子上量測每個引擎每次更新花費的微秒數
+'''
+import math
+from array import array
+try:
+    import micropython
+except ImportError:
+    # CPython 沒有 micropython 模組，裝飾器不做任何事，以一般 Python 執行
+    class micropython:
+        @staticmethod
+        def native(func):
+            return func
+try:
+    from libraries.mahony_kernel import new_state as _new_mahony_state, mahony_update
+except ImportError:
+    from mahony_kernel import new_state as _new_mahony_state, mahony_update
+
+
+def state_property(index, attr='_state'):
+    """
+    把 self.<attr>[index] 包成可讀寫的屬性。
+    """
+    def getter(self):
+        return getattr(self, attr)[index]
+
+    def setter(self, value):
+        getattr(self, attr)[index] = value
+
+    return property(getter, setter)
+
+
+class _Fusion:
+    # 所有引擎共用的介面，子類別設定 name、kernel 並在 __init__ 建立 self.state
+    name = ''
+    q0 = state_property(0, 'state')
+    q1 = state_property(1, 'state')
+    q2 = state_property(2, 'state')
+    q3 = state_property(3, 'state')
+
+    def update(self, ax, ay, az, gx, gy, gz, dt):
+        # 用一組讀數更新姿態
+        self.kernel(self.state, ax, ay, az, gx, gy, gz, dt)
+
+    def quaternion(self):
+        state = self.state
+        return state[0], state[1], state[2], state[3]
+
+    def reset(self, q0=1.0, q1=0.0, q2=0.0, q3=0.0):
+        # 從指定的四元數重新開始 (內部的積分/累積狀態歸零)
+        state = self.state
+        state[0] = q0
+        state[1] = q1
+        state[2] = q2
+        state[3] = q3
+
+
+# ==================== Mahony ====================
+
+class MahonyFusion(_Fusion):
+    name = 'mahony'
+    integralFBx = state_property(4, 'state')
+    integralFBy = state_property(5, 'state')
+    integralFBz = state_property(6, 'state')
+    twoKp = state_property(7, 'state')
+    twoKi = state_property(8, 'state')
+
+    def __init__(self, two_kp=10.0, two_ki=0.0):
+        """
+        :param two_kp: 2 * 比例增益，越大越快修正到加速度計的方向，但也越容易受震動影響。
+        :param two_ki: 2 * 積分增益，用來抵消陀螺儀偏差，0 表示不使用。
+        """
+        self.state = _new_mahony_state(1.0, 0.0, 0.0, 0.0, two_kp, two_ki)
+        self.kernel = mahony_update
+
+    def reset(self, q0=1.0, q1=0.0, q2=0.0, q3=0.0):
+        _Fusion.reset(self, q0, q1, q2, q3)
+        self.state[4] = 0.0
+        self.state[5] = 0.0
+        self.state[6] = 0.0
+
+
+# ==================== Madgwick ====================
+
+@micropython.native
+def madgwick_update(state, ax, ay, az, gx, gy, gz, dt):
+    # Madgwick IMU (無磁力計) 演算法的一次更新，state = q0, q1, q2, q3, beta
+    q0 = state[0]
+    q1 = state[1]
+    q2 = state[2]
+    q3 = state[3]
+
+    # 陀螺儀得到的四元數變化率
+    qDot0 = 0.5 * (-q1 * gx - q2 * gy - q3 * gz)
+    qDot1 = 0.5 * (q0 * gx + q2 * gz - q3 * gy)
+    qDot2 = 0.5 * (q0 * gy - q1 * gz + q3 * gx)
+    qDot3 = 0.5 * (q0 * gz + q1 * gy - q2 * gx)
+
+    norm = math.sqrt(ax * ax + ay * ay + az * az)
+    if norm != 0:
+        recipNorm = 1.0 / norm
+        ax *= recipNorm
+        ay *= recipNorm
+        az *= recipNorm
+
+        # 目標函數的梯度 (估算的重力方向與加速度計的差)
+        _2q0 = 2.0 * q0
+        _2q1 = 2.0 * q1
+        _2q2 = 2.0 * q2
+        _2q3 = 2.0 * q3
+        _4q0 = 4.0 * q0
+        _4q1 = 4.0 * q1
+        _4q2 = 4.0 * q2
+        _8q1 = 8.0 * q1
+        _8q2 = 8.0 * q2
+        q0q0 = q0 * q0
+        q1q1 = q1 * q1
+        q2q2 = q2 * q2
+        q3q3 = q3 * q3
+        s0 = _4q0 * q2q2 + _2q2 * ax + _4q0 * q1q1 - _2q1 * ay
+        s1 = _4q1 * q3q3 - _2q3 * ax + 4.0 * q0q0 * q1 - _2q0 * ay - _4q1 + _8q1 * q1q1 + _8q1 * q2q2 + _4q1 * az
+        s2 = 4.0 * q0q0 * q2 + _2q0 * ax + _4q2 * q3q3 - _2q3 * ay - _4q2 + _8q2 * q1q1 + _8q2 * q2q2 + _4q2 * az
+        s3 = 4.0 * q1q1 * q3 - _2q1 * ax + 4.0 * q2q2 * q3 - _2q2 * ay
+        norm = math.sqrt(s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3)
+        if norm != 0:
+            recipNorm = state[4] / norm  # beta / |梯度|
+            qDot0 -= recipNorm * s0
+            qDot1 -= recipNorm * s1
+            qDot2 -= recipNorm * s2
+            qDot3 -= recipNorm * s3
+
+    # 積分並正規化四元數
+    q0 += qDot0 * dt
+    q1 += qDot1 * dt
+    q2 += qDot2 * dt
+    q3 += qDot3 * dt
+    norm = math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+    if norm != 0:
+        recipNorm = 1.0 / norm
+        q0 *= recipNorm
+        q1 *= recipNorm
+        q2 *= recipNorm
+        q3 *= recipNorm
+    state[0] = q0
+    state[1] = q1
+    state[2] = q2
+    state[3] = q3
+
+
+class MadgwickFusion(_Fusion):
+    name = 'madgwick'
+    beta = state_property(4, 'state')
+
+    def __init__(self, beta=0.1):
+        """
+        :param beta: 梯度下降的步長 (rad/s)，越大越快修正到加速度計的方向。
+        """
+        self.state = array('f', [1.0, 0.0, 0.0, 0.0, beta])
+        self.kernel = madgwick_update
+
+
+# ==================== 互補濾波 ====================
+
+@micropython.native
+def complementary_update(state, ax, ay, az, gx, gy, gz, dt):
+    # 只追蹤重力向量 v，state = q0, q1, q2, q3, vx, vy, vz, alpha
+    vx = state[4]
+    vy = state[5]
+    vz = state[6]
+
+    # 陀螺儀：機體座標中的重力向量以 -ω 旋轉，dv/dt = v × ω
+    nx = vx + (vy * gz - vz * gy) * dt
+    ny = vy + (vz * gx - vx * gz) * dt
+    nz = vz + (vx * gy - vy * gx) * dt
+
+    # 加速度計：加權平均
+    norm = math.sqrt(ax * ax + ay * ay + az * az)
+    if norm != 0:
+        alpha = state[7]
+        k = (1.0 - alpha) / norm
+        nx = alpha * nx + k * ax
+        ny = alpha * ny + k * ay
+        nz = alpha * nz + k * az
+
+    norm = math.sqrt(nx * nx + ny * ny + nz * nz)
+    if norm == 0:
+        return
+    recipNorm = 1.0 / norm
+    vx = nx * recipNorm
+    vy = ny * recipNorm
+    vz = nz * recipNorm
+    state[4] = vx
+    state[5] = vy
+    state[6] = vz
+
+    # 換成沒有 yaw 的四元數，讓 get_angles()/get_tilt_direction() 得到相同的 roll/pitch
+    # 平躺朝上與朝下分開算，避免除以接近 0 的數
+    if vz >= 0:
+        a = math.sqrt(0.5 * (1.0 + vz))
+        k = 0.5 / a
+        state[0] = a
+        state[1] = vy * k
+        state[2] = -vx * k
+        state[3] = 0.0
+    else:
+        b = math.sqrt(0.5 * (1.0 - vz))
+        k = 0.5 / b
+        state[0] = vy * k
+        state[1] = b
+        state[2] = 0.0
+        state[3] = vx * k
+
+
+class ComplementaryFusion(_Fusion):
+    name = 'complementary'
+    alpha = state_property(7, 'state')
+
+    def __init__(self, alpha=0.98):
+        """
+        :param alpha: 每個樣本保留陀螺儀結果的比例，其餘 1 - alpha 取自加速度計。
+        """
+        self.state = array('f', [1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0, alpha])
+        self.kernel = complementary_update
+
+    def reset(self, q0=1.0, q1=0.0, q2=0.0, q3=0.0):
+        _Fusion.reset(self, q0, q1, q2, q3)
+        # 由四元數算出機體座標中的重力向量
+        state = self.state
+        state[4] = 2.0 * (q1 * q3 - q0 * q2)
+        state[5] = 2.0 * (q0 * q1 + q2 * q3)
+        state[6] = q0 * q0 - q1 * q1 - q2 * q2 + q3 * q3
+
+
+ENGINES = {
+    'mahony': MahonyFusion,
+    'madgwick': MadgwickFusion,
+    'complementary': ComplementaryFusion,
+}
+
+
+def benchmark(updates=1000):
+    """
+    量測每個引擎每次更新的平均耗時 (微秒)，輸入是一組固定的、接近平躺倒置靜止的讀數。
+    結果可以用 --cost 傳給 tools/fusion_bench.py。
+    """
+    import utime as time
+    results = {}
+    for name, engine_class in ENGINES.items():
+        engine = engine_class()
+        engine.reset(0.0, 1.0, 0.0, 0.0)
+        kernel = engine.kernel
+        state = engine.state
+        start = time.ticks_us()
+        for _ in range(updates):
+            kernel(state, 0.01, -0.02, -1.0, 0.001, -0.002, 0.0005, 0.01)
+        results[name] = time.ticks_diff(time.ticks_us(), start) / updates
+        print("{}: {:.1f} us/update".format(name, results[name]))
+    return results
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,163 @@
+'''
+這是Micropython
+game_loop.py
+固定時間步長的遊戲迴圈，建立在 scheduler.Scheduler 上。
+
+遊戲邏輯 (update) 以固定的步長執行：經過的時間累加到 accumulator，每滿一個步長執行一次 update()，
+所以不論畫面畫得快或慢，遊戲速度都一樣。畫面 (render) 另外有最高頻率的限制，
+而且模擬落後時會先跳過畫面讓 update 追上 (frame skipping)，CPU 只花在真的會顯示的畫面上。
+
+使用範例
+from libraries.game_loop import GameLoop
+loop = GameLoop(67, self.update_game, self.draw_game)                   # 邏輯 15 Hz，每次更新後畫一次
+loop = GameLoop(33, self.update_game, self.draw_game, render_ms=17,
+                dirty_only=True)                                        # 邏輯 30 Hz，畫面最多 60 FPS 且只在有變化時畫
+control_task = loop.scheduler.every(10, self.update_control)            # 其他週期任務放在同一個排程器
+loop.invalidate()                                                       # 在 update 以外改變了畫面內容 (例如陀螺儀移動主角)
+loop.reset()                                                            # 暫停 (time.sleep) 之後從現在重新計時，不補跑暫停的時間
+loop.run()                                                              # 一直執行到呼叫 loop.stop()
+
+執行規則
+- 每次 tick (週期為 step_ms 與 render_ms 較小者) 先執行到期的 update，最多 max_steps 次；
+  還追不上的部分直接丟掉 (記在 dropped)，避免越落後越慢的惡性循環。
+- update 之後如果又已經落後一整個步長，跳過這次的畫面，但連續跳過不超過 max_skip 次。
+- dirty_only=True 時只有執行過 update 或呼叫過 invalidate() 才會畫。
+'''
+try:
+    from libraries.scheduler import Scheduler, ticks_add, ticks_diff
+except ImportError:
+    from scheduler import Scheduler, ticks_add, ticks_diff
+
+
+class GameLoop:
+    def __init__(self, step_ms, update, render, render_ms=None, max_steps=4, max_skip=4,
+                 dirty_only=False, scheduler=None):
+        """
+        :param step_ms: 遊戲邏輯的固定步長 (毫秒)。
+        :param update: 每個步長執行一次的函數，不帶參數。
+        :param render: 繪製畫面的函數，不帶參數。
+        :param render_ms: 兩次繪製之間最短的毫秒數，預設與 step_ms 相同。
+        :param max_steps: 每次 tick 最多連續執行的 update 次數。
+        :param max_skip: 最多連續跳過的畫面數，之後即使落後也會畫一次。
+        :param dirty_only: 只有畫面內容有變化時才繪製。
+        :param scheduler: 共用的 Scheduler，預設建立一個新的。
+        """
+        self.scheduler = Scheduler() if scheduler is None else scheduler
+        self.update = update
+        self.render = render
+        self._callbacks = (update, render)
+        self.step_us = int(step_ms * 1000)
+        self.render_us = self.step_us if render_ms is None else int(render_ms * 1000)
+        self.max_steps = max_steps
+        self.max_skip = max_skip
+        self.dirty_only = dirty_only
+        self.task = self.scheduler.every(min(self.step_us, self.render_us) / 1000, self._tick)
+        if self.scheduler.profiler is not None:
+            self._wrap_callbacks(self.scheduler.profiler)
+        self.reset_stats()
+        self.reset()
+
+    @property
+    def step_ms(self):
+        return self.step_us // 1000
+
+    def reset(self):
+        """
+        從現在重新計時：清空累積的時間，下一次 tick 一個週期後執行，並且會畫一次畫面。
+        """
+        self.accumulator = 0
+        self.last_time = self.scheduler.now()
+        self.scheduler.restart(self.task)  # tick 的節拍對齊 last_time，每次 tick 剛好累積一個步長
+        self.next_render = self.last_time
+        self.skipped = 0   # 目前連續跳過的畫面數
+        self.dirty = True
+
+    def set_profiler(self, profiler):
+        """
+        開始統計 update 與 render 各自的執行時間 (排程器上的其他任務也一起)，傳入 None 停止，見 profiler.py。
+        """
+        self.update, self.render = self._callbacks
+        if profiler is not None:
+            self._wrap_callbacks(profiler)
+        self.scheduler.set_profiler(profiler)
+
+    def _wrap_callbacks(self, profiler):
+        self.update = profiler.wrap(self.update)
+        self.render = profiler.wrap(self.render)
+
+    def invalidate(self):
+        """
+        標記畫面需要重畫 (dirty_only=True 時才有差別)。
+        """
+        self.dirty = True
+
+    def reset_stats(self):
+        """
+        統計歸零。
+        """
+        self.steps = 0          # 執行 update 的次數
+        self.frames = 0         # 執行 render 的次數
+        self.frames_skipped = 0 # 因為落後而跳過的畫面數
+        self.steps_dropped = 0  # 超過 max_steps 而丟掉的步數
+
+    def stats(self):
+        """
+        回傳 dict：update 次數、render 次數、跳過的畫面數、丟掉的步數。
+        """
+        return {
+            'steps': self.steps,
+            'frames': self.frames,
+            'frames_skipped': self.frames_skipped,
+            'steps_dropped': self.steps_dropped,
+        }
+
+    def _tick(self):
+        now = self.scheduler.now()
+        self.accumulator += ticks_diff(now, self.last_time)
+        self.last_time = now
+        step_us = self.step_us
+
+        # 固定步長更新
+        steps = 0
+        while self.accumulator >= step_us and steps < self.max_steps:
+            self.accumulator -= step_us
+            self.update()
+            steps += 1
+        if steps:
+            self.steps += steps
+            self.dirty = True
+        if self.accumulator >= step_us:
+            # 追不上了，丟掉多出來的步數
+            dropped = self.accumulator // step_us
+            self.steps_dropped += dropped
+            self.accumulator -= dropped * step_us
+
+        # 繪製畫面 (有頻率上限)
+        if ticks_diff(now, self.next_render) < 0 or (self.dirty_only and not self.dirty):
+            return
+        if steps and self.skipped < self.max_skip:
+            # update 花掉的時間讓模擬又落後一整個步長：先跳過這個畫面
+            if self.accumulator + ticks_diff(self.scheduler.now(), now) >= step_us:
+                self.skipped += 1
+                self.frames_skipped += 1
+                return
+        self.next_render = ticks_add(self.next_render, self.render_us)
+        if ticks_diff(self.next_render, now) <= 0:
+            # 晚了超過一個畫面：從現在重新計算，但不要錯過下一次 tick
+            self.next_render = ticks_add(now, self.render_us - self.task.period_us)
+        self.skipped = 0
+        self.dirty = False
+        self.frames += 1
+        self.render()
+
+    def run(self):
+        """
+        執行排程器 (包含同一個排程器上的其他任務)，直到呼叫 stop()。
+        """
+        self.scheduler.run()
+
+    def stop(self):
+        """
+        讓 run() 在目前的任務執行完後返回。
+        """
+        self.scheduler.stop()
@@ -0,0 +1,129 @@
+'''
+這是Micropython
+i2c_stats.py
+I2C 匯流排流量統計：包住一個 I2C 物件，記錄傳輸次數、位元組數與累計花費的微秒數。
+只有在需要時才包上去，不啟用時驅動程式直接使用原本的 I2C 物件，沒有任何額外成本。
+
+使用範例
+import libraries.i2c_stats as i2c_stats
+imu_bus = mpu.enable_stats('I2C0 IMU')        # MPU6050 的讀寫開始計數
+oled_bus = display.enable_stats('I2C1 OLED')  # SH1107 的 write_cmd/write_data 開始計數
+
+每一幀結束時讀取並歸零:
+transactions, nbytes, busy_us = oled_bus.snapshot()
+oled_bus.reset()
+
+每秒印出一次匯流排使用率 (可以放進 TimeToDo(1000)):
+i2c_stats.report(imu_bus, oled_bus)
+I2C0 IMU: 100 tr/s 1400 B/s busy 37000 us/s (3.7%)
+
+不再需要時: mpu.disable_stats() / display.disable_stats()
+'''
+import utime as time
+
+
+class I2CStats:
+    def __init__(self, i2c, name='I2C'):
+        """
+        :param i2c: 要統計的 I2C 物件 (machine.I2C 或任何相容的物件)。
+        :param name: report() 顯示的名稱。
+        """
+        self.i2c = i2c
+        self.name = name
+        if hasattr(i2c, 'writevto'):
+            # 只有原本的匯流排有 writevto 才提供，驅動程式用 hasattr 判斷時結果與沒包之前相同
+            self.writevto = self._writevto
+        self.reset()
+
+    def reset(self):
+        """
+        統計歸零，並從現在開始重新計算經過時間。
+        """
+        self.transactions = 0
+        self.bytes = 0
+        self.busy_us = 0
+        self.since = time.ticks_us()
+
+    def snapshot(self):
+        """
+        回傳 (傳輸次數, 位元組數, 累計微秒數)。
+        """
+        return self.transactions, self.bytes, self.busy_us
+
+    def _count(self, start, nbytes):
+        self.busy_us += time.ticks_diff(time.ticks_us(), start)
+        self.transactions += 1
+        self.bytes += nbytes
+
+    # ==================== 與 machine.I2C 相同的介面 ====================
+
+    def writeto(self, addr, buf, stop=True):
+        start = time.ticks_us()
+        result = self.i2c.writeto(addr, buf, stop)
+        self._count(start, len(buf))
+        return result
+
+    def _writevto(self, addr, vector, stop=True):
+        start = time.ticks_us()
+        result = self.i2c.writevto(addr, vector, stop)
+        nbytes = 0
+        for buf in vector:
+            nbytes += len(buf)
+        self._count(start, nbytes)
+        return result
+
+    def readfrom(self, addr, nbytes, stop=True):
+        start = time.ticks_us()
+        result = self.i2c.readfrom(addr, nbytes, stop)
+        self._count(start, nbytes)
+        return result
+
+    def readfrom_into(self, addr, buf, stop=True):
+        start = time.ticks_us()
+        result = self.i2c.readfrom_into(addr, buf, stop)
+        self._count(start, len(buf))
+        return result
+
+    def readfrom_mem(self, addr, memaddr, nbytes, *args, **kwargs):
+        start = time.ticks_us()
+        result = self.i2c.readfrom_mem(addr, memaddr, nbytes, *args, **kwargs)
+        self._count(start, nbytes)
+        return result
+
+    def readfrom_mem_into(self, addr, memaddr, buf, *args, **kwargs):
+        start = time.ticks_us()
+        result = self.i2c.readfrom_mem_into(addr, memaddr, buf, *args, **kwargs)
+        self._count(start, len(buf))
+        return result
+
+    def writeto_mem(self, addr, memaddr, buf, *args, **kwargs):
+        start = time.ticks_us()
+        result = self.i2c.writeto_mem(addr, memaddr, buf, *args, **kwargs)
+        self._count(start, len(buf))
+        return result
+
+    def __getattr__(self, name):
+        # scan() 等其他方法直接交給原本的 I2C 物件
+        return getattr(self.i2c, name)
+
+
+def report(*buses, reset=True):
+    """
+    印出每個匯流排自上次歸零以來每秒的傳輸次數、位元組數與忙碌時間 (使用率)。
+
+    :param buses: I2CStats 物件。
+    :param reset: 印完後是否歸零。
+    """
+    now = time.ticks_us()
+    for bus in buses:
+        elapsed = time.ticks_diff(now, bus.since)
+        if elapsed <= 0:
+            continue
+        print("{}: {} tr/s {} B/s busy {} us/s ({:.1f}%)".format(
+            bus.name,
+            bus.transactions * 1000000 // elapsed,
+            bus.bytes * 1000000 // elapsed,
+            bus.busy_us * 1000000 // elapsed,
+            bus.busy_us * 100 / elapsed))
+        if reset:
+            bus.reset()
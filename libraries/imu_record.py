@@ -0,0 +1,174 @@
+'''
+這是Micropython
+imu_record.py
+錄製與重播 MPU6050 的 I2C 讀取，讓姿態計算與遊戲的控制流程可以不接感測器、在電腦上重現。
+
+IMURecorder 包住 I2C 物件 (與 i2c_stats.I2CStats 相同的方式)，把每次讀取 MPU6050 暫存器的
+結果連同 ticks_us 時間戳寫進一個精簡的二進位檔。ReplayI2C 依序把這些位元組交還給 MPU6050，
+並以 ticks_us() 提供錄製當時的時間，所以每次更新的 dt 與錄製時完全相同。
+
+錄製 (板子上)
+from libraries.imu_record import IMURecorder
+recorder = IMURecorder(i2c0, 'imu.rec')   # 要在建立 MPU6050 之前包上去
+mpu = MPU6050(recorder)
+... 正常玩遊戲 ...
+recorder.close()
+
+重播 (板子或電腦上)
+from libraries.imu_record import ReplayI2C
+replay = ReplayI2C('imu.rec')
+mpu = MPU6050(replay, clock=replay.ticks_us)
+while replay.remaining():
+    mpu.update_mahony()
+    print(mpu.get_angles())
+讀完之後再讀會丟出 EOFError；讀取的暫存器或長度與錄製時不同 (程式流程改變) 會丟出 ValueError。
+寫入 (writeto_mem 等) 不會被錄下，重播時直接忽略。
+
+檔案格式 (little-endian)
+標頭  b'IMUR' + version (B) + I2C 位址 (B) + 開始錄製時的 ticks_us (I)
+記錄  ticks_us (I) + 暫存器 (B) + 長度 (H) + 讀到的位元組
+14 位元組的連續讀取每筆 21 位元組，100 Hz 時約 2 KB/s。
+'''
+import struct
+try:
+    import utime as time
+except ImportError:
+    time = None  # 電腦上 (CPython) 只用得到 read_records / ReplayI2C
+
+MAGIC = b'IMUR'
+VERSION = 1
+_HEADER = '<4sBBI'
+_RECORD = '<IBH'
+_HEADER_SIZE = struct.calcsize(_HEADER)
+_RECORD_SIZE = struct.calcsize(_RECORD)
+
+
+class IMURecorder:
+    def __init__(self, i2c, path, addr=0x68):
+        """
+        :param i2c: 實際連接 MPU6050 的 I2C 物件。
+        :param path: 錄製檔案的路徑，已存在的檔案會被覆蓋。
+        :param addr: 要錄製的 I2C 位址，其他裝置的讀取不會被錄下。
+        """
+        self.i2c = i2c
+        self.addr = addr
+        self.records = 0
+        self.file = open(path, 'wb')
+        self.file.write(struct.pack(_HEADER, MAGIC, VERSION, addr, time.ticks_us() & 0xFFFFFFFF))
+        self._head = bytearray(_RECORD_SIZE)  # 每筆記錄的表頭，重複使用避免配置記憶體
+
+    def _log(self, memaddr, data):
+        if self.file is None:
+            return
+        struct.pack_into(_RECORD, self._head, 0, time.ticks_us() & 0xFFFFFFFF, memaddr, len(data))
+        self.file.write(self._head)
+        self.file.write(data)
+        self.records += 1
+
+    def readfrom_mem_into(self, addr, memaddr, buf, *args, **kwargs):
+        result = self.i2c.readfrom_mem_into(addr, memaddr, buf, *args, **kwargs)
+        if addr == self.addr:
+            self._log(memaddr, buf)
+        return result
+
+    def readfrom_mem(self, addr, memaddr, nbytes, *args, **kwargs):
+        data = self.i2c.readfrom_mem(addr, memaddr, nbytes, *args, **kwargs)
+        if addr == self.addr:
+            self._log(memaddr, data)
+        return data
+
+    def close(self):
+        """
+        把資料寫入並關閉檔案，之後的讀取照常進行但不再錄製。
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __getattr__(self, name):
+        # 寫入、scan() 等其他方法直接交給原本的 I2C 物件
+        return getattr(self.i2c, name)
+
+
+def read_records(path):
+    """
+    讀取錄製檔案，回傳 (標頭 dict, [(ticks_us, 暫存器, bytes), ...])。
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, addr, start = struct.unpack_from(_HEADER, data, 0)
+    if magic != MAGIC:
+        raise ValueError('not an IMU recording')
+    if version != VERSION:
+        raise ValueError('unsupported IMU recording version {}'.format(version))
+    records = []
+    offset = _HEADER_SIZE
+    while offset + _RECORD_SIZE <= len(data):
+        ticks, memaddr, length = struct.unpack_from(_RECORD, data, offset)
+        offset += _RECORD_SIZE
+        if offset + length > len(data):
+            break  # 錄製中途斷電，最後一筆不完整
+        records.append((ticks, memaddr, data[offset:offset + length]))
+        offset += length
+    return {'version': version, 'addr': addr, 'start_us': start}, records
+
+
+class ReplayI2C:
+    def __init__(self, path, addr=None):
+        """
+        :param path: IMURecorder 錄製的檔案。
+        :param addr: 回應的 I2C 位址，預設為錄製時的位址。
+        """
+        header, self.records = read_records(path)
+        self.addr = header['addr'] if addr is None else addr
+        self.start_us = header['start_us']
+        self.rewind()
+
+    def rewind(self):
+        """
+        從頭開始重播。
+        """
+        self.index = 0
+        self.now = self.start_us
+        self.writes = 0
+
+    def remaining(self):
+        """
+        還沒重播的記錄數。
+        """
+        return len(self.records) - self.index
+
+    def ticks_us(self):
+        """
+        最後一次重播的讀取在錄製時的 ticks_us，傳給 MPU6050(clock=...) 取代 utime.ticks_us。
+        """
+        return self.now
+
+    def _next(self, addr, memaddr, nbytes):
+        if addr != self.addr:
+            raise OSError(19)  # ENODEV，跟 machine.I2C 找不到裝置時一樣
+        if self.index >= len(self.records):
+            raise EOFError('IMU recording exhausted')
+        ticks, recorded, data = self.records[self.index]
+        if recorded != memaddr or len(data) != nbytes:
+            raise ValueError('replay out of sync at record {}: recorded 0x{:02X}/{} bytes, read 0x{:02X}/{} bytes'.format(
+                self.index, recorded, len(data), memaddr, nbytes))
+        self.index += 1
+        self.now = ticks
+        return data
+
+    # ==================== 與 machine.I2C 相同的介面 ====================
+
+    def readfrom_mem_into(self, addr, memaddr, buf, *args, **kwargs):
+        buf[:] = self._next(addr, memaddr, len(buf))
+
+    def readfrom_mem(self, addr, memaddr, nbytes, *args, **kwargs):
+        return bytes(self._next(addr, memaddr, nbytes))
+
+    def writeto_mem(self, addr, memaddr, buf, *args, **kwargs):
+        if addr != self.addr:
+            raise OSError(19)
+        self.writes += 1
+
+    def scan(self):
+        return [self.addr]
@@ -0,0 +1,149 @@
+'''
+這是Micropython
+mahony_kernel.py
+Mahony 濾波的單步更新核心，濾波器狀態放在一個 array('f') 裡，
+不再透過 self.q0..self.q3 等屬性讀寫，在 MicroPython 上以 @micropython.native 編譯成機器碼。
+在電腦上 (CPython) 沒有 micropython 模組時，同一份程式碼以一般 Python 執行，結果相同。
+
+記憶體配置
+native 只省掉 bytecode 的直譯與 self 屬性的查找/寫回，浮點數在 RP2040 的 MicroPython 上仍然是
+配置在堆積上的物件：每個中間結果 (每次更新幾十個) 以及 update_mahony() 換算單位時都會配置，
+GC 照樣會發生，也不能在硬體中斷 (hard IRQ) 裡呼叫 (MPU6050Sampler 的 Timer 模式用 micropython.schedule)。
+要完全不配置必須改成 viper 加上整數/定點數的狀態與輸入，會改變濾波器的數值結果，目前沒有採用。
+
+狀態陣列的內容 (new_state() 建立)
+state[0..3] = q0, q1, q2, q3          四元數
+state[4..6] = integralFBx, y, z        積分回饋
+state[7]    = twoKp                    2 * 比例增益
+state[8]    = twoKi                    2 * 積分增益
+
+使用範例
+from libraries.mahony_kernel import new_state, mahony_update
+state = new_state(0.0, 1.0, 0.0, 0.0, two_kp=10.0)
+mahony_update(state, ax, ay, az, gx, gy, gz, dt)   # ax..az 單位 g，gx..gz 單位 rad/s，dt 單位秒
+
+直接執行本檔案可以在板子上量測每次更新花費的微秒數
+'''
+import math
+from array import array
+try:
+    import micropython
+except ImportError:
+    # CPython 沒有 micropython 模組，裝飾器不做任何事，以一般 Python 執行
+    class micropython:
+        @staticmethod
+        def native(func):
+            return func
+
+Q0 = 0
+Q1 = 1
+Q2 = 2
+Q3 = 3
+INTEGRAL_X = 4
+INTEGRAL_Y = 5
+INTEGRAL_Z = 6
+TWO_KP = 7
+TWO_KI = 8
+STATE_SIZE = 9
+
+
+def new_state(q0=1.0, q1=0.0, q2=0.0, q3=0.0, two_kp=10.0, two_ki=0.0):
+    """
+    建立 Mahony 濾波器的狀態陣列。
+
+    :param q0..q3: 初始四元數。
+    :param two_kp: 2 * 比例增益。
+    :param two_ki: 2 * 積分增益，0 表示不使用積分回饋。
+    """
+    return array('f', [q0, q1, q2, q3, 0.0, 0.0, 0.0, two_kp, two_ki])
+
+
+@micropython.native
+def mahony_update(state, ax, ay, az, gx, gy, gz, dt):
+    # Mahony 濾波的一次更新，結果直接寫回 state
+    # 正規化加速度向量
+    norm = math.sqrt(ax * ax + ay * ay + az * az)
+    if norm == 0:
+        return
+    recipNorm = 1.0 / norm
+    ax *= recipNorm
+    ay *= recipNorm
+    az *= recipNorm
+
+    q0 = state[0]
+    q1 = state[1]
+    q2 = state[2]
+    q3 = state[3]
+
+    # 估算方向誤差向量
+    halfvx = q1 * q3 - q0 * q2
+    halfvy = q0 * q1 + q2 * q3
+    halfvz = q0 * q0 - 0.5 + q3 * q3
+
+    # 誤差是測量值和估算值的叉積
+    halfex = ay * halfvz - az * halfvy
+    halfey = az * halfvx - ax * halfvz
+    halfez = ax * halfvy - ay * halfvx
+
+    # 計算並應用積分反饋（如果啟用）
+    twoKi = state[8]
+    if twoKi > 0.0:
+        state[4] += twoKi * halfex * dt
+        state[5] += twoKi * halfey * dt
+        state[6] += twoKi * halfez * dt
+        gx += state[4]
+        gy += state[5]
+        gz += state[6]
+    else:
+        state[4] = 0.0
+        state[5] = 0.0
+        state[6] = 0.0
+
+    # 應用比例反饋
+    twoKp = state[7]
+    gx += twoKp * halfex
+    gy += twoKp * halfey
+    gz += twoKp * halfez
+
+    # 積分四元數比率並正規化
+    halfdt = 0.5 * dt
+    gx *= halfdt
+    gy *= halfdt
+    gz *= halfdt
+    n0 = q0 + (-q1 * gx - q2 * gy - q3 * gz)
+    n1 = q1 + (q0 * gx + q2 * gz - q3 * gy)
+    n2 = q2 + (q0 * gy - q1 * gz + q3 * gx)
+    n3 = q3 + (q0 * gz + q1 * gy - q2 * gx)
+
+    # 正規化四元數
+    norm = math.sqrt(n0 * n0 + n1 * n1 + n2 * n2 + n3 * n3)
+    if norm == 0:
+        state[0] = n0
+        state[1] = n1
+        state[2] = n2
+        state[3] = n3
+        return
+    recipNorm = 1.0 / norm
+    state[0] = n0 * recipNorm
+    state[1] = n1 * recipNorm
+    state[2] = n2 * recipNorm
+    state[3] = n3 * recipNorm
+
+
+def benchmark(updates=1000):
+    """
+    量測 mahony_update 每次更新的平均耗時 (微秒)。
+    輸入是一組固定的、接近平躺靜止的讀數，與 100 Hz 取樣時的 dt 相同。
+    """
+    import utime as time
+    state = new_state(0.0, 1.0, 0.0, 0.0)
+    start = time.ticks_us()
+    for _ in range(updates):
+        mahony_update(state, 0.01, -0.02, -1.0, 0.001, -0.002, 0.0005, 0.01)
+    elapsed = time.ticks_diff(time.ticks_us(), start)
+    print("mahony_update: {:.1f} us/update".format(elapsed / updates))
+    return elapsed / updates
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,161 @@
+'''
+這是Micropython
+profiler.py
+每個任務的執行時間統計：次數、平均、p95、最大值 (微秒) 與錯過的週期數，
+定期經 USB 序列埠印出一行精簡的報告，找出畫面卡頓時是哪個任務花太多時間。
+只有在需要時才包上去 (與 i2c_stats.py 相同的方式)，不啟用時任務直接執行原本的函數，沒有任何額外成本。
+
+使用範例
+from libraries.profiler import Profiler
+profiler = Profiler(report_ms=5000)
+scheduler.set_profiler(profiler)          # 排程器上所有的週期任務 (包含之後才建立的)，名稱取函數名
+loop.set_profiler(profiler)               # GameLoop：update 與 render 分開統計
+timer.set_profiler(profiler, 'gyro')      # TimeToDo：統計 Do() 執行的函數
+self.check_collisions = profiler.wrap(self.check_collisions)  # 任意函數
+scheduler.set_profiler(None)              # 停止，改回直接執行原本的函數
+
+報告 (每 report_ms 毫秒，在某個被統計的函數執行完後印出，印完歸零)
+PROF 12034 update_gyro_data:500/812/1020/3400/0 update_game:151/2210/2900/4100/2 draw_game:150/9100/9800/12000/0
+    PROF <ticks_ms> <名稱>:<次數>/<平均>/<p95>/<最大>/<錯過的週期數> ...
+    時間單位都是微秒；p95 取自最近 window 次的執行時間，錯過的週期數只有排程器任務與 TimeToDo 有。
+電腦上用 tools/profile_report.py 解析序列埠的記錄並畫圖。
+'''
+from array import array
+import utime as time
+
+
+class TaskStats:
+    def __init__(self, name, window=32):
+        """
+        :param name: 報告中顯示的名稱 (不能有空白或冒號)。
+        :param window: 計算 p95 用的最近執行時間筆數。
+        """
+        self.name = name
+        self.durations = array('I', bytes(4 * window))  # 最近的執行時間 (環形緩衝區)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+        self.missed = 0
+        self.index = 0
+
+    def add(self, duration):
+        self.count += 1
+        self.total_us += duration
+        if duration > self.max_us:
+            self.max_us = duration
+        durations = self.durations
+        durations[self.index] = duration
+        self.index = (self.index + 1) % len(durations)
+
+    def summary(self):
+        """
+        回傳 (次數, 平均, p95, 最大, 錯過的週期數)，時間單位微秒。
+        """
+        count = self.count
+        if not count:
+            return 0, 0, 0, 0, self.missed
+        recent = sorted(self.durations[:min(count, len(self.durations))])
+        p95 = recent[(len(recent) * 95 + 99) // 100 - 1]
+        return count, self.total_us // count, p95, self.max_us, self.missed
+
+
+class Probe:
+    def __init__(self, profiler, stats, func, source=None):
+        """
+        :param stats: 記錄到哪一個 TaskStats (同名的函數共用，任務重新建立後統計也會接續)。
+        :param func: 被統計的函數。
+        :param source: 有 missed 屬性 (錯過的週期數) 的 Task 或 TimeToDo，沒有則為 None。
+        """
+        self.profiler = profiler
+        self.stats = stats
+        self.func = func
+        self.source = source
+        self.missed = source.missed if source is not None else 0
+
+    def __call__(self, *args, **kwargs):
+        source = self.source
+        if source is not None and source.missed != self.missed:
+            # 排程器/TimeToDo 在執行前就已經算好這次錯過了幾個週期
+            delta = source.missed - self.missed
+            if delta < 0:
+                # 來源的統計歸零過 (reset_stats)，歸零後累積的全部都是新的
+                delta = source.missed
+            self.stats.missed += delta
+            self.missed = source.missed
+        start = time.ticks_us()
+        result = self.func(*args, **kwargs)
+        end = time.ticks_us()
+        self.stats.add(time.ticks_diff(end, start))
+        self.profiler._tick(end)
+        return result
+
+
+class Profiler:
+    def __init__(self, report_ms=5000, window=32, out=print):
+        """
+        :param report_ms: 自動印出報告的間隔 (毫秒)，0 表示不自動印，自己呼叫 report()。
+        :param window: 每個函數計算 p95 用的最近執行次數。
+        :param out: 輸出一行報告的函式，預設 print (USB 序列埠)。
+        """
+        self.report_us = report_ms * 1000
+        self.window = window
+        self.out = out
+        self.tasks = []  # TaskStats，依第一次包上去的順序
+        self.last_report = time.ticks_us()
+
+    def stats_for(self, name):
+        """
+        回傳名稱為 name 的 TaskStats，沒有則建立一個。
+        """
+        for stats in self.tasks:
+            if stats.name == name:
+                return stats
+        stats = TaskStats(name, self.window)
+        self.tasks.append(stats)
+        return stats
+
+    def wrap(self, func, name=None, source=None):
+        """
+        回傳統計 func 執行時間的 Probe，呼叫方式與 func 相同。已經是 Probe 的直接回傳。
+
+        :param name: 報告中顯示的名稱，預設為函數名。
+        :param source: 有 missed 屬性的 Task 或 TimeToDo，錯過的週期數也一起記錄。
+        """
+        if isinstance(func, Probe):
+            return func
+        if name is None:
+            name = getattr(func, '__name__', 'task')
+        return Probe(self, self.stats_for(name), func, source)
+
+    def _tick(self, now):
+        # 每次統計後檢查是否該印出報告
+        if self.report_us and time.ticks_diff(now, self.last_report) >= self.report_us:
+            self.report()
+
+    def report(self, reset=True):
+        """
+        印出一行報告 (格式見檔案開頭)，回傳這一行字串。
+
+        :param reset: 印完後是否歸零。
+        """
+        parts = ['PROF', str(time.ticks_ms())]
+        for stats in self.tasks:
+            if stats.count or stats.missed:
+                parts.append('{}:{}/{}/{}/{}/{}'.format(stats.name, *stats.summary()))
+            if reset:
+                stats.reset()
+        line = ' '.join(parts)
+        if self.out is not None:
+            self.out(line)
+        self.last_report = time.ticks_us()
+        return line
+
+
+def unwrap(func):
+    """
+    Probe 回傳原本的函數，其他的直接回傳。
+    """
+    return func.func if isinstance(func, Probe) else func
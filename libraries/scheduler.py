@@ -0,0 +1,361 @@
+'''
+這是Micropython
+scheduler.py
+協作式排程器：取代主迴圈裡一直輪詢多個 TimeToDo 的寫法。
+所有週期任務依下一次的執行時間 (deadline) 放在最小堆積裡，每次只執行已經到期的任務，
+沒有任務到期時睡到最近的 deadline，CPU 不再 100% 空轉。
+
+使用範例
+from libraries.scheduler import Scheduler
+scheduler = Scheduler()
+gyro_task = scheduler.every(10, self.update_gyro_data)    # 每 10 毫秒
+spawn_task = scheduler.every(1500, self.spawn_enemy)      # 每 1.5 秒
+spawn_task.period_ms = 800                                # 執行中隨時調整週期 (單位毫秒)
+spawn_task.cancel()                                       # 取消
+scheduler.restart(gyro_task)                              # 從現在重新計時 (例如暫停之後)
+scheduler.set_profiler(Profiler())                        # 統計每個任務的執行時間，見 profiler.py
+scheduler.run()                                           # 一直執行到某個任務呼叫 scheduler.stop()
+
+單次計時 (道具效果到期等)
+handle = scheduler.after(5000, self.reset_speed)          # 5 秒後執行一次，回傳整數 handle
+scheduler.cancel(handle)                                  # 到期前取消；已執行或已取消的 handle 不會有任何效果
+單次計時器來自建立時預先配置的池 (Scheduler(one_shots=8))，排程與執行都不配置記憶體，
+池用完時 after() 丟出 RuntimeError。handle 0 永遠無效，可以當作「沒有計時器」的初始值。
+
+或自己寫迴圈:
+while True:
+    wait_us = scheduler.run_pending()   # 執行到期的任務，回傳距離下一個 deadline 的微秒數
+    ...
+    scheduler.idle(wait_us)
+
+時間
+排程器的時間就是 utime.ticks_us()。deadline 一律用 ticks_add 計算、用 ticks_diff 比較，
+數值在 2**30 繞回，永遠是 small int，長時間執行也不會配置大整數 (也不會累加出越來越大的數)。
+因為 ticks_diff 只能比較相差不到 2**29 微秒的時間，週期與延遲要小於約 536 秒。
+電腦上測試可以傳入 clock (回傳與 ticks_us 相同、在 2**30 繞回的微秒數) 與 sleep (睡眠微秒數的函式) 使用假的時鐘。
+sleep 預設為 utime.sleep_us；要更省電可以傳入 lambda us: machine.lightsleep(us // 1000)。
+同一個檔案的 ticks_diff / ticks_add 在沒有 utime 時 (CPython) 以純 Python 實作相同的繞回運算，
+GameLoop 等使用 scheduler.now() 的程式用它們計算時間差。
+
+執行規則
+任務的下一個 deadline = 這次的 deadline + 週期，不會因為執行延遲而漂移；
+落後超過一個週期時不補跑，從現在重新計時。
+同一時間到期的任務依建立順序執行。
+'''
+try:
+    import utime as time
+    ticks_diff = time.ticks_diff
+    ticks_add = time.ticks_add
+except ImportError:
+    time = None  # 電腦上 (CPython) 需要傳入 clock 與 sleep
+
+    _TICKS_MAX = (1 << 30) - 1
+    _TICKS_HALF = 1 << 29
+
+    def ticks_diff(end, start):
+        # 與 utime.ticks_diff 相同：end - start，兩者都在 2**30 繞回
+        return ((end - start + _TICKS_HALF) & _TICKS_MAX) - _TICKS_HALF
+
+    def ticks_add(ticks, delta):
+        return (ticks + delta) & _TICKS_MAX
+
+
+_SLOT_BITS = 8                  # handle 的低 8 位元是池中的位置
+_SLOT_MASK = (1 << _SLOT_BITS) - 1
+_GENERATION_MASK = 0x3FFFFF     # 其餘位元是世代，handle 保持為 small int
+
+
+class Task:
+    def __init__(self, scheduler, func, args, period_us, deadline, order, slot=-1):
+        self.scheduler = scheduler
+        self.func = func
+        self.args = args
+        self.period_us = period_us
+        self.deadline = deadline  # 下一次執行的時間 (ticks_us)
+        self.order = order        # 建立順序，deadline 相同時先建立的先執行
+        self.index = -1           # 在堆積中的位置，-1 表示已取消
+        self.slot = slot          # 單次計時器在池中的位置，週期任務為 -1
+        self.generation = 1       # 單次計時器每次回收加一，讓舊的 handle 失效
+        self.missed = 0           # 落後超過一個週期而放棄的次數 (週期任務)
+
+    @property
+    def period_ms(self):
+        return self.period_us // 1000
+
+    @period_ms.setter
+    def period_ms(self, ms):
+        # 調整週期，下一次的 deadline 也依新的週期移動
+        self.scheduler.set_period(self, ms * 1000)
+
+    @property
+    def active(self):
+        return self.index >= 0
+
+    def cancel(self):
+        self.scheduler.cancel(self)
+
+
+class Scheduler:
+    def __init__(self, clock=None, sleep=None, one_shots=8):
+        """
+        :param clock: 回傳 ticks_us (在 2**30 繞回的微秒數) 的函式，預設為 utime.ticks_us。
+        :param sleep: 睡眠指定微秒數的函式，預設為 utime.sleep_us。
+        :param one_shots: 預先配置的單次計時器數量 (最多 256)。
+        """
+        self.now = time.ticks_us if clock is None else clock
+        self.sleep = time.sleep_us if sleep is None else sleep
+        self._heap = []
+        self._order = 0
+        self._running = False
+        self.profiler = None
+        # 單次計時器池：Task 物件與空位清單都預先配置好
+        self._pool = [Task(self, None, (), 0, 0, 0, slot) for slot in range(min(one_shots, _SLOT_MASK + 1))]
+        self._free = list(range(len(self._pool) - 1, -1, -1))
+
+    # ==================== 任務 ====================
+
+    def every(self, period_ms, func, *args, delay_ms=None):
+        """
+        每 period_ms 毫秒執行一次 func(*args)，回傳 Task。
+
+        :param period_ms: 週期 (毫秒)。
+        :param delay_ms: 第一次執行前等待的毫秒數，預設為一個週期 (與 TimeToDo 相同)。
+        """
+        period_us = int(period_ms * 1000)
+        delay_us = period_us if delay_ms is None else int(delay_ms * 1000)
+        task = Task(self, func, args, period_us, ticks_add(self.now(), delay_us), self._order)
+        if self.profiler is not None:
+            task.func = self.profiler.wrap(func, source=task)
+        self._order += 1
+        self._push(task)
+        return task
+
+    def after(self, delay_ms, func, *args):
+        """
+        delay_ms 毫秒後執行一次 func(*args)，回傳整數 handle，可以傳給 cancel()。
+        """
+        if not self._free:
+            raise RuntimeError('no free one-shot timer')
+        task = self._pool[self._free.pop()]
+        task.func = func
+        task.args = args
+        task.deadline = ticks_add(self.now(), int(delay_ms * 1000))
+        task.order = self._order
+        self._order += 1
+        self._push(task)
+        return (task.generation << _SLOT_BITS) | task.slot
+
+    def pending(self, handle):
+        """
+        handle 對應的單次計時器是否還沒執行也沒被取消。
+        """
+        return self._lookup(handle) is not None
+
+    def _lookup(self, handle):
+        # 由 handle 找回還在排程中的單次計時器，過期的 handle 回傳 None
+        if not handle:
+            return None
+        slot = handle & _SLOT_MASK
+        if slot >= len(self._pool):
+            return None
+        task = self._pool[slot]
+        if task.generation != handle >> _SLOT_BITS or task.index < 0:
+            return None
+        return task
+
+    def _release(self, task):
+        # 單次計時器回到池中，世代加一讓舊的 handle 失效
+        task.func = None
+        task.args = ()
+        task.generation = (task.generation % _GENERATION_MASK) + 1
+        self._free.append(task.slot)
+
+    def set_period(self, task, period_us):
+        """
+        調整任務的週期 (微秒)，還沒執行的這一次 deadline 也依新的週期移動。
+        """
+        period_us = int(period_us)
+        if task.index >= 0:
+            task.deadline = ticks_add(task.deadline, period_us - task.period_us)
+            self._fix(task.index)
+        task.period_us = period_us
+
+    def set_profiler(self, profiler):
+        """
+        開始統計所有週期任務 (包含之後才建立的) 的執行時間，傳入 None 停止，見 profiler.py。
+        """
+        try:
+            from libraries.profiler import unwrap
+        except ImportError:
+            from profiler import unwrap
+        self.profiler = profiler
+        for task in self._heap:
+            if task.slot < 0:
+                task.func = unwrap(task.func)
+                if profiler is not None:
+                    task.func = profiler.wrap(task.func, source=task)
+
+    def restart(self, task, delay_ms=None):
+        """
+        從現在重新計時：任務的下一個 deadline 改為現在加上 delay_ms (預設為一個週期)。
+        """
+        delay_us = task.period_us if delay_ms is None else int(delay_ms * 1000)
+        task.deadline = ticks_add(self.now(), delay_us)
+        if task.index >= 0:
+            self._fix(task.index)
+
+    def cancel(self, task):
+        """
+        取消 every() 回傳的 Task 或 after() 回傳的 handle，已執行或已取消的不會有任何效果。
+        """
+        if not isinstance(task, Task):
+            task = self._lookup(task)
+            if task is None:
+                return
+        index = task.index
+        if index < 0:
+            return
+        self._remove(index)
+        if task.slot >= 0:
+            self._release(task)
+
+    def clear(self):
+        """
+        取消所有任務。
+        """
+        heap = self._heap
+        for task in heap:
+            task.index = -1
+            if task.slot >= 0:
+                self._release(task)
+        del heap[:]  # 就地清空，run_pending() 執行中呼叫也安全
+
+    def next_deadline(self):
+        """
+        最近的 deadline (ticks_us)，沒有任務時回傳 None。
+        """
+        return self._heap[0].deadline if self._heap else None
+
+    # ==================== 執行 ====================
+
+    def run_pending(self):
+        """
+        執行所有已到期的任務，回傳距離下一個 deadline 的微秒數 (沒有任務時回傳 None)。
+        """
+        heap = self._heap
+        now = self.now()
+        while heap and ticks_diff(heap[0].deadline, now) <= 0:
+            task = heap[0]
+            if task.slot >= 0:
+                # 單次計時器：先移出堆積並回收，再執行 (執行中可以再 after() 用到同一個位置)
+                func = task.func
+                args = task.args
+                self._remove(0)
+                self._release(task)
+                func(*args)
+                continue
+            # 先排好下一次再執行，任務裡可以調整週期或取消自己
+            deadline = ticks_add(task.deadline, task.period_us)
+            if ticks_diff(deadline, now) <= 0:
+                period_us = task.period_us or 1
+                task.missed += ticks_diff(now, task.deadline) // period_us
+                deadline = ticks_add(now, period_us)  # 落後超過一個週期，不補跑
+            task.deadline = deadline
+            self._sift_down(0)
+            task.func(*task.args)
+        if not heap:
+            return None
+        return max(0, ticks_diff(heap[0].deadline, self.now()))
+
+    def idle(self, wait_us):
+        """
+        沒有任務到期時睡到下一個 deadline。
+        """
+        if wait_us:
+            self.sleep(wait_us)
+
+    def run(self):
+        """
+        一直執行任務，直到某個任務呼叫 stop() 或沒有任何任務。
+        """
+        self._running = True
+        while self._running:
+            wait_us = self.run_pending()
+            if wait_us is None:
+                break
+            if self._running:
+                self.idle(wait_us)
+        self._running = False
+
+    def stop(self):
+        """
+        讓 run() 在目前的任務執行完後返回。
+        """
+        self._running = False
+
+    # ==================== 最小堆積 (依 deadline、再依建立順序) ====================
+
+    def _push(self, task):
+        heap = self._heap
+        task.index = len(heap)
+        heap.append(task)
+        self._sift_up(task.index)
+
+    def _remove(self, index):
+        # 把堆積中位置 index 的任務移出
+        heap = self._heap
+        task = heap[index]
+        last = heap.pop()
+        task.index = -1
+        if last is not task:
+            heap[index] = last
+            last.index = index
+            self._fix(index)
+
+    def _fix(self, index):
+        # 任務的 deadline 改變後恢復堆積順序
+        if index > 0 and _before(self._heap[index], self._heap[(index - 1) >> 1]):
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+
+    def _sift_up(self, index):
+        heap = self._heap
+        task = heap[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            other = heap[parent]
+            if not _before(task, other):
+                break
+            heap[index] = other
+            other.index = index
+            index = parent
+        heap[index] = task
+        task.index = index
+
+    def _sift_down(self, index):
+        heap = self._heap
+        size = len(heap)
+        task = heap[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and _before(heap[child + 1], heap[child]):
+                child += 1
+            other = heap[child]
+            if not _before(other, task):
+                break
+            heap[index] = other
+            other.index = index
+            index = child
+        heap[index] = task
+        task.index = index
+
+
+def _before(a, b):
+    # deadline 會繞回，以 ticks_diff 比較先後
+    diff = ticks_diff(a.deadline, b.deadline)
+    if diff:
+        return diff < 0
+    return a.order < b.order
@@ -14,12 +14,22 @@ display, mpu = Pico_Ware_Tools.Pico_Ware_Init()
 填充圓: display.fill_circle(x, y, radius, color)
 畫三角形: display.draw_triangle(x0, y0, x1, y1, x2, y2, color)
 填充三角形: display.fill_triangle(x0, y0, x1, y1, x2, y2, color)
+一次填充多個三角形: display.fill_triangles(coords, color, dx, dy)  (coords 每 6 個整數為一個三角形)
+填充凸多邊形: display.fill_convex_polygon(coords, color)  (coords 為 x0, y0, x1, y1, ...)
 文字顯示:
 顯示文字: display.text("Hello", x, y, color)
 位圖顯示:
 繪製位圖: display.drawBitmap(x, y, bitmap, width, height)
+透明/反相位圖: display.drawBitmap(x, y, bitmap, width, height, transparent=True, invert=True)
 顯示控制:
-更新顯示: display.show()
+更新顯示: display.show()  (只送出有變動的頁)
+強制重送整個畫面: display.show(force=True)
+分段更新: display.begin_show() 之後重複呼叫 display.show_step(max_pages=2) 或 display.show_step(budget_us=2000)，
+         回傳 True 或 display.show_done() 為 True 代表這一幀已送完，期間可以繼續畫下一幀
+背景更新: display.start_background() (或建構時 background=True) 讓第二核心送出畫面，show() 立即返回；
+         display.wait_show() 等待送完，display.stop_background() 回到同步更新
+傳輸統計: display.frame_bytes (上次 show() 寫出的 I2C 位元組數), display.frame_saved (省下的位元組數)
+匯流排統計: stats = display.enable_stats() 之後用 stats.snapshot() / stats.reset() 讀取傳輸次數、位元組與微秒數 (見 i2c_stats.py)
 清除顯示: display.fill(0) 然後 display.show()
 調整對比度: display.contrast(contrast_value)
 屏幕翻轉: display.rotate(flag)
@@ -34,10 +44,22 @@ display, mpu = Pico_Ware_Tools.Pico_Ware_Init()
 在進行任何繪圖操作後，需要調用display.show()來更新顯示
 畫面更新使用單獨TimeToDo 建議60FPS 如果效能不佳再往下調整
 '''
-from machine import Pin, I2C, RTC, Timer , mem32
-from micropython import const
+try:
+    from machine import Pin, I2C, RTC, Timer , mem32
+except ImportError:
+    Pin = I2C = RTC = Timer = mem32 = None  # 電腦上 (CPython) 只用到繪圖與傳輸，搭配 tools/sh1107_emulator.py
+try:
+    from micropython import const
+except ImportError:
+    def const(value):
+        return value
 import utime as time
 import framebuf
+from array import array
+try:
+    import _thread
+except ImportError:
+    _thread = None
 import math
 import random
 
@@ -57,20 +79,142 @@ _SET_COM_PINS        = const(0xDA)
 _SET_VCOM_DESELECT   = const(0xDB)
 _CHARGE_PUMP         = const(0x8D)
 
+# 面板的第 0 個像素對應到 RAM 的第 2 行 (column)
+_COLUMN_OFFSET       = const(2)
+
+# drawBitmap 最多快取幾個位圖的 FrameBuffer
+_BITMAP_CACHE_SIZE   = const(8)
+# 反相繪製用的調色盤：顏色 0 -> 1，顏色 1 -> 0
+_INVERT_PALETTE = framebuf.FrameBuffer(bytearray(b'\x80'), 2, 1, framebuf.MONO_HLSB)
+
+# 圓形的掃描線表最多快取幾種半徑 (LRU)，半徑不超過此值時另外預先畫成可 blit 的小圖
+_CIRCLE_CACHE_SIZE   = const(8)
+_CIRCLE_STAMP_RADIUS = const(4)
+_circle_cache = {}  # radius -> (spans, points, fill_stamp, outline_stamp)
+_circle_lru = []    # 最近使用的半徑排在最後
+
+
+# 預先計算某半徑的圓：
+# spans[dy] 是第 dy 列 (相對圓心) 的半寬；points 是外框各點相對圓心的 (dx, dy) 連續排列
+def _circle(radius):
+    entry = _circle_cache.get(radius)
+    if entry is not None:
+        if _circle_lru[-1] != radius:
+            _circle_lru.remove(radius)
+            _circle_lru.append(radius)
+        return entry
+    spans = array('h', [-1] * (radius + 1))
+    offsets = set()
+    x, y = radius, 0
+    err = 1 - radius
+    # 與原本的中點圓演算法相同，只是把結果記錄下來
+    while x >= y:
+        if spans[y] < x:
+            spans[y] = x
+        if spans[x] < y:
+            spans[x] = y
+        for dx, dy in ((x, y), (y, x)):
+            offsets.add((dx, dy))
+            offsets.add((-dx, dy))
+            offsets.add((dx, -dy))
+            offsets.add((-dx, -dy))
+        y += 1
+        if err < 0:
+            err += 2 * y + 1
+        else:
+            x -= 1
+            err += 2 * (y - x + 1)
+    points = array('h')
+    for dx, dy in offsets:
+        points.append(dx)
+        points.append(dy)
+    fill_stamp = outline_stamp = None
+    if radius <= _CIRCLE_STAMP_RADIUS:
+        size = 2 * radius + 1
+        fill_stamp = framebuf.FrameBuffer(bytearray((size + 7) // 8 * size), size, size, framebuf.MONO_HLSB)
+        for dy in range(radius + 1):
+            if spans[dy] >= 0:
+                fill_stamp.hline(radius - spans[dy], radius + dy, 2 * spans[dy] + 1, 1)
+                fill_stamp.hline(radius - spans[dy], radius - dy, 2 * spans[dy] + 1, 1)
+        outline_stamp = framebuf.FrameBuffer(bytearray((size + 7) // 8 * size), size, size, framebuf.MONO_HLSB)
+        for i in range(0, len(points), 2):
+            outline_stamp.pixel(radius + points[i], radius + points[i + 1], 1)
+    entry = (spans, points, fill_stamp, outline_stamp)
+    if len(_circle_lru) >= _CIRCLE_CACHE_SIZE:
+        del _circle_cache[_circle_lru.pop(0)]
+    _circle_cache[radius] = entry
+    _circle_lru.append(radius)
+    return entry
+
+
+
+# 把 src[first:first + length] 同時複製到 shadow 的同一位置與 tx[1:] (tx[0] 是 I2C 控制位元組)
+# MicroPython 上以 viper 直接操作指標，不會像 memoryview 切片那樣配置新的物件
+try:
+    import micropython
+
+    @micropython.viper
+    def _copy_span(src, shadow, tx, first: int, length: int):
+        s = ptr8(src)
+        d = ptr8(shadow)
+        t = ptr8(tx)
+        i = 0
+        while i < length:
+            value = s[first + i]
+            d[first + i] = value
+            t[i + 1] = value
+            i += 1
+except ImportError:
+    # CPython 沒有 viper，跑同樣的迴圈 (切片賦值會先配置一份暫存的 bytearray)
+    def _copy_span(src, shadow, tx, first, length):
+        i = 0
+        while i < length:
+            value = src[first + i]
+            shadow[first + i] = value
+            tx[i + 1] = value
+            i += 1
 
 
 # SH1107 class, inherits from framebuf.FrameBuffer
 class SH1107(framebuf.FrameBuffer):
-    def __init__(self, width, height, external_vcc):
+    def __init__(self, width, height, external_vcc, background=False):
         # Initialize screen width, height, and external VCC option
         self.width = width
         self.height = height
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
+        # 面板上目前實際顯示內容的影子副本，show() 只送出與它不同的頁
+        self._shadow = bytearray(self.pages * self.width)
+        # 上一次 show() 實際寫到 I2C 的位元組數，以及比整個畫面重送省下的位元組數
+        self.frame_bytes = 0
+        self.frame_saved = 0
+        # 預先建立每一頁的 memoryview 與傳輸暫存區，穩定狀態下 show() 不配置任何記憶體
+        buffer_mv = memoryview(self.buffer)
+        shadow_mv = memoryview(self._shadow)
+        self._buffer_pages = [buffer_mv[p * self.width:(p + 1) * self.width] for p in range(self.pages)]
+        self._shadow_pages = [shadow_mv[p * self.width:(p + 1) * self.width] for p in range(self.pages)]
+        # 傳輸暫存區的第 0 個位元組保留給 I2C 控制位元組，整段直接交給 writeto，不用再串接
+        self._tx = bytearray(self.width + 1)
+        self._tx[0] = 0x40  # Co=0, D/C#=1：後面全部是資料
+        self._tx_views = [None] * (self.width + 1)  # 依資料長度快取 self._tx[:長度 + 1] 的 memoryview
+        self._addr_cmds = bytearray(4)  # 控制位元組 0x00 (Co=0, D/C#=0) 加上頁位址、低/高行位址指令
+        # 分段更新 (begin_show/show_step) 用的畫面快照，第一次使用時才配置
+        self._frame = None
+        self._frame_pages = None
+        self._frame_force = False
+        self._next_page = self.pages  # 等於 pages 代表沒有進行中的分段更新
+        # 背景更新 (第二核心) 的狀態
+        self._bg_running = False  # 背景執行緒是否在服務
+        self._bg_alive = False    # 背景執行緒是否還沒結束
+        self._bg_pending = False  # 快照是否還在等待或正在送出
+        self._resync = False      # 背景送出失敗後，下一次 show() 必須整頁重送
+        self._bitmap_cache = {}   # drawBitmap: id(bitmap) -> (bitmap, width, height, FrameBuffer)
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
         
         self.init_display()
+        if background:
+            self.start_background()
 
     # Initialize the display
     def init_display(self):
@@ -79,72 +223,218 @@ class SH1107(framebuf.FrameBuffer):
         #self.write_cmd(0xD3)  # 設置顯示偏移
         #self.write_cmd(0x02)  # 偏移量，根據實際情況調整
 
-        self.write_cmd(0xAE)  # Display OFF
-        self.write_cmd(0xD5)  # Set Display Clock Divide Ratio/Oscillator Frequency
-        self.write_cmd(241)  # 设置更高的频率以减少闪烁
-        self.write_cmd(0xA8)  # Set Multiplex Ratio
-        self.write_cmd(0x7F)  # 128MUX（对于128x128显示器）
-        self.write_cmd(0xD3)  # Set Display Offset
-        self.write_cmd(0x02)  # 2px
-        
- 
-        self.write_cmd(0x81)  # Set Contrast Control
-        self.write_cmd(0xFF)  # 最大对比度
-        self.write_cmd(0xD9)  # Set Pre-charge Period
-        self.write_cmd(215)  # 增加预充电周期以提高亮度
-        self.write_cmd(0xDB)  # Set VCOMH Deselect Level
-        self.write_cmd(0x30)  # VCOM Deselect Level
-        self.write_cmd(0xAD)  # Set DC-DC Control Mode Set
-        self.write_cmd(0x8A)  # 启用内部 DC-DC 转换器
-        self.write_cmd(0xA4)  # Entire Display ON (resume)
-        self.write_cmd(0xA6)  # Set Normal Display
-        self.write_cmd(0xAF)  # Display ON
-
+        # 整串初始化指令在同一次 I2C 傳輸中送出
+        self.write_cmds(bytes((
+            0xAE,        # Display OFF
+            0xD5, 241,   # Set Display Clock Divide Ratio/Oscillator Frequency, 设置更高的频率以减少闪烁
+            0xA8, 0x7F,  # Set Multiplex Ratio, 128MUX（对于128x128显示器）
+            0xD3, 0x02,  # Set Display Offset, 2px
+            0x81, 0xFF,  # Set Contrast Control, 最大对比度
+            0xD9, 215,   # Set Pre-charge Period, 增加预充电周期以提高亮度
+            0xDB, 0x30,  # Set VCOMH Deselect Level, VCOM Deselect Level
+            0xAD, 0x8A,  # Set DC-DC Control Mode Set, 启用内部 DC-DC 转换器
+            0xA4,        # Entire Display ON (resume)
+            0xA6,        # Set Normal Display
+            0xAF,        # Display ON
+        )))
 
         self.fill(0)
-        self.show()
+        self.show(force=True)  # 面板 RAM 內容未知，必須整頁送出
 
     # Turn off the display
     def poweroff(self):
+        self.wait_show()
         self.write_cmd(_SET_DISP | 0x00)
 
     # Turn on the display
     def poweron(self):
+        self.wait_show()
         self.write_cmd(_SET_DISP | 0x01)
 
     # Rotate the display
     def rotate(self, flag, update=True):
+        self.wait_show()
         if flag:
-            self.write_cmd(_SET_SEG_REMAP | 0x01)  # 垂直翻轉顯示
-            self.write_cmd(_SET_SCAN_DIR | 0x08)  # 水平翻轉顯示
+            self.write_cmds(bytes((
+                _SET_SEG_REMAP | 0x01,  # 垂直翻轉顯示
+                _SET_SCAN_DIR | 0x08,  # 水平翻轉顯示
+            )))
         else:
-            self.write_cmd(_SET_SEG_REMAP | 0x00)
-            self.write_cmd(_SET_SCAN_DIR | 0x00)
+            self.write_cmds(bytes((_SET_SEG_REMAP | 0x00, _SET_SCAN_DIR | 0x00)))
         if update:
-            self.show()
+            self.show(force=True)
 
     # Set sleep mode
     def sleep(self, value):
+        self.wait_show()
         self.write_cmd(_SET_DISP | (not value))
 
     # Adjust contrast
     def contrast(self, contrast):
-        self.write_cmd(_SET_CONTRAST)
-        self.write_cmd(contrast)
+        self.wait_show()
+        self.write_cmds(bytes((_SET_CONTRAST, contrast)))
 
     # Invert display
     def invert(self, invert):
+        self.wait_show()
         self.write_cmd(_SET_NORM_INV | (invert & 1))
 
     # Display the buffer content
-    def show(self):
-        for page in range(self.height // 8):
-            self.write_cmd(_SET_PAGE_ADDRESS | page)
-            self.write_cmd(_LOW_COLUMN_ADDRESS | 2)
-            self.write_cmd(_HIGH_COLUMN_ADDRESS | 0)
-            self.write_data(self.buffer[
-                self.width * page:self.width * page + self.width
-            ])
+    # 只送出內容有變動的頁，且每頁只送出第一個到最後一個變動的行 (column)
+    # force=True 時全部重送
+    def show(self, force=False):
+        if self._bg_running:
+            # 背景模式：等上一幀送完，把畫面複製到快照後立刻返回，由第二核心送出
+            self.wait_show()
+            if self._bg_running:
+                self._frame[:] = self.buffer
+                self._frame_force = force
+                self._bg_pending = True
+                return
+        if self._resync:
+            force = True
+            self._resync = False
+        self._next_page = self.pages  # 直接整個畫面更新時，放棄進行中的分段更新
+        sent = 0
+        for page in range(self.pages):
+            sent += self._flush_page(self.buffer, self._buffer_pages, page, force)
+        self.frame_bytes = sent
+        self.frame_saved = self.pages * (5 + self.width) - sent
+
+    # 分段更新：拍下目前畫面的快照，之後由 show_step() 分多次送出
+    # 快照之後再畫的內容不會混進這一幀，避免畫面撕裂
+    def begin_show(self, force=False):
+        self.wait_show()
+        self._alloc_frame()
+        self._frame[:] = self.buffer
+        self._frame_force = force
+        self._next_page = 0
+        self.frame_bytes = 0
+
+    # 繼續送出快照，最多 max_pages 個有變動的頁，或用完 budget_us 微秒為止
+    # 兩者都沒給時送出一頁；回傳 True 表示這一幀已經全部送完
+    def show_step(self, max_pages=None, budget_us=None):
+        if max_pages is None and budget_us is None:
+            max_pages = 1
+        start_time = time.ticks_us()
+        flushed = 0
+        while self._next_page < self.pages:
+            sent = self._flush_page(self._frame, self._frame_pages, self._next_page, self._frame_force)
+            self._next_page += 1
+            if sent == 0:
+                continue  # 沒變動的頁只花一次比較，不計入額度
+            self.frame_bytes += sent
+            flushed += 1
+            if max_pages is not None and flushed >= max_pages:
+                break
+            if budget_us is not None and time.ticks_diff(time.ticks_us(), start_time) >= budget_us:
+                break
+        if self._next_page < self.pages:
+            return False
+        self.frame_saved = self.pages * (5 + self.width) - self.frame_bytes
+        return True
+
+    # 是否沒有進行中的分段更新
+    def show_done(self):
+        return self._next_page >= self.pages
+
+    # 快照緩衝區 (分段更新與背景更新共用)，第一次使用時才配置
+    def _alloc_frame(self):
+        if self._frame is None:
+            self._frame = bytearray(len(self.buffer))
+            frame_mv = memoryview(self._frame)
+            self._frame_pages = [frame_mv[p * self.width:(p + 1) * self.width] for p in range(self.pages)]
+
+    # 背景更新：在第二核心上用 _thread 送出畫面，show() 只需要複製一次畫面就返回
+    # framebuf 綁定在 self.buffer 上無法交換指標，所以交換方式是把畫面複製到快照緩衝區 (2 KB 原生 memcpy)
+    # 無法啟動執行緒時 (沒有 _thread 或第二核心已被佔用) 回傳 False，維持同步更新
+    def start_background(self):
+        if self._bg_running:
+            return True
+        if _thread is None:
+            return False
+        while self._bg_alive:  # 等上一個背景執行緒結束
+            time.sleep_ms(1)
+        self._alloc_frame()
+        self._next_page = self.pages
+        self._bg_pending = False
+        self._bg_running = True
+        self._bg_alive = True
+        try:
+            _thread.start_new_thread(self._background_loop, ())
+        except Exception as e:
+            print("SH1107: background flush unavailable:", e)
+            self._bg_running = False
+            self._bg_alive = False
+            return False
+        return True
+
+    # 停止背景更新，之後 show() 回到同步模式
+    def stop_background(self):
+        self.wait_show()
+        self._bg_running = False
+        while self._bg_alive:
+            time.sleep_ms(1)
+
+    # 等待背景更新把上一幀送完；同步模式下立即返回
+    def wait_show(self):
+        while self._bg_pending:
+            time.sleep_us(100)
+
+    def _background_loop(self):
+        try:
+            while self._bg_running:
+                if not self._bg_pending:
+                    time.sleep_us(200)
+                    continue
+                sent = 0
+                for page in range(self.pages):
+                    sent += self._flush_page(self._frame, self._frame_pages, page, self._frame_force)
+                self.frame_bytes = sent
+                self.frame_saved = self.pages * (5 + self.width) - sent
+                self._bg_pending = False
+        except Exception as e:
+            # 送出失敗時退回同步模式，影子副本可能與面板不一致，下一次 show() 整頁重送
+            print("SH1107: background flush stopped:", e)
+            self._resync = True
+            self._bg_running = False
+            self._bg_pending = False
+        self._bg_alive = False
+
+    # 送出 src 中第 page 頁與面板內容不同的部分，回傳寫出的位元組數
+    def _flush_page(self, src, src_pages, page, force):
+        shadow = self._shadow
+        tx = self._tx
+        addr_cmds = self._addr_cmds
+        start = self.width * page
+        end = start + self.width
+        if force:
+            first = start
+            last = end - 1
+        else:
+            # memoryview 之間的比較是原生 memcmp，不會配置新的物件
+            if src_pages[page] == self._shadow_pages[page]:
+                return 0  # 這一頁面板上已經是最新內容
+            first = start
+            while src[first] == shadow[first]:
+                first += 1
+            last = end - 1
+            while src[last] == shadow[last]:
+                last -= 1
+        # 把變動範圍同時寫回影子副本與傳輸暫存區
+        length = last + 1 - first
+        _copy_span(src, shadow, tx, first, length)
+        view = self._tx_views[length]
+        if view is None:
+            view = self._tx_views[length] = memoryview(tx)[:length + 1]
+        # RAM 只有 128 行，加上偏移後超過的部分會繞回第 0 行
+        col = (first - start + _COLUMN_OFFSET) & 0x7F
+        addr_cmds[1] = _SET_PAGE_ADDRESS | page
+        addr_cmds[2] = _LOW_COLUMN_ADDRESS | (col & 0x0F)
+        addr_cmds[3] = _HIGH_COLUMN_ADDRESS | (col >> 4)
+        self.write_framed(addr_cmds)
+        self.write_framed(view)
+        return 5 + length  # 控制位元組 + 3 個位址指令 + 控制位元組 + 資料
 
     # Reset the display
     def reset(self, res):
@@ -157,30 +447,39 @@ class SH1107(framebuf.FrameBuffer):
             time.sleep_ms(20)
 
     # Draw a circle
+    # 外框各點由快取的點表取得；小半徑直接 blit 預先畫好的小圖
     def draw_circle(self, x0, y0, radius, color):
-        x, y = radius, 0
-        err = 1 - radius
-        while x >= y:
-            self._draw_circle_points(x0, y0, x, y, color)
-            y += 1
-            if err < 0:
-                err += 2 * y + 1
-            else:
-                x -= 1
-                err += 2 * (y - x + 1)
+        if radius < 0:
+            return
+        spans, points, fill_stamp, stamp = _circle(radius)
+        if stamp is not None:
+            self._blit_stamp(stamp, x0 - radius, y0 - radius, color)
+            return
+        for i in range(0, len(points), 2):
+            self.pixel(x0 + points[i], y0 + points[i + 1], color)
 
     # Draw a filled circle
+    # 每一列只需要一次 hline；小半徑直接 blit 預先畫好的小圖
     def fill_circle(self, x0, y0, radius, color):
-        x, y = radius, 0
-        err = 1 - radius
-        while x >= y:
-            self._draw_filled_circle_lines(x0, y0, x, y, color)
-            y += 1
-            if err < 0:
-                err += 2 * y + 1
-            else:
-                x -= 1
-                err += 2 * (y - x + 1)
+        if radius < 0:
+            return
+        spans, points, stamp, outline_stamp = _circle(radius)
+        if stamp is not None:
+            self._blit_stamp(stamp, x0 - radius, y0 - radius, color)
+            return
+        self.hline(x0 - spans[0], y0, 2 * spans[0] + 1, color)
+        for dy in range(1, radius + 1):
+            half = spans[dy]
+            self.hline(x0 - half, y0 + dy, 2 * half + 1, color)
+            self.hline(x0 - half, y0 - dy, 2 * half + 1, color)
+
+    # 以 stamp 中為 1 的像素畫出 color，其餘透明
+    def _blit_stamp(self, stamp, x, y, color):
+        if color:
+            self.blit(stamp, x, y, 0)
+        else:
+            # 反相後原本的 1 變成 0 畫出，原本的 0 變成 1 當作透明色
+            self.blit(stamp, x, y, 1, _INVERT_PALETTE)
 
     # Draw a triangle with arbitrary points
     def draw_triangle(self, x0, y0, x1, y1, x2, y2, color):
@@ -189,9 +488,81 @@ class SH1107(framebuf.FrameBuffer):
         self.line(x2, y2, x0, y0, color)
 
     # Draw a filled triangle with arbitrary points
+    # 整數邊緣步進掃描：不配置串列、不用浮點數，每一列一次 hline
     def fill_triangle(self, x0, y0, x1, y1, x2, y2, color):
-        points = [(x0, y0), (x1, y1), (x2, y2)]
-        self._fill_polygon(points, color)
+        # 依 y 排序三個頂點 (y0 <= y1 <= y2)
+        if y0 > y1:
+            x0, y0, x1, y1 = x1, y1, x0, y0
+        if y1 > y2:
+            x1, y1, x2, y2 = x2, y2, x1, y1
+        if y0 > y1:
+            x0, y0, x1, y1 = x1, y1, x0, y0
+
+        if y0 == y2:
+            # 三點在同一列
+            a = b = x0
+            if x1 < a:
+                a = x1
+            elif x1 > b:
+                b = x1
+            if x2 < a:
+                a = x2
+            elif x2 > b:
+                b = x2
+            self.hline(a, y0, b - a + 1, color)
+            return
+
+        dx01 = x1 - x0
+        dy01 = y1 - y0
+        dx02 = x2 - x0
+        dy02 = y2 - y0
+        dx12 = x2 - x1
+        dy12 = y2 - y1
+        sa = 0
+        sb = 0
+
+        # 上半部：邊 0-1 與邊 0-2；y1 == y2 時 (平底) 連 y1 那一列一起畫
+        last = y1 if y1 == y2 else y1 - 1
+        y = y0
+        while y <= last:
+            a = x0 + sa // dy01
+            b = x0 + sb // dy02
+            sa += dx01
+            sb += dx02
+            if a > b:
+                a, b = b, a
+            self.hline(a, y, b - a + 1, color)
+            y += 1
+
+        # 下半部：邊 1-2 與邊 0-2
+        sa = dx12 * (y - y1)
+        sb = dx02 * (y - y0)
+        while y <= y2:
+            a = x1 + sa // dy12
+            b = x0 + sb // dy02
+            sa += dx12
+            sb += dx02
+            if a > b:
+                a, b = b, a
+            self.hline(a, y, b - a + 1, color)
+            y += 1
+
+    # 一次填滿多個三角形，coords 依序為 x0, y0, x1, y1, x2, y2, ... (每個三角形 6 個整數)
+    # 可以用 array('h') 預先存好由三角形組成的圖案，dx, dy 為整體位移
+    def fill_triangles(self, coords, color, dx=0, dy=0):
+        fill_triangle = self.fill_triangle
+        for i in range(0, len(coords) - 5, 6):
+            fill_triangle(coords[i] + dx, coords[i + 1] + dy,
+                          coords[i + 2] + dx, coords[i + 3] + dy,
+                          coords[i + 4] + dx, coords[i + 5] + dy, color)
+
+    # 填滿凸多邊形，coords 依序為 x0, y0, x1, y1, ... 的頂點 (順時針或逆時針)
+    # 以第一個頂點為中心切成扇形三角形，再用 fill_triangle 畫出
+    def fill_convex_polygon(self, coords, color):
+        x0 = coords[0]
+        y0 = coords[1]
+        for i in range(2, len(coords) - 3, 2):
+            self.fill_triangle(x0, y0, coords[i], coords[i + 1], coords[i + 2], coords[i + 3], color)
 
     # Draw a rectangle
     def draw_rectangle(self, x0, y0, width, height, color):
@@ -201,66 +572,46 @@ class SH1107(framebuf.FrameBuffer):
     def fill_rectangle(self, x0, y0, width, height, color):
         self.fill_rect(x0, y0, width, height, color)
 
-    # Optimization: Fill polygon
-    def _fill_polygon(self, points, color):
-        points.sort(key=lambda p: p[1])
-        for y in range(points[0][1], points[-1][1] + 1):
-            nodes = []
-            j = len(points) - 1
-            for i in range(len(points)):
-                if points[i][1] < y and points[j][1] >= y or points[j][1] < y and points[i][1] >= y:
-                    nodes.append(int(points[i][0] + (y - points[i][1]) / (points[j][1] - points[i][1]) * (points[j][0] - points[i][0])))
-                j = i
-            nodes.sort()
-            for i in range(0, len(nodes), 2):
-                if i + 1 < len(nodes):
-                    self.hline(nodes[i], y, nodes[i + 1] - nodes[i], color)
-
-    # Optimization: Draw circle points
-    def _draw_circle_points(self, x0, y0, x, y, color):
-        points = [(x0 + x, y0 + y), (x0 - x, y0 + y), (x0 + x, y0 - y), (x0 - x, y0 - y),
-                  (x0 + y, y0 + x), (x0 - y, y0 + x), (x0 + y, y0 - x), (x0 - y, y0 - x)]
-        for point in points:
-            self.pixel(point[0], point[1], color)
-
-    # Optimization: Draw filled circle lines
-    def _draw_filled_circle_lines(self, x0, y0, x, y, color):
-        self.hline(x0 - x, y0 + y, 2 * x + 1, color)
-        self.hline(x0 - x, y0 - y, 2 * x + 1, color)
-        self.hline(x0 - y, y0 + x, 2 * y + 1, color)
-        self.hline(x0 - y, y0 - x, 2 * y + 1, color)
-        
-    def drawBitmap(self, x, y, bitmap, width, height):
+    def drawBitmap(self, x, y, bitmap, width, height, transparent=False, invert=False):
         """
         繪製位圖到 OLED 顯示器。
+        位圖包成 framebuf.FrameBuffer 後以一次 blit 繪製，超出螢幕的部分會自動裁切。
+        同一個 bitmap 物件的 FrameBuffer 會被快取，重複繪製時不需要重新建立。
 
         @param x 水平起始位置。
         @param y 垂直起始位置。
-        @param bitmap 包含位圖數據的字節陣列。
+        @param bitmap 包含位圖數據的字節陣列 (MONO_HLSB，每列從最高位元開始)。
         @param width 位圖的寬度。
         @param height 位圖的高度。
+        @param transparent 為 True 時背景像素不覆蓋螢幕原有內容。
+        @param invert 為 True 時反相繪製 (0 的位元點亮)。
         """
-        for j in range(height):
-            for i in range(width):
-                # 計算位圖中的索引位置
-                index = j * (width // 8) + i // 8
-                # 讀取對應的位值
-                if (bitmap[index] >> (7 - i % 8)) & 1:
-                    self.pixel(x + i, y + j, 1)
-                else:
-                    self.pixel(x + i, y + j, 0)
+        entry = self._bitmap_cache.get(id(bitmap))
+        if entry is None or entry[0] is not bitmap or entry[1] != width or entry[2] != height:
+            # framebuf 需要可寫入的緩衝區，bytes 常數先複製一份
+            buf = bitmap if isinstance(bitmap, bytearray) else bytearray(bitmap)
+            if len(self._bitmap_cache) >= _BITMAP_CACHE_SIZE:
+                self._bitmap_cache.clear()
+            entry = (bitmap, width, height, framebuf.FrameBuffer(buf, width, height, framebuf.MONO_HLSB))
+            self._bitmap_cache[id(bitmap)] = entry
+        # 反相時透過調色盤把 0/1 對調；透明色比對的是調色盤轉換後的顏色，所以兩種情況都是 0
+        self.blit(entry[3], x, y, 0 if transparent else -1, _INVERT_PALETTE if invert else None)
 
 # SH1107 I2C class, inherits from SH1107
 class SH1107_I2C(SH1107):
-    def __init__(self, width, height, i2c, res=None, addr=0x3c, external_vcc=False):
+    def __init__(self, width, height, i2c, res=None, addr=0x3c, external_vcc=False, background=False):
         # Initialize I2C address and reset pin
         self.i2c = i2c
         self.addr = addr
         self.res = res
         self.temp = bytearray(2)
+        # writevto 的向量：控制位元組 (Co=0, D/C#=1) 加上資料，不需要先串接成新的 bytes
+        self._data_vec = [b'\x40', None]
+        self._cmds_vec = [b'\x00', None]  # 連續指令：Co=0, D/C#=0
+        self._vectored = hasattr(i2c, 'writevto')  # 換匯流排 (enable_stats/disable_stats) 時重新判斷
         if res is not None:
             res.init(res.OUT, value=1)
-        super().__init__(width, height, external_vcc)
+        super().__init__(width, height, external_vcc, background)
 
     # Write command
     def write_cmd(self, cmd):
@@ -268,14 +619,51 @@ class SH1107_I2C(SH1107):
         self.temp[1] = cmd
         self.i2c.writeto(self.addr, self.temp)
 
+    # Write a list of commands in a single I2C transaction
+    def write_cmds(self, cmds):
+        if self._vectored:
+            self._cmds_vec[1] = cmds
+            self.i2c.writevto(self.addr, self._cmds_vec)
+            self._cmds_vec[1] = None
+        else:
+            self.i2c.writeto(self.addr, b'\x00' + bytes(cmds))
+
+    # 寫出已經帶有控制位元組 (buf[0]) 的指令或資料，show() 用預先配置的緩衝區直接送出，不配置記憶體
+    def write_framed(self, buf):
+        self.i2c.writeto(self.addr, buf)
+
     # Write data
     def write_data(self, buf):
-        self.i2c.writeto(self.addr, b'\x40'+buf)
+        if self._vectored:
+            self._data_vec[1] = buf
+            self.i2c.writevto(self.addr, self._data_vec)
+            self._data_vec[1] = None
+        else:
+            self.i2c.writeto(self.addr, b'\x40' + bytes(buf))
 
     # Reset the display
     def reset(self):
         super().reset(self.res)
 
+    # 開始統計 write_cmd/write_data 的 I2C 流量，回傳 I2CStats 物件
+    def enable_stats(self, name='I2C1'):
+        try:
+            from libraries.i2c_stats import I2CStats
+        except ImportError:
+            from i2c_stats import I2CStats
+        self.wait_show()
+        if not isinstance(self.i2c, I2CStats):
+            self.i2c = I2CStats(self.i2c, name)
+            self._vectored = hasattr(self.i2c, 'writevto')
+        return self.i2c
+
+    # 停止統計，改回直接使用原本的 I2C 物件
+    def disable_stats(self):
+        self.wait_show()
+        if hasattr(self.i2c, 'snapshot'):
+            self.i2c = self.i2c.i2c
+            self._vectored = hasattr(self.i2c, 'writevto')
+
 
 # 主函数
 def main():
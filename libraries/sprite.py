@@ -0,0 +1,102 @@
+'''
+這是Micropython
+sprite.py 使用方法
+把遊戲裡用 '0'/'1' 字串畫的圖案，在載入時就編譯成 framebuf.FrameBuffer，
+繪製時只需要一次 blit 呼叫，不用每個像素呼叫一次 pixel/fill_rect。
+
+from libraries.sprite import Sprite
+PLAYER = Sprite([
+    '00100',
+    '01110',
+    '11111',
+])
+PLAYER_FLIPPED = PLAYER.mirrored()  # 水平反轉的版本，同樣只編譯一次
+
+繪製: PLAYER.draw(display, x, y)
+    display 可以是 SH1107 或任何有 blit(fbuf, x, y, key) 方法的物件
+    '0' 的像素是透明的，不會蓋掉背景
+注意:
+Sprite 應該在模組載入時建立一次，不要在每一幀重新建立
+直接執行本檔案可以在板子上比較逐像素繪製與 blit 的每幀耗時
+'''
+import framebuf
+
+
+class Sprite:
+    def __init__(self, rows, mirror=False):
+        """
+        把字串圖案編譯成 MONO_HLSB 格式的 FrameBuffer。
+
+        :param rows: 由 '0'/'1' 組成的字串列表，每個字串是一列。
+        :param mirror: 是否水平反轉。
+        """
+        self.rows = rows
+        self.height = len(rows)
+        self.width = max(len(row) for row in rows) if rows else 0
+        stride = (self.width + 7) // 8
+        self.buffer = bytearray(stride * self.height)
+        for y, row in enumerate(rows):
+            for x, pixel in enumerate(row):
+                if pixel == '1':
+                    if mirror:
+                        x = self.width - 1 - x
+                    self.buffer[y * stride + x // 8] |= 0x80 >> (x % 8)
+        self.fb = framebuf.FrameBuffer(self.buffer, self.width, self.height, framebuf.MONO_HLSB)
+
+    def mirrored(self):
+        """
+        回傳水平反轉的 Sprite。
+        """
+        return Sprite(self.rows, mirror=True)
+
+    def draw(self, display, x, y):
+        """
+        以 '0' 為透明色，把圖案畫到 display 的 (x, y)。
+        """
+        display.blit(self.fb, x, y, 0)
+
+
+def benchmark(frames=20):
+    """
+    比較逐像素繪製字串圖案與 Sprite.blit 的每幀耗時 (微秒)。
+    畫面內容約等於 space_shooter_game 的一幀：3 架飛機、10 個敵人、2 個道具。
+    """
+    import utime as time
+    art = [
+        '00000100000',
+        '00001110000',
+        '00011111000',
+        '00111111100',
+        '01111111110',
+        '11111111111',
+        '00011111000',
+        '00001110000',
+        '00000100000',
+    ]
+    count = 15
+    screen = framebuf.FrameBuffer(bytearray(128 * 128 // 8), 128, 128, framebuf.MONO_VLSB)
+
+    start = time.ticks_us()
+    for _ in range(frames):
+        screen.fill(0)
+        for n in range(count):
+            for row, line in enumerate(art):
+                for col, pixel in enumerate(line):
+                    if pixel == '1':
+                        screen.fill_rect(n * 8 + col, n * 8 + row, 1, 1, 1)
+    before = time.ticks_diff(time.ticks_us(), start) // frames
+
+    sprite = Sprite(art)
+    start = time.ticks_us()
+    for _ in range(frames):
+        screen.fill(0)
+        for n in range(count):
+            sprite.draw(screen, n * 8, n * 8)
+    after = time.ticks_diff(time.ticks_us(), start) // frames
+
+    print("string art: {} us/frame, sprite blit: {} us/frame".format(before, after))
+    return before, after
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -46,6 +46,24 @@ class OLED:
         self.display.text(text[:16], 0, 0)  # 顯示一行最多16個字符
         self.display.show()  # 更新顯示內容
 
+# ==================== 感測器校正 ====================
+
+def place_flat_prompt(oled, seconds=3):
+    """在螢幕上提示把裝置平放靜止，倒數結束後開始校正"""
+    for remaining in range(seconds, 0, -1):
+        oled.display_text("Place flat {}".format(remaining))
+        time.sleep(1)
+    oled.display_text("Calibrating...")
+
+def recalibrate(oled, mpu):
+    """選單中按住按鈕超過 recalibrate_threshold 秒：提示平放後重新校正並覆蓋校正檔"""
+    place_flat_prompt(oled)
+    mpu.calibrate()
+    try:
+        mpu.save_calibration()
+    except OSError:
+        pass  # flash 寫不進去時這次開機仍然使用新的校正結果
+
 # ==================== 菜單選擇邏輯 ====================
 
 class MainMenu:
@@ -92,6 +110,7 @@ class ButtonHandler:
     def __init__(self):
         self.last_press_time = 0
         self.press_threshold = 1.0  # 1 second threshold for long press
+        self.recalibrate_threshold = 3.0  # 按住 3 秒以上放開：重新校正 MPU6050
         self.debounce_time = 0.05  # 50 milliseconds debounce
 
     def get_press_duration(self):
@@ -132,12 +151,14 @@ def main():
     init_mpu6050_power()
     display, i2c0 = init_i2c_display()
 
-    # 初始化 MPU6050 傳感器
-    mpu = MPU6050(i2c0)
-
     # 初始化 OLED 顯示
     oled = OLED(display)
 
+    # 初始化 MPU6050 傳感器
+    # 載入校正檔；沒有或過期時先在螢幕上提示平放，再校正一次並存檔 (遊戲只會載入這個檔案)
+    mpu = MPU6050(i2c0)
+    mpu.load_or_calibrate(prompt=lambda: place_flat_prompt(oled))
+
     # 初始化菜單與按鈕處理
     menu = MainMenu(oled)
     button_handler = ButtonHandler()
@@ -157,7 +178,9 @@ def main():
         # 按鍵消抖處理
         time.sleep(MainMenu.DEBOUNCE_DELAY)
 
-        if press_duration >= button_handler.press_threshold:
+        if press_duration >= button_handler.recalibrate_threshold:
+            press_type = 'calibrate'
+        elif press_duration >= button_handler.press_threshold:
             press_type = 'long'
         else:
             press_type = 'short'
@@ -166,6 +189,10 @@ def main():
             if press_type == 'short':
                 print("Main Menu: Short press detected, moving to next menu item.")
                 menu.next_item()
+            elif press_type == 'calibrate':
+                print("Main Menu: Very long press detected, recalibrating the MPU6050.")
+                recalibrate(oled, mpu)
+                menu.display_current_selection()
             elif press_type == 'long':
                 print("Main Menu: Long press detected, selecting current menu item and running the game.")
                 selected_game_name = menu.get_selected_game()
@@ -1,10 +1,24 @@
 import time
-import rp2
+try:
+    import rp2
+except ImportError:
+    rp2 = None
 import random
 from libraries.Mpu6050_mahony import MPU6050
-from machine import mem32, Pin, I2C
+try:
+    from machine import mem32, Pin, I2C
+except ImportError:
+    mem32 = Pin = I2C = None  # 電腦上 (CPython) 只測試 Game 的邏輯，見 tests/test_game_replay.py
 import libraries.sh1107 as sh1107
-import libraries.TimeToDo as TimeToDo
+from libraries.game_loop import GameLoop
+
+# MPU6050.get_tilt_direction() 的結果對應到蛇的移動方向
+TILT_DIRECTIONS = {
+    'right': (1, 0),
+    'left': (-1, 0),
+    'up': (0, 1),
+    'down': (0, -1),
+}
 
 # ==================== OLED 驅動程式 ====================
 
@@ -38,8 +52,10 @@ class Game:
         self.next_direction = self.direction  # 下一個方向
         self.game_over = False
         self.is_running = False
-        self.update_timer = TimeToDo.TimeToDo(200)
-        self.OnTiltAnglesTimeTo = TimeToDo.TimeToDo(10)
+        # 蛇每 200 毫秒移動一格，畫面只在蛇移動後重畫
+        self.loop = GameLoop(200, self.update_game, self.draw_game, dirty_only=True)
+        self.gyro_task = self.loop.scheduler.every(10, self.update_gyro_data)  # 傾斜讀取頻率
+        self.state_task = self.loop.scheduler.every(20, self.check_state)      # 長按離開與遊戲結束
 
     def init(self):
         """
@@ -64,41 +80,32 @@ class Game:
         print("Game is running...")
         self.is_running = True
         try:
-            while self.is_running:
-                self.OnTiltAnglesTimeTo.Do(self.update_gyro_data)
-                self.update_timer.Do(self.update_game)
-                
-                if self.check_button():
-                    print("Detected a long press, preparing to return to main menu.")
-                    self.is_running = False
-                    break
-
-                if self.game_over:
-                    self.draw_game_over()
-                    time.sleep(2)
-                    self.init_game()
-                else:
-                    self.draw_game()
+            self.loop.reset()
+            self.loop.run()  # 直到 check_state() 偵測到長按而停止
         except Exception as e:
             print(f"An error occurred: {e}")
             self.is_running = False
 
+    def check_state(self):
+        """Check for a long press (exit) and game over."""
+        if self.check_button():
+            print("Detected a long press, preparing to return to main menu.")
+            self.is_running = False
+            self.loop.stop()
+            return
+
+        if self.game_over:
+            self.draw_game_over()
+            time.sleep(2)
+            self.init_game()
+            self.loop.reset()  # 重新計時並重畫
+
     def update_gyro_data(self):
         """Update gyro data to change direction."""
         self.mpu.update_mahony()
-        roll, pitch, _ = self.mpu.get_angles()
-        new_direction = self.next_direction  # 使用緩衝的方向
-
-        if abs(roll) > abs(pitch):
-            if roll > 10:
-                new_direction = (1, 0)  # Right
-            elif roll < -10:
-                new_direction = (-1, 0)  # Left
-        else:
-            if pitch > 10:
-                new_direction = (0, 1)  # Up
-            elif pitch < -10:
-                new_direction = (0, -1)  # Down
+        # 直接用四元數判斷傾斜方向，不必每次都算歐拉角
+        tilt = self.mpu.get_tilt_direction(10)
+        new_direction = TILT_DIRECTIONS.get(tilt, self.next_direction)  # 沒有傾斜就使用緩衝的方向
 
         # 防止蛇反向移動
         opposite_direction = (-self.direction[0], -self.direction[1])
@@ -205,6 +212,7 @@ def main():
     # Initialize MPU6050
     i2c0 = I2C(0, scl=Pin(21), sda=Pin(20), freq=400000)
     mpu = MPU6050(i2c0)
+    mpu.load_calibration()  # 只載入 main.py 存好的校正檔，遊戲開始時不會停下來校正
 
     # Create a Game instance
     game = Game(oled, mpu)
@@ -1,12 +1,122 @@
 import time
-import rp2
+try:
+    import rp2
+except ImportError:
+    rp2 = None
 import random
 import math
-from machine import I2C, Pin, mem32
+try:
+    from machine import I2C, Pin, mem32
+except ImportError:
+    I2C = Pin = mem32 = None
 import utime as time_module  # 避免與 time 模組衝突
 import libraries.sh1107 as sh1107
 from libraries.Mpu6050_mahony import MPU6050
-import libraries.TimeToDo as TimeToDo
+from libraries.scheduler import Scheduler
+from libraries.game_loop import GameLoop
+from libraries.profiler import Profiler
+from libraries.sprite import Sprite
+
+# ==================== 定義玩家和敵人的形狀 ====================
+# 載入時編譯一次，繪製時每個圖案只需要一次 blit
+
+# 主角形狀（飛機）
+PLAYER_SPRITE = Sprite([
+    '00000100000',
+    '00001110000',
+    '00011111000',
+    '00111111100',
+    '01111111110',
+    '11111111111',
+    '00011111000',
+    '00001110000',
+    '00000100000',
+])
+
+# 不同類型的敵人形狀
+ENEMY_SPRITES = {
+    # 星形敵人
+    1: Sprite([
+        '00010000',
+        '00111000',
+        '11111110',
+        '00111000',
+        '00010000',
+        '00000000',
+        '00000000',
+        '00000000',
+    ]),
+    # 方塊敵人
+    2: Sprite([
+        '11111111',
+        '10000001',
+        '10011001',
+        '10011001',
+        '10000001',
+        '11111111',
+        '00000000',
+        '00000000',
+    ]),
+    # 圓形敵人
+    3: Sprite([
+        '00111100',
+        '01111110',
+        '11111111',
+        '11111111',
+        '11111111',
+        '01111110',
+        '00111100',
+        '00000000',
+    ]),
+}
+
+# 道具形狀
+ITEM_SPRITES = {
+    # 加速道具（箭頭）
+    'speed': Sprite([
+        '00010000',
+        '00111000',
+        '01111100',
+        '11111110',
+        '00111000',
+        '00111000',
+        '00111000',
+        '00000000',
+    ]),
+    # 無敵道具（盾牌）
+    'shield': Sprite([
+        '01111110',
+        '11111111',
+        '11111111',
+        '11111111',
+        '11111111',
+        '01111110',
+        '00111100',
+        '00011000',
+    ]),
+    # 三重射擊道具（火焰）
+    'triple_shot': Sprite([
+        '00010000',
+        '00111000',
+        '01111100',
+        '11111110',
+        '01111100',
+        '00111000',
+        '00010000',
+        '00000000',
+    ]),
+    # 分身道具（雙子）
+    'clone': Sprite([
+        '00100100',
+        '01111110',
+        '01111110',
+        '01111110',
+        '00111100',
+        '00011000',
+        '00000000',
+        '00000000',
+    ]),
+}
 
 # ==================== 顯示器控制類 ====================
 class OLED:
@@ -24,6 +134,9 @@ class OLED:
     def fill_circle(self, x, y, r, color):
         self.display.fill_circle(x, y, r, color)
 
+    def blit(self, fbuf, x, y, key=-1):
+        self.display.blit(fbuf, x, y, key)
+
     def fill(self, color):
         self.display.fill(color)
 
@@ -35,43 +148,14 @@ class OLED:
 
 # ==================== 遊戲類別 ====================
 class Game:
-    def __init__(self, oled):
+    def __init__(self, oled, mpu):
         """
-        Initialize the game with the OLED display.
+        Initialize the game with the OLED display and the MPU6050.
+        硬體 (電源、I2C) 由 main() 初始化，電腦上可以傳入接著假的或重播的 I2C 的 MPU6050 測試遊戲邏輯。
         """
         self.oled = oled
+        self.mpu = mpu
         self.is_running = False
-
-        # ==================== 硬件初始化 ====================
-        # OLED 电源初始化
-        PAD_CONTROL_REGISTER_OLED = 0x4001c024
-        mem32[PAD_CONTROL_REGISTER_OLED] |= 0b0110000
-        
-        self.pin9 = Pin(9, Pin.OUT, value=0)
-        self.pin8 = Pin(8, Pin.OUT, value=0)
-        time_module.sleep(1)
-        self.pin8.value(1)
-        
-        # MPU6050 电源初始化
-        PAD_CONTROL_REGISTER_MPU = 0x4001c05c
-        mem32[PAD_CONTROL_REGISTER_MPU] |= 0b0110000
-        
-        self.pin22 = Pin(22, Pin.OUT, value=0)
-        time_module.sleep(1)
-        self.pin22.value(1)
-        time_module.sleep(1)
-        
-        # 初始化I2C
-        self.i2c0 = I2C(0, scl=Pin(21), sda=Pin(20), freq=400000)
-        self.i2c1 = I2C(1, scl=Pin(7), sda=Pin(6), freq=400000)
-        
-        # 初始化显示屏
-        self.display = sh1107.SH1107_I2C(128, 128, self.i2c1, None, 0x3c)
-        self.display.fill(0)
-        self.display.show()
-        
-        # 初始化MPU6050
-        self.mpu = MPU6050(self.i2c0)
         
         # ==================== 遊戲參數設置 ====================
         self.SCREEN_WIDTH = 128
@@ -96,14 +180,16 @@ class Game:
         self.MAX_ENEMIES = 10  # 屏幕上最多敵人數量
         self.MAX_BULLETS = 50  # 屏幕上最多子彈數量
         
-        # 定時器
-        self.update_timer = TimeToDo.TimeToDo(0)  # 遊戲邏輯更新，立即執行
-        self.draw_timer = TimeToDo.TimeToDo(67)  # 畫面更新頻率，大約15FPS
-        self.bullet_timer = TimeToDo.TimeToDo(300)  # 主角射擊頻率
-        self.enemy_spawn_timer = TimeToDo.TimeToDo(1500)  # 敵人生成頻率
-        self.enemy_bullet_timer = TimeToDo.TimeToDo(700)  # 敵人射擊頻率
-        self.item_spawn_timer = TimeToDo.TimeToDo(7000)  # 道具生成頻率
-        self.gyro_update_timer = TimeToDo.TimeToDo(10)  # 陀螺儀更新頻率
+        # 大於 0 時每隔這麼多毫秒經 USB 序列埠印出每個任務的執行時間統計
+        self.PROFILE_MS = 0
+        
+        # 排程器：所有定時任務依到期時間執行，沒有任務到期時休眠
+        self.scheduler = Scheduler()
+        if self.PROFILE_MS:
+            profiler = Profiler(self.PROFILE_MS)
+            self.scheduler.set_profiler(profiler)  # 之後建立的任務與 GameLoop 都會被統計
+            self.check_collisions = profiler.wrap(self.check_collisions)
+        self.init_tasks()
         
         # 玩家道具效果
         self.player_items = []
@@ -132,142 +218,43 @@ class Game:
         self.clones = []
         
         # 重新初始化定時器
-        self.update_timer = TimeToDo.TimeToDo(0)       # 遊戲邏輯更新，立即執行
-        self.draw_timer = TimeToDo.TimeToDo(17)        # 畫面更新頻率，大約60FPS
-        self.bullet_timer = TimeToDo.TimeToDo(300)     # 主角射擊頻率
-        self.enemy_spawn_timer = TimeToDo.TimeToDo(1500)  # 敵人生成頻率
-        self.enemy_bullet_timer = TimeToDo.TimeToDo(700)  # 敵人射擊頻率
-        self.item_spawn_timer = TimeToDo.TimeToDo(7000)   # 道具生成頻率
-        self.gyro_update_timer = TimeToDo.TimeToDo(10)    # 陀螺儀更新頻率
+        self.init_tasks()
+
+    def init_tasks(self):
+        """
+        (重新) 建立所有定時任務，同時到期時依建立順序執行。
+        """
+        scheduler = self.scheduler
+        scheduler.clear()  # 也會取消還沒到期的道具效果計時器
+        self.speed_timer = 0        # 道具效果到期的單次計時器 handle，0 表示沒有
+        self.triple_shot_timer = 0
+        self.clone_timer = 0
+        self.gyro_update_task = scheduler.every(10, self.update_gyro_data)    # 陀螺儀更新頻率
+        # 遊戲邏輯固定約30Hz；畫面最多約60FPS，只在邏輯更新或主角移動後重畫
+        self.loop = GameLoop(33, self.update_game, self.draw_game, render_ms=17, dirty_only=True, scheduler=scheduler)
+        self.bullet_task = scheduler.every(300, self.player_shoot)            # 主角射擊頻率
+        self.enemy_spawn_task = scheduler.every(1500, self.spawn_enemy)       # 敵人生成頻率
+        self.enemy_bullet_task = scheduler.every(700, self.enemy_shoot)       # 敵人射擊頻率
+        self.item_spawn_task = scheduler.every(7000, self.spawn_item)         # 道具生成頻率
+        self.state_task = scheduler.every(20, self.check_state)               # 長按離開與遊戲結束
 
-    # ==================== 定義玩家和敵人的形狀 ====================
+    # ==================== 繪製玩家和敵人 ====================
     
     # 主角形狀（飛機）
     def draw_player(self, x, y):
-        airplane = [
-            '00000100000',
-            '00001110000',
-            '00011111000',
-            '00111111100',
-            '01111111110',
-            '11111111111',
-            '00011111000',
-            '00001110000',
-            '00000100000',
-        ]
-        for row, line in enumerate(airplane):
-            for col, pixel in enumerate(line):
-                if pixel == '1':
-                    self.oled.fill_rect(x + col, y + row, 1, 1, 1)
+        PLAYER_SPRITE.draw(self.oled, x, y)
     
     # 不同類型的敵人形狀
     def draw_enemy(self, enemy_type, x, y):
-        if enemy_type == 1:
-            # 星形敵人
-            star = [
-                '00010000',
-                '00111000',
-                '11111110',
-                '00111000',
-                '00010000',
-                '00000000',
-                '00000000',
-                '00000000',
-            ]
-            shape = star
-        elif enemy_type == 2:
-            # 方塊敵人
-            square = [
-                '11111111',
-                '10000001',
-                '10011001',
-                '10011001',
-                '10000001',
-                '11111111',
-                '00000000',
-                '00000000',
-            ]
-            shape = square
-        elif enemy_type == 3:
-            # 圓形敵人
-            circle = [
-                '00111100',
-                '01111110',
-                '11111111',
-                '11111111',
-                '11111111',
-                '01111110',
-                '00111100',
-                '00000000',
-            ]
-            shape = circle
-        else:
-            shape = []
-        for row, line in enumerate(shape):
-            for col, pixel in enumerate(line):
-                if pixel == '1':
-                    self.oled.fill_rect(x + col, y + row, 1, 1, 1)
+        sprite = ENEMY_SPRITES.get(enemy_type)
+        if sprite is not None:
+            sprite.draw(self.oled, x, y)
     
     # 道具形狀
     def draw_item(self, item_type, x, y):
-        if item_type == 'speed':
-            # 加速道具（箭頭）
-            arrow = [
-                '00010000',
-                '00111000',
-                '01111100',
-                '11111110',
-                '00111000',
-                '00111000',
-                '00111000',
-                '00000000',
-            ]
-            shape = arrow
-        elif item_type == 'shield':
-            # 無敵道具（盾牌）
-            shield = [
-                '01111110',
-                '11111111',
-                '11111111',
-                '11111111',
-                '11111111',
-                '01111110',
-                '00111100',
-                '00011000',
-            ]
-            shape = shield
-        elif item_type == 'triple_shot':
-            # 三重射擊道具（火焰）
-            fire = [
-                '00010000',
-                '00111000',
-                '01111100',
-                '11111110',
-                '01111100',
-                '00111000',
-                '00010000',
-                '00000000',
-            ]
-            shape = fire
-        elif item_type == 'clone':
-            # 分身道具（雙子）
-            twin = [
-                '00100100',
-                '01111110',
-                '01111110',
-                '01111110',
-                '00111100',
-                '00011000',
-                '00000000',
-                '00000000',
-            ]
-            shape = twin
-        else:
-            shape = []
-        for row, line in enumerate(shape):
-            for col, pixel in enumerate(line):
-                if pixel == '1':
-                    self.oled.fill_rect(x + col, y + row, 1, 1, 1)
+        sprite = ITEM_SPRITES.get(item_type)
+        if sprite is not None:
+            sprite.draw(self.oled, x, y)
     
     # ==================== 遊戲函數定義 ====================
     
@@ -283,6 +270,9 @@ class Game:
         if abs(pitch) > 5:
             dy = int(math.copysign(1, pitch)) * self.player_speed  # 上下移動
     
+        if dx or dy:
+            self.loop.invalidate()  # 主角移動了，下一個畫面要重畫
+    
         # 更新主角位置，並限制在屏幕內
         self.player_pos[0] = max(0, min(self.SCREEN_WIDTH - self.PLAYER_WIDTH, self.player_pos[0] + dx))
         self.player_pos[1] = max(0, min(self.SCREEN_HEIGHT - self.PLAYER_HEIGHT, self.player_pos[1] + dy))
@@ -467,17 +457,23 @@ class Game:
                 player_y < item_y + 8 and item_y < player_y + self.PLAYER_HEIGHT):
                 if item in self.items:
                     self.items.remove(item)
+                # 效果到期用單次計時器，重複撿到時取消舊的計時器重新計算
+                scheduler = self.scheduler
                 if item['type'] == 'speed':
                     self.player_speed = 4  # 加速
-                    TimeToDo.TimeToDo(5000).Do(self.reset_speed)  # 5秒後恢復速度
+                    scheduler.cancel(self.speed_timer)
+                    self.speed_timer = scheduler.after(5000, self.reset_speed)  # 5秒後恢復速度
                 elif item['type'] == 'shield':
                     self.player_items.append('shield')  # 獲得盾牌
                 elif item['type'] == 'triple_shot':
-                    self.player_items.append('triple_shot')  # 獲得三重射擊
-                    TimeToDo.TimeToDo(10000).Do(self.remove_triple_shot)  # 10秒後失效
+                    if 'triple_shot' not in self.player_items:
+                        self.player_items.append('triple_shot')  # 獲得三重射擊
+                    scheduler.cancel(self.triple_shot_timer)
+                    self.triple_shot_timer = scheduler.after(10000, self.remove_triple_shot)  # 10秒後失效
                 elif item['type'] == 'clone':
                     self.add_clone()
-                    TimeToDo.TimeToDo(10000).Do(self.remove_clone)  # 10秒後移除分身
+                    scheduler.cancel(self.clone_timer)
+                    self.clone_timer = scheduler.after(10000, self.remove_clone)  # 10秒後移除分身
     
     # 恢復玩家速度
     def reset_speed(self, *args):
@@ -556,9 +552,9 @@ class Game:
         # 每達到一定分數提升一級
         if self.score // 100 + 1 > self.level:
             self.level += 1
-            # 增加敵人生成和射擊頻率
-            self.enemy_spawn_timer.interval = max(800, 1500 - (self.level - 1) * 100)
-            self.enemy_bullet_timer.interval = max(500, 700 - (self.level - 1) * 50)
+            # 增加敵人生成和射擊頻率 (週期單位為毫秒)
+            self.enemy_spawn_task.period_ms = max(800, 1500 - (self.level - 1) * 100)
+            self.enemy_bullet_task.period_ms = max(500, 700 - (self.level - 1) * 50)
     
     def check_button(self):
         """
@@ -584,6 +580,19 @@ class Game:
             self.check_collisions()
             self.level_control()
     
+    # 檢查長按離開與遊戲結束
+    def check_state(self):
+        if self.check_button():
+            print("Detected a long press, preparing to return to main menu.")
+            self.is_running = False
+            self.scheduler.stop()
+            return
+
+        if self.game_over:
+            self.draw_game_over()
+            time_module.sleep(2)
+            self.init_game()
+
     # 主遊戲循環
     def run(self):
         """
@@ -592,25 +601,8 @@ class Game:
         print("Game is running...")
         self.is_running = True
         try:
-            while self.is_running:
-                # 執行定時器任務
-                self.gyro_update_timer.Do(self.update_gyro_data)
-                self.update_timer.Do(self.update_game)
-                self.bullet_timer.Do(self.player_shoot)
-                self.enemy_spawn_timer.Do(self.spawn_enemy)
-                self.enemy_bullet_timer.Do(self.enemy_shoot)
-                self.item_spawn_timer.Do(self.spawn_item)
-                self.draw_timer.Do(self.draw_game)
-                
-                if self.check_button():
-                    print("Detected a long press, preparing to return to main menu.")
-                    self.is_running = False
-                    break
-    
-                if self.game_over:
-                    self.draw_game_over()
-                    time_module.sleep(2)
-                    self.init_game()
+            # 執行定時器任務，直到 check_state() 偵測到長按而停止
+            self.scheduler.run()
         except Exception as e:
             print(f"An error occurred: {e}")
             self.oled.display_text("Error Occurred")
@@ -624,14 +616,43 @@ class Game:
         self.init_game()
 
 # ==================== 主函數 ====================
+def init_oled_power():
+    """初始化OLED電源"""
+    PAD_CONTROL_REGISTER = 0x4001c024
+    mem32[PAD_CONTROL_REGISTER] |= 0b0110000
+    pin9 = Pin(9, Pin.OUT, value=0)
+    pin8 = Pin(8, Pin.OUT, value=0)
+    time_module.sleep(1)
+    pin8.value(1)
+
+def init_mpu6050_power():
+    """初始化MPU6050電源"""
+    PAD_CONTROL_REGISTER = 0x4001c05c
+    mem32[PAD_CONTROL_REGISTER] |= 0b0110000
+    pin22 = Pin(22, Pin.OUT, value=0)
+    time_module.sleep(1)
+    pin22.value(1)
+    time_module.sleep(1)
+
 def main():
+    # 初始化 OLED 與 MPU6050 的電源
+    init_oled_power()
+    init_mpu6050_power()
+
     # Initialize I2C and OLED display
     i2c1 = I2C(1, scl=Pin(7), sda=Pin(6), freq=400000)
     display = sh1107.SH1107_I2C(128, 128, i2c1, None, 0x3c)
+    display.fill(0)
+    display.show()
     oled = OLED(display)
 
+    # 初始化MPU6050
+    i2c0 = I2C(0, scl=Pin(21), sda=Pin(20), freq=400000)
+    mpu = MPU6050(i2c0)
+    mpu.load_calibration()  # 只載入 main.py 存好的校正檔，遊戲開始時不會停下來校正
+
     # Create a Game instance
-    game = Game(oled)
+    game = Game(oled, mpu)
     game.init()
     game.run()
 
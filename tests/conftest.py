@@ -0,0 +1,16 @@
+'''
+電腦上 (CPython) 跑測試用的共用設定：
+把專案根目錄加到 sys.path (import libraries.xxx、tools.xxx)，
+再把 tools/host 放在最後 (沒有 MicroPython 內建模組時才用到 framebuf、utime 的替代品)。
+執行: python -m pytest -q
+'''
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = os.path.join(ROOT, 'tools', 'host')
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+if HOST not in sys.path:
+    sys.path.append(HOST)
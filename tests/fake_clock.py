@@ -0,0 +1,20 @@
+'''
+測試用的假時鐘：手動前進的 ticks_us，與 utime 一樣在 2**30 繞回。
+可以當作 Scheduler(clock=..., sleep=...) 或 MPU6050(clock=...) 的參數。
+'''
+TICKS_PERIOD = 1 << 30
+
+
+class FakeClock:
+    def __init__(self, start=1000):
+        self.now = start % TICKS_PERIOD
+
+    def advance(self, us):
+        self.now = (self.now + us) % TICKS_PERIOD
+
+    def sleep(self, us):
+        # Scheduler 的 sleep：直接把時間往前推
+        self.advance(us)
+
+    def __call__(self):
+        return self.now
@@ -0,0 +1,67 @@
+'''
+測試用的假 MPU6050：只有暫存器 (WHO_AM_I、PWR_MGMT_1 與 0x3B 開始的 14 位元組量測值)，
+量測值由 set_attitude() 依「遊戲看到的」傾斜角度產生，已經反過來套用驅動程式的倒置補償，
+所以 set_attitude(roll_deg=30) 之後姿態收斂時 get_angles() 的 roll 約為 +30。
+'''
+import math
+import random
+import struct
+
+_G = 16384  # ±2g 時 1g 的原始值
+
+
+class FakeMPU:
+    def __init__(self, addr=0x68, seed=0, noise=0):
+        """
+        :param seed: 雜訊的亂數種子，結果固定。
+        :param noise: 每個量測值加上的最大雜訊 (原始值)。
+        """
+        self.addr = addr
+        self.regs = bytearray(256)
+        self.regs[0x75] = 0x68  # WHO_AM_I
+        self.regs[0x6B] = 0x40  # 上電時在睡眠模式
+        self.random = random.Random(seed)
+        self.noise = noise
+        self.reads = 0
+        self.set_attitude()
+
+    def set_attitude(self, roll_deg=0.0, pitch_deg=0.0, gyro=(0, 0, 0), temp_c=25.0):
+        """
+        設定靜止時的量測值：重力方向對應 get_angles() 的 roll/pitch，gyro 為原始陀螺儀讀數。
+        """
+        roll = math.radians(roll_deg)
+        pitch = math.radians(pitch_deg)
+        # 驅動程式送進濾波器的加速度 (單位 g)：(-ax, -ay, az) / 16384
+        gx = -math.sin(pitch)
+        gy = math.cos(pitch) * math.sin(roll)
+        gz = -math.cos(pitch) * math.cos(roll)
+        self.base = [round(-gx * _G), round(-gy * _G), round(gz * _G),
+                     round((temp_c - 36.53) * 340), gyro[0], gyro[1], gyro[2]]
+        self.sample()
+
+    def sample(self):
+        # 產生一組新的量測值 (加上雜訊)
+        noise = self.noise
+        values = [v + self.random.randint(-noise, noise) if noise and i != 3 else v
+                  for i, v in enumerate(self.base)]
+        values = [max(-32768, min(32767, v)) for v in values]
+        self.regs[0x3B:0x49] = struct.pack('>hhhhhhh', *values)
+
+    # ==================== 與 machine.I2C 相同的介面 ====================
+
+    def readfrom_mem_into(self, addr, memaddr, buf, *args, **kwargs):
+        if addr != self.addr:
+            raise OSError(19)
+        self.reads += 1
+        buf[:] = self.regs[memaddr:memaddr + len(buf)]
+
+    def readfrom_mem(self, addr, memaddr, nbytes, *args, **kwargs):
+        if addr != self.addr:
+            raise OSError(19)
+        self.reads += 1
+        return bytes(self.regs[memaddr:memaddr + nbytes])
+
+    def writeto_mem(self, addr, memaddr, buf, *args, **kwargs):
+        if addr != self.addr:
+            raise OSError(19)
+        self.regs[memaddr:memaddr + len(buf)] = buf
@@ -0,0 +1,102 @@
+'''
+fusion.py 的三個引擎裝在 MPU6050 上 (假的 FakeMPU 感測器)：靜止平放時維持水平、
+固定傾斜時收斂到該角度；set_fusion() 換引擎時目前的姿態要帶過去。
+'''
+import pytest
+
+from fake_clock import FakeClock
+from fake_mpu import FakeMPU
+from libraries.fusion import ENGINES, MahonyFusion, MadgwickFusion, ComplementaryFusion
+from libraries.Mpu6050_mahony import MPU6050
+
+ENGINE_PARAMS = [
+    pytest.param(lambda: MahonyFusion(two_kp=10.0), id='mahony'),
+    pytest.param(lambda: MadgwickFusion(beta=0.1), id='madgwick'),
+    pytest.param(lambda: ComplementaryFusion(alpha=0.98), id='complementary'),
+]
+
+
+def make_mpu(fusion, noise=40):
+    clock = FakeClock()
+    sensor = FakeMPU(seed=3, noise=noise)
+    return sensor, clock, MPU6050(sensor, fusion=fusion, clock=clock)
+
+
+def run(sensor, clock, mpu, updates):
+    # 100 Hz 更新 updates 次
+    for _ in range(updates):
+        sensor.sample()
+        clock.advance(10000)
+        mpu.update_mahony()
+
+
+@pytest.mark.parametrize('engine', ENGINE_PARAMS)
+def test_stationary_level_stays_level(engine):
+    sensor, clock, mpu = make_mpu(engine())
+    sensor.set_attitude(0, 0)
+    run(sensor, clock, mpu, 500)
+    roll, pitch, _ = mpu.get_angles()
+    assert roll == pytest.approx(0, abs=1.0)
+    assert pitch == pytest.approx(0, abs=1.0)
+    assert mpu.get_tilt_direction() is None
+
+
+@pytest.mark.parametrize('engine', ENGINE_PARAMS)
+@pytest.mark.parametrize('roll_deg, pitch_deg', [(25, 0), (0, -20), (15, 10)])
+def test_constant_tilt_converges(engine, roll_deg, pitch_deg):
+    sensor, clock, mpu = make_mpu(engine())
+    sensor.set_attitude(roll_deg, pitch_deg)
+    run(sensor, clock, mpu, 1500)   # 15 秒
+    roll, pitch, _ = mpu.get_angles()
+    assert roll == pytest.approx(roll_deg, abs=1.5)
+    assert pitch == pytest.approx(pitch_deg, abs=1.5)
+
+
+def test_engines_registry():
+    assert set(ENGINES) == {'mahony', 'madgwick', 'complementary'}
+    for name, engine_class in ENGINES.items():
+        assert engine_class().name == name
+
+
+@pytest.mark.parametrize('engine', ENGINE_PARAMS)
+def test_set_fusion_carries_the_attitude_over(engine):
+    sensor, clock, mpu = make_mpu(MahonyFusion(two_kp=10.0))
+    sensor.set_attitude(20, -10)
+    run(sensor, clock, mpu, 1000)
+    before = mpu.get_angles()
+    quaternion = (mpu.q0, mpu.q1, mpu.q2, mpu.q3)
+
+    new = engine()
+    mpu.set_fusion(new)
+    assert mpu.fusion is new
+    assert new.quaternion() == pytest.approx(quaternion, abs=1e-6)
+    after = mpu.get_angles()
+    assert after[0] == pytest.approx(before[0], abs=0.01)
+    assert after[1] == pytest.approx(before[1], abs=0.01)
+
+    # 新的引擎接著更新，姿態不應該跳回水平
+    run(sensor, clock, mpu, 5)
+    roll, pitch, _ = mpu.get_angles()
+    assert roll == pytest.approx(20, abs=1.5)
+    assert pitch == pytest.approx(-10, abs=1.5)
+
+
+def test_set_fusion_with_an_explicit_quaternion():
+    sensor, clock, mpu = make_mpu(MahonyFusion())
+    sensor.set_attitude(20, 0)
+    run(sensor, clock, mpu, 300)
+    mpu.set_fusion(ComplementaryFusion(), 0.0, 1.0, 0.0, 0.0)   # 倒置安裝的水平姿態
+    roll, pitch, _ = mpu.get_angles()
+    assert roll == pytest.approx(0, abs=0.01)
+    assert pitch == pytest.approx(0, abs=0.01)
+
+
+def test_mahony_reset_clears_the_integral():
+    engine = MahonyFusion(two_kp=10.0, two_ki=1.0)
+    for _ in range(100):
+        engine.update(0.0, 0.3, 0.95, 0.01, 0.0, 0.0, 0.01)
+    assert engine.integralFBx != 0.0
+    engine.reset(0.0, 1.0, 0.0, 0.0)
+    assert engine.quaternion() == (0.0, 1.0, 0.0, 0.0)
+    assert (engine.integralFBx, engine.integralFBy, engine.integralFBz) == (0.0, 0.0, 0.0)
+    assert engine.twoKi == 1.0
@@ -0,0 +1,81 @@
+'''
+把錄下來的 IMU 資料 (IMURecorder -> ReplayI2C) 重播進遊戲本身的控制流程：
+Game.update_gyro_data() 讀取重播的 MPU6050，檢查貪食蛇的方向與太空射擊主角的移動。
+'''
+from fake_clock import FakeClock
+from fake_mpu import FakeMPU
+import libraries.imu_record as imu_record
+from libraries.imu_record import IMURecorder, ReplayI2C
+from libraries.Mpu6050_mahony import MPU6050
+import libraries.sh1107 as sh1107
+from tools.sh1107_emulator import SH1107Emulator
+import snake
+import space_shooter_game
+
+STEPS = 120  # 每一段傾斜動作的更新次數 (100 Hz)
+
+
+def record(path, motion, monkeypatch):
+    # 照 motion 的 (roll, pitch) 逐段錄製，每段 STEPS 次 update_mahony()
+    clock = FakeClock()
+    monkeypatch.setattr(imu_record.time, 'ticks_us', clock)
+    sensor = FakeMPU(seed=2, noise=40)
+    recorder = IMURecorder(sensor, path)
+    mpu = MPU6050(recorder, clock=clock)
+    for roll, pitch in motion:
+        sensor.set_attitude(roll, pitch)
+        for _ in range(STEPS):
+            sensor.sample()
+            clock.advance(10000)
+            mpu.update_mahony()
+    recorder.close()
+
+
+def replayed_mpu(path):
+    source = ReplayI2C(path)
+    return source, MPU6050(source, clock=source.ticks_us)
+
+
+def test_snake_follows_the_replayed_tilt(tmp_path, monkeypatch):
+    # 右、上、左、下依序轉彎，最後想直接往回走 (上) 會被擋下
+    motion = [(0, 0), (30, 0), (0, 25), (-30, 0), (0, -25), (0, 25)]
+    expected = [(0, -1), (1, 0), (0, 1), (-1, 0), (0, -1), (0, -1)]
+    path = str(tmp_path / 'snake.rec')
+    record(path, motion, monkeypatch)
+
+    source, mpu = replayed_mpu(path)
+    display = sh1107.SH1107_I2C(128, 128, SH1107Emulator(), None, 0x3c)
+    game = snake.Game(snake.OLED(display), mpu)
+    game.init_game()
+    directions = []
+    for _ in motion:
+        for _ in range(STEPS):
+            game.update_gyro_data()
+        game.update_game()  # 套用緩衝的方向
+        directions.append(game.direction)
+    assert directions == expected
+    assert not source.remaining()
+
+
+def test_space_shooter_player_moves_with_the_replayed_tilt(tmp_path, monkeypatch):
+    motion = [(0, 0), (30, 0), (-30, 0), (0, 25)]
+    path = str(tmp_path / 'shooter.rec')
+    record(path, motion, monkeypatch)
+
+    source, mpu = replayed_mpu(path)
+    display = sh1107.SH1107_I2C(128, 128, SH1107Emulator(), None, 0x3c)
+    game = space_shooter_game.Game(space_shooter_game.OLED(display), mpu)
+    game.init_game()
+    positions = []
+    for _ in motion:
+        start = list(game.player_pos)
+        for _ in range(STEPS):
+            game.update_gyro_data()
+        positions.append((start, list(game.player_pos)))
+    (level_start, level_end), (right_start, right_end), (left_start, left_end), (tilt_start, tilt_end) = positions
+    assert level_end == level_start                       # 平放不動
+    assert right_end[0] > right_start[0] and right_end[1] == right_start[1]
+    assert right_end[0] == game.SCREEN_WIDTH - game.PLAYER_WIDTH   # 一直往右直到邊界
+    assert left_end[0] < left_start[0] and left_end[1] == left_start[1]
+    assert tilt_end[0] == tilt_start[0] and tilt_end[1] != tilt_start[1]
+    assert not source.remaining()
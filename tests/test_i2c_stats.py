@@ -0,0 +1,57 @@
+'''
+I2CStats 與 SH1107_I2C 的搭配：統計包裝只在原本的匯流排有 writevto 時才提供 writevto，
+驅動程式在建立時與 enable_stats/disable_stats 換匯流排時決定要不要用向量寫入。
+'''
+from tools.sh1107_emulator import SH1107Emulator
+from libraries.i2c_stats import I2CStats
+import libraries.sh1107 as sh1107
+
+
+class PlainBus(SH1107Emulator):
+    # 沒有 writevto 的匯流排 (例如某些軟體 I2C 實作)
+    def __getattribute__(self, name):
+        if name == 'writevto':
+            raise AttributeError(name)
+        return super().__getattribute__(name)
+
+
+def test_writevto_only_when_the_bus_has_it():
+    assert hasattr(I2CStats(SH1107Emulator()), 'writevto')
+    assert not hasattr(I2CStats(PlainBus()), 'writevto')
+
+
+def draw_and_show(display):
+    display.fill(0)
+    display.fill_rect(3, 3, 40, 20, 1)
+    display.show()
+
+
+def test_stats_over_a_vectored_bus():
+    panel = SH1107Emulator()
+    display = sh1107.SH1107_I2C(128, 128, panel, None, 0x3c)
+    assert display._vectored
+    stats = display.enable_stats('OLED')
+    assert display._vectored
+    panel.reset_stats()
+    draw_and_show(display)
+    transactions, nbytes, _ = stats.snapshot()
+    assert (transactions, nbytes) == (panel.transactions, panel.bytes)
+    display.disable_stats()
+    assert display.i2c is panel and display._vectored
+    assert panel.framebuffer() == bytes(display.buffer)
+
+
+def test_stats_over_a_bus_without_writevto():
+    panel = PlainBus()
+    display = sh1107.SH1107_I2C(128, 128, panel, None, 0x3c)
+    assert not display._vectored
+    stats = display.enable_stats('OLED')
+    assert not display._vectored   # 包裝後仍然走 writeto，不會呼叫不存在的 writevto
+    panel.reset_stats()
+    draw_and_show(display)
+    transactions, nbytes, _ = stats.snapshot()
+    assert transactions == panel.transactions > 0
+    assert nbytes == panel.bytes
+    display.disable_stats()
+    assert display.i2c is panel and not display._vectored
+    assert panel.framebuffer() == bytes(display.buffer)
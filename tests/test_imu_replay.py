@@ -0,0 +1,90 @@
+'''
+錄製與重播：把假 MPU6050 的一段傾斜動作經 IMURecorder 錄成檔案，再由 ReplayI2C 重播，
+update_mahony() / get_tilt_direction() / get_angles() 的結果必須與錄製當時完全相同，
+而且每一段動作最後判斷出的傾斜方向要正確。
+'''
+import pytest
+
+from fake_clock import FakeClock
+from fake_mpu import FakeMPU
+import libraries.imu_record as imu_record
+from libraries.imu_record import IMURecorder, ReplayI2C
+from libraries.Mpu6050_mahony import MPU6050
+
+# (roll, pitch, 持續的更新次數 (100 Hz), 最後應該判斷出的方向)
+MOTION = (
+    (0, 0, 100, None),
+    (30, 0, 150, 'right'),
+    (0, 0, 150, None),
+    (-30, 0, 150, 'left'),
+    (0, 25, 150, 'up'),
+    (0, -25, 150, 'down'),
+    (5, -5, 150, None),      # 沒有超過門檻
+)
+
+
+def record(path, monkeypatch):
+    """
+    照 MOTION 動作錄一段資料，回傳每次更新後的 (方向, 角度) 與每段結束時的方向。
+    """
+    clock = FakeClock()
+    monkeypatch.setattr(imu_record.time, 'ticks_us', clock)  # 記錄的時間戳與 MPU6050 用同一個時鐘
+    sensor = FakeMPU(seed=1, noise=40)
+    recorder = IMURecorder(sensor, path)
+    mpu = MPU6050(recorder, clock=clock)
+    trace = []
+    ends = []
+    for roll, pitch, steps, _ in MOTION:
+        sensor.set_attitude(roll, pitch)
+        for i in range(steps):
+            sensor.sample()
+            clock.advance(10000 + (i % 5) * 150)  # 取樣間隔有一點抖動
+            mpu.update_mahony()
+            trace.append((mpu.get_tilt_direction(), mpu.get_angles()))
+        ends.append(trace[-1][0])
+    recorder.close()
+    return recorder, trace, ends
+
+
+def replay(path):
+    source = ReplayI2C(path)
+    mpu = MPU6050(source, clock=source.ticks_us)
+    trace = []
+    while source.remaining():
+        mpu.update_mahony()
+        trace.append((mpu.get_tilt_direction(), mpu.get_angles()))
+    return source, mpu, trace
+
+
+def test_replay_reproduces_the_recorded_session(tmp_path, monkeypatch):
+    path = str(tmp_path / 'imu.rec')
+    recorder, recorded, ends = record(path, monkeypatch)
+    assert ends == [expected for _, _, _, expected in MOTION]
+
+    source, mpu, replayed = replay(path)
+    assert replayed == recorded
+    assert recorder.records == len(source.records)
+    with pytest.raises(EOFError):
+        mpu.update_mahony()
+
+
+def test_replayed_angles_follow_the_motion(tmp_path, monkeypatch):
+    path = str(tmp_path / 'imu.rec')
+    record(path, monkeypatch)
+    _, _, trace = replay(path)
+    end = 0
+    for roll, pitch, steps, _ in MOTION:
+        end += steps
+        got_roll, got_pitch, _ = trace[end - 1][1]
+        assert got_roll == pytest.approx(roll, abs=2.0)
+        assert got_pitch == pytest.approx(pitch, abs=2.0)
+
+
+def test_replay_detects_a_changed_read_sequence(tmp_path, monkeypatch):
+    path = str(tmp_path / 'imu.rec')
+    record(path, monkeypatch)
+    source = ReplayI2C(path)
+    mpu = MPU6050(source, clock=source.ticks_us)
+    mpu.enable_fifo()  # 錄製時沒有用 FIFO：改讀 FIFO 長度就與記錄對不上
+    with pytest.raises(ValueError):
+        mpu.update_mahony()
@@ -0,0 +1,147 @@
+'''
+原本寫在 MPU6050.update_mahony() 裡的純 Python 純量更新 (以 self.q0..self.q3 屬性計算，雙精度)
+與現在的 array('f') kernel (mahony_kernel.mahony_update) 並排執行同一段重播資料，
+每一步的四元數差距都要在 1e-5 以內。
+'''
+import math
+
+import pytest
+
+from fake_clock import FakeClock
+from fake_mpu import FakeMPU
+import libraries.imu_record as imu_record
+from libraries.imu_record import IMURecorder, ReplayI2C
+from libraries.Mpu6050_mahony import MPU6050
+from libraries.fusion import MahonyFusion
+
+
+class BaselineMahony:
+    '''
+    原始版本的 update_mahony()，只把讀感測器與計算 dt 換成參數，其餘照抄。
+    '''
+    def __init__(self, two_kp, two_ki, q=(0.0, 1.0, 0.0, 0.0)):
+        self.q0, self.q1, self.q2, self.q3 = q
+        self.twoKp = two_kp
+        self.twoKi = two_ki
+        self.integralFBx = 0.0
+        self.integralFBy = 0.0
+        self.integralFBz = 0.0
+
+    def update(self, ax, ay, az, gx, gy, gz, dt):
+        # 正規化加速度向量
+        norm = math.sqrt(ax * ax + ay * ay + az * az)
+        if (norm==0):
+            return
+        recipNorm = 1.0 / norm
+        ax *= recipNorm
+        ay *= recipNorm
+        az *= recipNorm
+
+        # 估算方向誤差向量
+        halfvx = self.q1 * self.q3 - self.q0 * self.q2
+        halfvy = self.q0 * self.q1 + self.q2 * self.q3
+        halfvz = self.q0 * self.q0 - 0.5 + self.q3 * self.q3
+
+        # 誤差是測量值和估算值的叉積
+        halfex = (ay * halfvz - az * halfvy)
+        halfey = (az * halfvx - ax * halfvz)
+        halfez = (ax * halfvy - ay * halfvx)
+
+        # 計算並應用積分反饋（如果啟用）
+        if self.twoKi > 0.0:
+            self.integralFBx += self.twoKi * halfex * dt
+            self.integralFBy += self.twoKi * halfey * dt
+            self.integralFBz += self.twoKi * halfez * dt
+            gx += self.integralFBx
+            gy += self.integralFBy
+            gz += self.integralFBz
+        else:
+            self.integralFBx = 0.0
+            self.integralFBy = 0.0
+            self.integralFBz = 0.0
+
+        # 應用比例反饋
+        gx += self.twoKp * halfex
+        gy += self.twoKp * halfey
+        gz += self.twoKp * halfez
+
+        # 積分四元數比率並正規化
+        gx *= 0.5 * dt
+        gy *= 0.5 * dt
+        gz *= 0.5 * dt
+        qa = self.q0
+        qb = self.q1
+        qc = self.q2
+        self.q0 += (-qb * gx - qc * gy - self.q3 * gz)
+        self.q1 += (qa * gx + qc * gz - self.q3 * gy)
+        self.q2 += (qa * gy - qb * gz + self.q3 * gx)
+        self.q3 += (qa * gz + qb * gy - qc * gx)
+
+        # 正規化四元數
+        norm = math.sqrt(self.q0 * self.q0 + self.q1 * self.q1 + self.q2 * self.q2 + self.q3 * self.q3)
+        if (norm == 0):
+            return
+        recipNorm = 1.0 / norm
+        self.q0 *= recipNorm
+        self.q1 *= recipNorm
+        self.q2 *= recipNorm
+        self.q3 *= recipNorm
+
+
+# (roll, pitch, 陀螺儀原始值, 更新次數)：有轉動也有靜止，讓比例與積分回饋都有作用
+MOTION = (
+    (0, 0, (0, 0, 0), 100),
+    (25, 0, (1500, -300, 800), 200),
+    (-20, 15, (-900, 1200, -2500), 200),
+    (0, -30, (300, 300, 6000), 200),
+    (10, 10, (0, 0, 0), 300),
+)
+
+
+@pytest.fixture
+def recording(tmp_path, monkeypatch):
+    path = str(tmp_path / 'imu.rec')
+    clock = FakeClock()
+    monkeypatch.setattr(imu_record.time, 'ticks_us', clock)
+    sensor = FakeMPU(seed=3, noise=200)
+    recorder = IMURecorder(sensor, path)
+    mpu = MPU6050(recorder, clock=clock)
+    for roll, pitch, gyro, steps in MOTION:
+        sensor.set_attitude(roll, pitch, gyro)
+        for i in range(steps):
+            sensor.sample()
+            clock.advance(9000 + (i % 7) * 400)
+            mpu.update_mahony()
+    recorder.close()
+    return path
+
+
+@pytest.mark.parametrize('two_kp, two_ki', [(10.0, 0.0), (2.0, 0.2)])
+def test_kernel_matches_the_scalar_update(recording, two_kp, two_ki):
+    source = ReplayI2C(recording)
+    mpu = MPU6050(source, fusion=MahonyFusion(two_kp=two_kp, two_ki=two_ki), clock=source.ticks_us)
+    baseline = BaselineMahony(two_kp, two_ki, (mpu.q0, mpu.q1, mpu.q2, mpu.q3))
+
+    # 把驅動程式交給 kernel 的參數 (已換算單位、扣掉偏差、算好 dt) 同時交給原本的純量更新
+    kernel = mpu._kernel
+
+    def side_by_side(state, *inputs):
+        kernel(state, *inputs)
+        baseline.update(*inputs)
+    mpu._kernel = side_by_side
+
+    steps = 0
+    worst = 0.0
+    while source.remaining():
+        mpu.update_mahony()
+        steps += 1
+        for got, expected in zip((mpu.q0, mpu.q1, mpu.q2, mpu.q3),
+                                 (baseline.q0, baseline.q1, baseline.q2, baseline.q3)):
+            worst = max(worst, abs(got - expected))
+        assert worst < 1e-5, 'step {}: diff {}'.format(steps, worst)
+    assert steps == sum(m[3] for m in MOTION)
+    if two_ki:
+        assert mpu.integralFBx == pytest.approx(baseline.integralFBx, abs=1e-5)
+        assert mpu.integralFBy == pytest.approx(baseline.integralFBy, abs=1e-5)
+        assert mpu.integralFBz == pytest.approx(baseline.integralFBz, abs=1e-5)
+        assert abs(baseline.integralFBz) > 1e-4  # 積分回饋確實有作用
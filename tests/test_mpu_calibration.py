@@ -0,0 +1,135 @@
+'''
+MPU6050 的初始化與校正檔：
+- init_device() 只在解除睡眠的寫入成功之後才記錄 who_am_i，寫入失敗時會重試。
+- 校正檔以板子的 machine.unique_id() 與安裝方向確認是不是自己的，而不是每顆都一樣的 WHO_AM_I。
+'''
+import json
+
+import pytest
+
+from fake_mpu import FakeMPU
+import libraries.Mpu6050_mahony as mahony
+from libraries.Mpu6050_mahony import MPU6050
+
+
+class FlakyWake(FakeMPU):
+    # 解除睡眠 (寫 PWR_MGMT_1) 的前 failures 次沒有回應
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+        self.wake_writes = 0
+
+    def writeto_mem(self, addr, memaddr, buf, *args, **kwargs):
+        if memaddr == 0x6B:
+            self.wake_writes += 1
+            if self.failures:
+                self.failures -= 1
+                raise OSError(5)
+        super().writeto_mem(addr, memaddr, buf)
+
+
+def test_who_am_i_is_recorded_only_after_the_wake_write():
+    sensor = FlakyWake(failures=3)
+    mpu = MPU6050(sensor)
+    assert sensor.wake_writes == 4      # 失敗的三次都有重試，不會因為 who_am_i 已設定而跳過
+    assert sensor.regs[0x6B] == 0x00
+    assert mpu.who_am_i == 0x68
+
+
+def test_wake_that_never_succeeds_leaves_who_am_i_unset():
+    sensor = FlakyWake(failures=10 ** 9)
+    mpu = MPU6050.__new__(MPU6050)
+    mpu.i2c = sensor
+    mpu.addr = 0x68
+    mpu.who_am_i = None
+    with pytest.raises(OSError):
+        mpu.init_device(timeout_ms=20)
+    assert mpu.who_am_i is None
+    assert sensor.wake_writes > 1
+
+
+@pytest.fixture
+def board(monkeypatch):
+    # 假的 machine.unique_id，回傳的序號可以在測試中換掉
+    ids = {'id': b'\xe6\x61\x41\x04\x03\x5a\x2b\x21'}
+    monkeypatch.setattr(mahony, 'unique_id', lambda: ids['id'])
+    return ids
+
+
+def calibrated(path):
+    mpu = MPU6050(FakeMPU())
+    mpu.gyro_x_offset, mpu.gyro_y_offset, mpu.gyro_z_offset = 12.0, -7.5, 3.25
+    mpu.roll_offset = 1.5
+    mpu.calibration_temp = 25.0
+    mpu.save_calibration(path)
+    return mpu
+
+
+def test_calibration_is_loaded_on_the_same_board(tmp_path, board):
+    path = str(tmp_path / 'cal.json')
+    saved = calibrated(path)
+    with open(path) as f:
+        data = json.load(f)
+    assert data['board_id'] == 'e6614104035a2b21'
+    assert data['mounting'] == mahony.MOUNTING
+    assert 'who_am_i' not in data
+
+    mpu = MPU6050(FakeMPU())
+    assert mpu.load_calibration(path)
+    assert (mpu.gyro_x_offset, mpu.gyro_y_offset, mpu.gyro_z_offset) == (12.0, -7.5, 3.25)
+    assert mpu.roll_offset == saved.roll_offset
+
+
+def test_calibration_from_another_board_is_rejected(tmp_path, board):
+    path = str(tmp_path / 'cal.json')
+    calibrated(path)
+    board['id'] = b'\x01\x02\x03\x04\x05\x06\x07\x08'   # 校正檔被複製到另一塊板子
+    mpu = MPU6050(FakeMPU())
+    assert not mpu.load_calibration(path)
+    assert mpu.gyro_x_offset == 0
+
+
+def test_calibration_with_another_mounting_is_rejected(tmp_path, board):
+    path = str(tmp_path / 'cal.json')
+    calibrated(path)
+    mpu = MPU6050(FakeMPU())
+    mpu.mounting = 'upright'
+    assert not mpu.load_calibration(path)
+
+
+def test_stale_calibration_is_rejected(tmp_path, board):
+    path = str(tmp_path / 'cal.json')
+    calibrated(path)
+    sensor = FakeMPU()
+    sensor.set_attitude(temp_c=45.0)
+    assert not MPU6050(sensor).load_calibration(path)                     # 溫度差太多
+    assert MPU6050(sensor).load_calibration(path, max_temp_delta=None)    # 不檢查溫度
+    with open(path) as f:
+        data = json.load(f)
+    data['version'] = 1
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    assert not MPU6050(FakeMPU()).load_calibration(path)                  # 舊格式
+    assert not MPU6050(FakeMPU()).load_calibration(str(tmp_path / 'missing.json'))
+
+
+def test_load_or_calibrate_prompts_only_when_it_has_to_calibrate(tmp_path, board):
+    path = str(tmp_path / 'cal.json')
+    sensor = FakeMPU()
+    mpu = MPU6050(sensor)
+    events = []
+
+    def prompt():
+        events.append(('prompt', sensor.reads))
+        sensor.set_attitude(gyro=(40, -20, 10))   # 玩家把裝置放平後才開始取樣
+
+    assert not mpu.load_or_calibrate(path, samples=5, prompt=prompt)
+    assert len(events) == 1
+    assert (mpu.gyro_x_offset, mpu.gyro_y_offset, mpu.gyro_z_offset) == (40, -20, 10)
+
+    # 已經有校正檔：直接載入，不提示也不取樣
+    events.clear()
+    again = MPU6050(sensor)
+    assert again.load_or_calibrate(path, samples=5, prompt=prompt)
+    assert events == []
+    assert again.gyro_x_offset == 40
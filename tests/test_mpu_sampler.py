@@ -0,0 +1,207 @@
+'''
+MPU6050Sampler 的測試：假的 I2C 匯流排 (tests/fake_mpu.py) 上以 thread 與 timer 兩種模式取樣，
+寫入端執行中讀取端拿到的 7 個值 (q0..q3, roll, pitch, yaw) 必須是同一次更新的結果。
+
+為了讓撕裂的讀取真的有機會發生，slot 換成每寫一個值就讓出執行權 (thread 模式)，
+或每讀一個值就執行一次計時器排程的取樣 (timer 模式，相當於 micropython.schedule 在兩個 bytecode 之間插進來)。
+'''
+import math
+import sys
+import time
+from array import array
+
+
+from fake_mpu import FakeMPU
+import libraries.Mpu6050_mahony as mahony
+from libraries.Mpu6050_mahony import MPU6050, MPU6050Sampler
+
+
+def make_sampler(period_ms=1, mode='thread'):
+    sensor = FakeMPU(seed=2, noise=300)
+    sensor.set_attitude(20, -10, gyro=(0, 0, 20000))  # z 軸一直轉，yaw 每次更新都不同
+    mpu = MPU6050(sensor)
+    return sensor, MPU6050Sampler(mpu, period_ms=period_ms, mode=mode)
+
+
+def consistent(values):
+    # 由 q0..q3 重新計算 get_angles() 的角度，與同一筆讀到的角度比較
+    q0, q1, q2, q3, roll, pitch, yaw = values
+    r = math.degrees(math.atan2(2.0 * (q0 * q1 + q2 * q3), 1.0 - 2.0 * (q1 * q1 + q2 * q2))) + 180
+    if r > 180:
+        r -= 360
+    p = math.degrees(math.asin(max(-1.0, min(1.0, 2.0 * (q0 * q2 - q3 * q1)))))
+    y = math.degrees(math.atan2(2.0 * (q0 * q3 + q1 * q2), 1.0 - 2.0 * (q2 * q2 + q3 * q3)))
+    return abs(-r - roll) < 2e-3 and abs(p - pitch) < 2e-3 and abs(y - yaw) < 2e-3
+
+
+class YieldingSlot:
+    # 每寫一個值就讓出 GIL，讓讀取端可以在寫到一半時插進來
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __getitem__(self, i):
+        return self.slot[i]
+
+    def __setitem__(self, i, value):
+        self.slot[i] = value
+        time.sleep(0)
+
+
+def test_thread_mode_reads_are_consistent_while_the_writer_runs():
+    _, sampler = make_sampler()
+    sampler.slot = YieldingSlot(sampler.slot)
+    assert sampler.start() == 'thread'
+    out = array('f', [0.0] * 7)
+    seqs = []
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)  # 板子上兩個核心真的同時執行，這裡讓兩個執行緒頻繁交替
+    try:
+        deadline = time.perf_counter() + 0.5
+        while time.perf_counter() < deadline:
+            seq = sampler.read(out)
+            time.sleep(0)  # 主迴圈在兩次讀取之間做別的事
+            if seq < 0:
+                continue
+            assert consistent(out), list(out)
+            seqs.append(seq)
+    finally:
+        sys.setswitchinterval(interval)
+        sampler.stop()
+    assert not sampler._alive
+    assert len(set(seqs)) > 20         # 寫入端一直在更新
+    assert seqs == sorted(seqs)
+    assert all(seq % 2 == 0 for seq in seqs)
+    assert sampler.errors == 0
+
+
+class FakeTimer:
+    PERIODIC = 1
+
+    def __init__(self, period, mode, callback):
+        self.period = period
+        self.callback = callback
+        self.active = True
+
+    def fire(self):
+        if self.active:
+            self.callback(self)
+
+    def deinit(self):
+        self.active = False
+
+
+class FakeMicropython:
+    # micropython.schedule：排進佇列，在主程式的安全時機 (這裡是 run()) 才執行
+    def __init__(self, depth=8):
+        self.queue = []
+        self.depth = depth
+
+    def schedule(self, func, arg):
+        if len(self.queue) >= self.depth:
+            raise RuntimeError('schedule queue full')
+        self.queue.append((func, arg))
+
+    def run(self):
+        queue = self.queue
+        while queue:
+            func, arg = queue.pop(0)
+            func(arg)
+
+
+class InterruptingSlot:
+    # 每讀 every 個值就觸發一次計時器並執行排程的取樣
+    def __init__(self, slot, timer, scheduler, every=3):
+        self.slot = slot
+        self.timer = timer
+        self.scheduler = scheduler
+        self.every = every
+        self.reads = 0
+
+    def __getitem__(self, i):
+        self.reads += 1
+        if self.reads % self.every == 0:
+            self.timer().fire()
+            self.scheduler.run()
+        return self.slot[i]
+
+    def __setitem__(self, i, value):
+        self.slot[i] = value
+
+
+def test_timer_mode_reads_are_consistent_when_samples_interleave(monkeypatch):
+    fake = FakeMicropython()
+    monkeypatch.setattr(mahony, 'Timer', FakeTimer)
+    monkeypatch.setattr(mahony, 'micropython', fake)
+    _, sampler = make_sampler(period_ms=10, mode='timer')
+    assert sampler.start() == 'timer'
+    timer = sampler._timer
+    assert timer.period == 10
+    sampler.slot = InterruptingSlot(sampler.slot, lambda: timer, fake, every=11)
+
+    out = array('f', [0.0] * 7)
+    seqs = []
+    for _ in range(200):
+        seq = sampler.read(out)
+        assert seq >= 0
+        assert consistent(out), list(out)
+        seqs.append(seq)
+    assert len(set(seqs)) > 20
+    assert seqs == sorted(seqs)
+
+    sampler.stop()
+    assert not timer.active and sampler._timer is None
+    seq = sampler.seq
+    timer.fire()
+    fake.run()
+    assert sampler.seq == seq   # 停止後不再取樣
+
+
+def test_timer_mode_skips_a_sample_when_the_schedule_queue_is_full(monkeypatch):
+    fake = FakeMicropython(depth=1)
+    monkeypatch.setattr(mahony, 'Timer', FakeTimer)
+    monkeypatch.setattr(mahony, 'micropython', fake)
+    _, sampler = make_sampler(period_ms=10, mode='timer')
+    sampler.start()
+    sampler._timer.fire()
+    sampler._timer.fire()   # 佇列滿了，略過
+    fake.run()
+    assert sampler.seq == 2
+    sampler.stop()
+
+
+def test_bus_errors_keep_the_last_result(monkeypatch):
+    monkeypatch.setattr(mahony, 'Timer', FakeTimer)
+    fake = FakeMicropython()
+    monkeypatch.setattr(mahony, 'micropython', fake)
+    sensor, sampler = make_sampler(mode='timer')
+    sampler.start()
+    sampler._timer.fire()
+    fake.run()
+    before = sampler.get_quaternion()
+
+    def broken(*args, **kwargs):
+        raise OSError(5)
+    sensor.readfrom_mem_into = broken
+    sampler._timer.fire()
+    fake.run()
+    assert sampler.errors == 1
+    assert sampler.get_quaternion() == before
+    sampler.stop()
+
+
+def test_read_gives_up_when_the_writer_is_stuck():
+    _, sampler = make_sampler()
+    sampler._sample()
+    out = array('f', [0.0] * 7)
+    assert sampler.read(out) == 2
+    good = list(out)
+    angles = sampler.get_angles()
+    sampler.seq += 1                     # 寫入端停在寫入中 (例如執行緒在寫到一半時當掉)
+    sampler.slot[0] = 99.0
+    start = time.perf_counter()
+    assert sampler.read(out, retries=50) == -1
+    assert time.perf_counter() - start < 1.0
+    assert list(out) == good             # 放棄時 out 維持原本的內容
+    assert sampler.read_failures == 1
+    assert sampler.get_angles() == angles  # 讀不到時仍是上一次一致的角度
+    assert sampler.read_failures == 2
@@ -0,0 +1,77 @@
+'''
+profiler.Probe 的測試：錯過的週期數在來源歸零 (reset_stats) 後不會變成負數、關鍵字參數照樣傳遞、
+報告的格式 tools/profile_report.py 解析得了。
+'''
+from libraries.profiler import Profiler, Probe, unwrap
+from libraries.TimeToDo import TimeToDo
+from tools.profile_report import parse_line
+
+
+class Source:
+    # 只有 missed 屬性的假任務
+    def __init__(self):
+        self.missed = 0
+
+
+def test_missed_counts_new_periods_after_the_source_resets():
+    profiler = Profiler(report_ms=0)
+    source = Source()
+    probe = profiler.wrap(lambda: None, 'task', source=source)
+    source.missed = 5
+    probe()
+    assert probe.stats.missed == 5
+    source.missed = 0          # 來源的 reset_stats()
+    probe()
+    assert probe.stats.missed == 5
+    source.missed = 2          # 歸零後又錯過兩個週期
+    probe()
+    assert probe.stats.missed == 7
+    source.missed = 3
+    probe()
+    assert probe.stats.missed == 8
+
+
+def test_time_to_do_reset_stats_keeps_profiler_missed_positive():
+    profiler = Profiler(report_ms=0)
+    timer = TimeToDo(10)
+    timer.set_profiler(profiler, 'gyro')
+    calls = []
+    timer.missed = 4
+    timer._run(0, 0, calls.append, ('a',), {})
+    timer.reset_stats()
+    timer.missed = 1
+    timer._run(0, 0, calls.append, ('b',), {})
+    stats = profiler.stats_for('gyro')
+    assert calls == ['a', 'b']
+    assert stats.count == 2 and stats.missed == 5
+
+
+def test_keyword_arguments_are_forwarded():
+    profiler = Profiler(report_ms=0)
+
+    def move(x, y=0, *, speed=1):
+        return x, y, speed
+
+    probe = profiler.wrap(move)
+    assert isinstance(probe, Probe)
+    assert probe(1, y=2, speed=3) == (1, 2, 3)
+    assert probe(4) == (4, 0, 1)
+    assert profiler.wrap(probe) is probe
+    assert unwrap(probe) is move
+    assert profiler.stats_for('move').count == 2
+
+
+def test_report_line_parses():
+    lines = []
+    profiler = Profiler(report_ms=0, out=lines.append)
+    source = Source()
+    probe = profiler.wrap(lambda: None, 'draw_game', source=source)
+    source.missed = 2
+    for _ in range(3):
+        probe()
+    line = profiler.report()
+    assert lines == [line]
+    _, tasks = parse_line(line)
+    assert tasks['draw_game']['count'] == 3
+    assert tasks['draw_game']['missed'] == 2
+    assert profiler.stats_for('draw_game').count == 0   # 印完歸零
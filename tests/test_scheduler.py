@@ -0,0 +1,147 @@
+'''
+Scheduler 的假時鐘測試：到期順序、deadline 不漂移、落後時丟掉補跑，
+以及 ticks_us 在 2**30 繞回時仍然正確 (deadline 一直是 small int 範圍內的 ticks 值)。
+'''
+import pytest
+
+from fake_clock import FakeClock, TICKS_PERIOD
+from libraries.scheduler import Scheduler, ticks_add, ticks_diff
+from libraries.game_loop import GameLoop
+
+
+def make(start=1000):
+    clock = FakeClock(start)
+    return clock, Scheduler(clock=clock, sleep=clock.sleep)
+
+
+def test_ticks_helpers_wrap_like_utime():
+    assert ticks_add(TICKS_PERIOD - 10, 25) == 15
+    assert ticks_diff(15, TICKS_PERIOD - 10) == 25
+    assert ticks_diff(TICKS_PERIOD - 10, 15) == -25
+    assert ticks_add(5, -10) == TICKS_PERIOD - 5
+
+
+def test_tasks_run_in_deadline_then_creation_order():
+    clock, scheduler = make()
+    log = []
+    scheduler.every(30, log.append, 'slow')
+    scheduler.every(10, log.append, 'a')
+    scheduler.every(10, log.append, 'b')
+    scheduler.every(5, log.append, 'fast', delay_ms=12)
+    for _ in range(30):
+        clock.advance(1000)
+        scheduler.run_pending()
+    assert log == ['a', 'b', 'fast', 'fast', 'a', 'b', 'fast', 'fast', 'slow', 'a', 'b']
+
+
+def test_deadlines_do_not_drift_with_late_wakeups():
+    clock, scheduler = make()
+    runs = []
+    task = scheduler.every(10, lambda: runs.append(clock()))
+    start = task.deadline
+    wait = scheduler.run_pending()
+    for i in range(100):
+        clock.advance(wait + (i % 4) * 700)   # 每次醒來都晚 0 ~ 2.1 毫秒
+        wait = scheduler.run_pending()
+    assert len(runs) == 100
+    assert task.deadline == ticks_add(start, 100 * 10000)   # 還在原本的 10 毫秒格線上
+    assert task.missed == 0
+
+
+def test_falling_behind_drops_the_missed_periods():
+    clock, scheduler = make()
+    runs = []
+    task = scheduler.every(10, lambda: runs.append(clock()))
+    clock.advance(10000)
+    scheduler.run_pending()
+    clock.advance(55000)                     # 卡住 55 毫秒 (例如寫 flash)
+    scheduler.run_pending()
+    assert len(runs) == 2                    # 只補跑一次
+    assert task.missed == 4                  # 30、40、50、60 毫秒這四次被丟掉
+    assert task.deadline == ticks_add(clock(), 10000)  # 從現在重新計時
+    clock.advance(10000)
+    scheduler.run_pending()
+    assert len(runs) == 3
+
+
+def test_ticks_wrap_keeps_order_and_period():
+    start = TICKS_PERIOD - 25000             # 25 毫秒後 ticks_us 繞回
+    clock, scheduler = make(start)
+    log = []
+    fast = scheduler.every(10, log.append, 'fast')
+    slow = scheduler.every(40, log.append, 'slow')
+    handle = scheduler.after(33, log.append, 'once')
+    assert slow.deadline < fast.deadline     # 繞回後的數值比較小，但時間比較晚
+    assert scheduler.next_deadline() == fast.deadline
+    wait = scheduler.run_pending()
+    while len(log) < 9:
+        clock.advance(wait)
+        wait = scheduler.run_pending()
+        assert 0 <= wait <= 10000
+    assert log == ['fast', 'fast', 'fast', 'once', 'fast', 'slow', 'fast', 'fast', 'fast']
+    assert not scheduler.pending(handle)
+    assert fast.missed == 0 and slow.missed == 0
+    for task in scheduler._heap:
+        assert 0 <= task.deadline < TICKS_PERIOD
+
+
+def test_long_run_stays_in_small_int_range():
+    # 舊的累加時鐘在 2**30 微秒 (約 17.9 分鐘) 後超出 small int，MicroPython 上每次都會配置大整數
+    clock, scheduler = make(TICKS_PERIOD - 5000)
+    task = scheduler.every(1000, lambda: None)
+    for _ in range(20):
+        clock.advance(59 * 1000000)          # 每次 59 秒，總共超過 19 分鐘
+        scheduler.run_pending()
+        assert 0 <= task.deadline < TICKS_PERIOD
+        assert 0 <= scheduler.run_pending() <= 1000000
+
+
+def test_set_period_restart_and_cancel():
+    clock, scheduler = make()
+    log = []
+    task = scheduler.every(100, log.append, 'task')
+    first = task.deadline
+    task.period_ms = 50                      # 這一次也提早
+    assert task.deadline == ticks_add(first, -50000)
+    clock.advance(30000)
+    scheduler.restart(task)                  # 從現在重新計時
+    assert task.deadline == ticks_add(clock(), 50000)
+    scheduler.restart(task, delay_ms=0)
+    scheduler.run_pending()
+    assert log == ['task']
+    task.cancel()
+    assert not task.active
+    clock.advance(1000000)
+    assert scheduler.run_pending() is None
+    assert log == ['task']
+
+
+def test_run_sleeps_until_the_next_deadline_and_stops():
+    clock, scheduler = make()
+    calls = []
+
+    def tick():
+        calls.append(clock())
+        if len(calls) == 5:
+            scheduler.stop()
+    scheduler.every(20, tick)
+    start = clock()
+    scheduler.run()
+    assert [ticks_diff(t, start) for t in calls] == [20000, 40000, 60000, 80000, 100000]
+
+
+def test_game_loop_keeps_its_step_across_the_wrap():
+    clock = FakeClock(TICKS_PERIOD - 300000)     # 0.3 秒後繞回
+    scheduler = Scheduler(clock=clock, sleep=clock.sleep)
+    frames = []
+    loop = GameLoop(20, lambda: None, lambda: frames.append(clock()), scheduler=scheduler)
+
+    def stop():
+        loop.stop()
+    scheduler.after(1000, stop)
+    loop.run()
+    stats = loop.stats()
+    assert stats['steps'] == 50 and stats['frames'] == 50   # 同一時間到期，先建立的 tick 先執行
+    assert stats['steps_dropped'] == 0 and stats['frames_skipped'] == 0
+    gaps = {ticks_diff(b, a) for a, b in zip(frames, frames[1:])}
+    assert gaps == {20000}
@@ -0,0 +1,152 @@
+'''
+Scheduler.after() 單次計時器的測試：到期、到期前取消、池回收後舊 handle 失效、池用完、世代繞回，
+以及跨過 ticks_us 繞回時仍不配置記憶體 (handle 與 deadline 都在 small int 範圍內)。
+'''
+import tracemalloc
+
+import pytest
+
+from fake_clock import FakeClock, TICKS_PERIOD
+from libraries.scheduler import Scheduler, _GENERATION_MASK, _SLOT_BITS
+
+SMALL_INT_MAX = (1 << 30) - 1   # MicroPython 上超過就會變成配置在堆積上的大整數
+
+
+def make(start=1000, one_shots=8):
+    clock = FakeClock(start)
+    return clock, Scheduler(clock=clock, sleep=clock.sleep, one_shots=one_shots)
+
+
+def test_one_shot_runs_once_at_its_deadline():
+    clock, scheduler = make()
+    log = []
+    handle = scheduler.after(50, log.append, 'boom')
+    assert handle and scheduler.pending(handle)
+    clock.advance(49999)
+    scheduler.run_pending()
+    assert log == []
+    clock.advance(1)
+    scheduler.run_pending()
+    assert log == ['boom']
+    assert not scheduler.pending(handle)
+    clock.advance(1000000)
+    assert scheduler.run_pending() is None
+    assert log == ['boom']
+    assert len(scheduler._free) == 8      # 已經回到池中
+
+
+def test_cancel_before_expiry():
+    clock, scheduler = make()
+    log = []
+    handle = scheduler.after(20, log.append, 'x')
+    scheduler.cancel(handle)
+    assert not scheduler.pending(handle)
+    scheduler.cancel(handle)              # 再取消一次沒有效果
+    scheduler.cancel(0)                   # 0 是「沒有計時器」
+    clock.advance(100000)
+    scheduler.run_pending()
+    assert log == []
+    assert len(scheduler._free) == 8
+
+
+def test_stale_handle_does_not_touch_the_reused_slot():
+    clock, scheduler = make(one_shots=1)
+    log = []
+    old = scheduler.after(10, log.append, 'old')
+    clock.advance(10000)
+    scheduler.run_pending()
+    new = scheduler.after(10, log.append, 'new')   # 同一個位置，世代不同
+    assert new & 0xFF == old & 0xFF and new != old
+    assert not scheduler.pending(old)
+    scheduler.cancel(old)                 # 舊 handle 不能取消新的計時器
+    assert scheduler.pending(new)
+    clock.advance(10000)
+    scheduler.run_pending()
+    assert log == ['old', 'new']
+
+
+def test_callback_can_reschedule_into_its_own_slot():
+    clock, scheduler = make(one_shots=1)
+    fired = []
+
+    def again():
+        fired.append(clock())
+        if len(fired) < 3:
+            scheduler.after(5, again)
+    scheduler.after(5, again)
+    for _ in range(3):
+        clock.advance(5000)
+        scheduler.run_pending()
+    assert len(fired) == 3
+
+
+def test_pool_exhaustion_raises_until_a_timer_is_released():
+    clock, scheduler = make(one_shots=2)
+    first = scheduler.after(10, lambda: None)
+    scheduler.after(20, lambda: None)
+    with pytest.raises(RuntimeError):
+        scheduler.after(30, lambda: None)
+    scheduler.cancel(first)
+    assert scheduler.after(30, lambda: None)
+    with pytest.raises(RuntimeError):
+        scheduler.after(30, lambda: None)
+    scheduler.clear()                     # clear() 也把計時器還回池中
+    assert len(scheduler._free) == 2
+
+
+def test_generation_wraps_and_handles_stay_small_ints():
+    clock, scheduler = make(one_shots=256)
+    task = scheduler._pool[255]
+    task.generation = _GENERATION_MASK    # 下一次回收就繞回
+    scheduler._free.remove(255)
+    scheduler._free.append(255)           # 下一個 after() 拿到最後一個位置
+    handle = scheduler.after(1, lambda: None)
+    assert handle == SMALL_INT_MAX        # 最大的 handle 仍是 small int
+    clock.advance(1000)
+    scheduler.run_pending()
+    assert task.generation == 1
+    assert not scheduler.pending(handle)
+    scheduler._free.remove(255)
+    scheduler._free.append(255)
+    wrapped = scheduler.after(1, lambda: None)
+    assert wrapped == (1 << _SLOT_BITS) | 255
+    assert scheduler.pending(wrapped) and not scheduler.pending(handle)
+
+
+def test_steady_state_allocates_nothing_across_the_wrap():
+    # 只有一個位置，每一幀都用同一個 Task，CPython 的整數物件才會在量測前全部換成追蹤中的
+    clock, scheduler = make(start=TICKS_PERIOD - 5000000, one_shots=1)   # 5 秒後 ticks_us 繞回
+    count = [0, 0]   # 執行次數、幀數
+
+    def fire():
+        count[0] += 1
+
+    def frame():
+        handle = scheduler.after(7, fire)
+        count[1] += 1
+        if count[1] % 3 == 0:
+            scheduler.cancel(handle)
+        clock.advance(8000)
+        scheduler.run_pending()
+        return handle
+
+    for _ in range(300):                  # 暖機，讓 order 與世代都超過 CPython 快取的小整數
+        frame()
+    tracemalloc.start()
+    try:
+        for i in range(500):              # 第 325 幀時跨過繞回
+            handle = frame()
+            assert 0 < handle <= SMALL_INT_MAX
+            assert 0 <= scheduler._pool[0].deadline <= SMALL_INT_MAX
+            if i == 100:                  # 兩次快照在迴圈中同一個位置，活著的物件一樣多
+                before = tracemalloc.take_snapshot()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    assert clock() < TICKS_PERIOD - 5000000   # 確實繞回了
+    # CPython 上每個整數都是物件，只能確認沒有隨幀數累積 (400 幀只要每幀留下一個物件就遠超過 64 B)；
+    # 板子上不配置記憶體靠的是上面的 small int 範圍檢查
+    growth = [stat for stat in after.compare_to(before, 'lineno')
+              if stat.traceback[0].filename.endswith('scheduler.py') and stat.size_diff > 0]
+    assert sum(stat.size_diff for stat in growth) <= 64, '\n'.join(str(stat) for stat in growth)
+    assert count[0] == 800 - 800 // 3
@@ -0,0 +1,95 @@
+'''
+穩定狀態下 show() 不應該配置任何記憶體，連只在送出一頁時短暫存在的暫存區也不行：
+用 tracemalloc.reset_peak() 量每一次 show() 執行中的記憶體高峰，不能比沒有變動的 show() 高。
+匯流排分成有 writevto 與沒有 writevto 兩種 (驅動程式兩種都走 writeto 送出預先配置的緩衝區)。
+
+CPython 上大於 256 的整數與 range() 都是會配置的物件，板子上不會；
+所以用 64x16 的畫面讓所有索引與位元組數都在 CPython 快取的小整數內，
+比較的基準是同一個迴圈但沒有頁需要送出的 show()，兩者的差別只剩送出頁的路徑。
+'''
+import tracemalloc
+
+import pytest
+
+from tools.sh1107_emulator import SH1107Emulator
+import libraries.sh1107 as sh1107
+
+
+class NullBus:
+    # 不配置記憶體的假匯流排 (SH1107Emulator 解碼時會配置)，只記錄最後一次的長度
+    def __init__(self):
+        self.last = 0
+
+    def writeto(self, addr, buf, stop=True):
+        self.last = len(buf)
+
+
+class VectorBus(NullBus):
+    def writevto(self, addr, vector, stop=True):
+        self.last = len(vector)
+
+
+def draw_frame(display, i):
+    # 一個會移動的方塊加上一條會變長短的線，每一幀有幾頁各改變一段行
+    display.fill_rect((i * 5) % 50, 2, 10, 10, 0)
+    display.fill_rect(((i + 1) * 5) % 50, 2, 10, 10, 1)
+    display.fill_rect(0, 12 + i % 4, 20 + i % 30, 1, i & 1)
+
+
+def peak_during(func):
+    # func 執行中配置的最高記憶體 (位元組)，執行前已經存在的不算
+    tracemalloc.reset_peak()
+    current = tracemalloc.get_traced_memory()[0]
+    func()
+    return tracemalloc.get_traced_memory()[1] - current
+
+
+def check_steady_state(display, show):
+    for i in range(60):  # 暖機：每種長度的 memoryview 快取都建好
+        draw_frame(display, i % 30)
+        show()
+    tracemalloc.start()
+    try:
+        baseline = max(peak_during(show) for _ in range(5))  # 沒有變動：只有迴圈本身
+        peaks = []
+        sent = 0
+        for i in range(120):
+            draw_frame(display, i % 30)
+            peaks.append(peak_during(show))
+            sent += display.frame_bytes > 0
+    finally:
+        tracemalloc.stop()
+    assert sent == 120   # 每一幀都有送出資料
+    assert max(peaks) <= baseline, (baseline, peaks)
+
+
+@pytest.fixture(params=[NullBus, VectorBus], ids=['writeto', 'writevto'])
+def display(request):
+    return sh1107.SH1107_I2C(64, 16, request.param(), None, 0x3c)
+
+
+def test_show_steady_state_allocates_nothing(display):
+    check_steady_state(display, display.show)
+
+
+def test_show_step_steady_state_allocates_nothing(display):
+    def show():
+        display.begin_show()
+        while not display.show_step(max_pages=1):
+            pass
+
+    check_steady_state(display, show)
+
+
+def test_flush_copies_only_the_changed_span():
+    panel = SH1107Emulator()
+    display = sh1107.SH1107_I2C(128, 128, panel, None, 0x3c)
+    display.fill(0)
+    display.show(force=True)
+    display.fill_rect(50, 16, 9, 1, 1)
+    stats = panel.measure(display.show)
+    assert stats['data_bytes'] == 9
+    assert stats['transactions'] == 2   # 位址指令一次、資料一次
+    assert bytes(display._tx[:10]) == b'\x40' + b'\x01' * 9
+    assert display._shadow == display.buffer
+    assert panel.framebuffer() == bytes(display.buffer)
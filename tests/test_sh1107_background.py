@@ -0,0 +1,129 @@
+'''
+背景更新 (start_background) 的測試：CPython 的 _thread 是真正的執行緒，
+用一個比較慢、會記錄是哪個執行緒在寫的假 I2C 匯流排 (包著 SH1107Emulator) 代替第二核心上的傳輸。
+'''
+import _thread
+import time
+
+from tools.sh1107_emulator import SH1107Emulator
+import libraries.sh1107 as sh1107
+
+
+class SlowBus(SH1107Emulator):
+    def __init__(self, delay=0.0005):
+        super().__init__()
+        self.delay = delay
+        self.threads = set()   # 寫入過的執行緒 id
+        self.fail = False      # 為 True 時下一次寫入丟出 OSError (像 I2C 沒有回應)
+
+    def _check(self):
+        self.threads.add(_thread.get_ident())
+        if self.fail:
+            self.fail = False
+            raise OSError(5)
+        time.sleep(self.delay)
+
+    def writeto(self, addr, buf, stop=True):
+        self._check()
+        return super().writeto(addr, buf, stop)
+
+    def writevto(self, addr, vector, stop=True):
+        self._check()
+        return super().writevto(addr, vector, stop)
+
+
+def make_display(**kwargs):
+    bus = SlowBus(**kwargs)
+    display = sh1107.SH1107_I2C(128, 128, bus, None, 0x3c)
+    display.fill(0)
+    display.show(force=True)
+    return bus, display
+
+
+def test_show_returns_before_the_frame_is_sent():
+    bus, display = make_display(delay=0.002)
+    assert display.start_background()
+    try:
+        bus.threads.clear()
+        display.fill_rect(0, 0, 128, 64, 1)  # 8 頁，每頁兩次傳輸
+        start = time.perf_counter()
+        display.show()
+        elapsed = time.perf_counter() - start
+        assert display._bg_pending          # 還在送
+        assert elapsed < 16 * 0.002
+        display.wait_show()
+        assert not display._bg_pending
+        assert _thread.get_ident() not in bus.threads  # 全部由背景執行緒送出
+        assert bus.framebuffer() == bytes(display.buffer)
+    finally:
+        display.stop_background()
+    assert not display._bg_alive
+
+
+def test_drawing_after_show_does_not_tear_the_frame():
+    bus, display = make_display(delay=0.001)
+    display.start_background()
+    try:
+        display.fill_rect(0, 0, 128, 128, 1)
+        display.show()
+        expected = bytes(display.buffer)
+        display.fill(0)                      # 背景還在送的時候就開始畫下一幀
+        display.text('next', 0, 0, 1)
+        display.wait_show()
+        assert bus.framebuffer() == expected
+        display.show()
+        display.wait_show()
+        assert bus.framebuffer() == bytes(display.buffer)
+    finally:
+        display.stop_background()
+
+
+def test_many_frames_end_in_the_right_state():
+    bus, display = make_display(delay=0)
+    display.start_background()
+    try:
+        for i in range(50):
+            display.fill(0)
+            display.fill_rect(i, i, 10, 10, 1)
+            display.show()
+        display.wait_show()
+        assert bus.framebuffer() == bytes(display.buffer)
+        assert display._shadow == display.buffer
+    finally:
+        display.stop_background()
+
+
+def test_bus_error_falls_back_to_synchronous_resend():
+    bus, display = make_display(delay=0)
+    display.start_background()
+    bus.fail = True
+    display.fill_rect(10, 10, 30, 30, 1)
+    display.show()
+    display.wait_show()
+    while display._bg_alive:
+        time.sleep(0.001)
+    assert not display._bg_running
+    assert display._resync
+
+    # 下一次 show() 在呼叫端同步整頁重送
+    bus.threads.clear()
+    stats = bus.measure(display.show)
+    assert bus.threads == {_thread.get_ident()}
+    assert stats['data_bytes'] == 128 * 128 // 8
+    assert not display._resync
+    assert bus.framebuffer() == bytes(display.buffer)
+
+
+def test_stop_background_returns_to_synchronous_show():
+    bus, display = make_display(delay=0)
+    display.start_background()
+    display.stop_background()
+    assert not display._bg_running and not display._bg_alive
+    bus.threads.clear()
+    display.fill_rect(0, 0, 8, 8, 1)
+    display.show()
+    assert bus.threads == {_thread.get_ident()}
+    assert bus.framebuffer() == bytes(display.buffer)
+    # 可以再啟動一次
+    assert display.start_background()
+    display.stop_background()
@@ -0,0 +1,143 @@
+'''
+SH1107 繪圖與 show() 的黃金影像測試：在電腦上用 tools/sh1107_emulator.py 解碼驅動程式真正送出的 I2C 位元組，
+還原出面板畫面，再與 tests/golden/ 裡的 PBM 比對。
+
+繪圖程式或傳輸方式改變、確定新的畫面是對的之後，用下面的指令重新產生黃金影像：
+UPDATE_GOLDEN=1 python -m pytest tests/test_sh1107_golden.py
+'''
+import os
+
+import pytest
+
+from tools.sh1107_emulator import SH1107Emulator
+import libraries.sh1107 as sh1107
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+UPDATE = os.environ.get('UPDATE_GOLDEN') == '1'
+
+# 8x8 的 MONO_HLSB 位圖：外框加一條對角線
+ARROW = bytes((0xFF, 0xC1, 0xA1, 0x91, 0x89, 0x85, 0x83, 0xFF))
+# 12x3，每列 2 個位元組 (寬度不是 8 的倍數)
+STRIPE = bytes((0xF0, 0xF0, 0x0F, 0x00, 0xAA, 0x50))
+
+
+def make_display():
+    panel = SH1107Emulator()
+    display = sh1107.SH1107_I2C(128, 128, panel, None, 0x3c)
+    display.fill(0)
+    display.show(force=True)
+    return panel, display
+
+
+def check_golden(panel, display, name):
+    # 面板上的畫面必須與 framebuffer 相同，並且與黃金影像一致
+    assert panel.framebuffer() == bytes(display.buffer)
+    path = os.path.join(GOLDEN_DIR, name + '.pbm')
+    image = panel.to_pbm()
+    if UPDATE:
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(image)
+        return
+    if not os.path.exists(path):
+        pytest.fail('missing golden image {} (run with UPDATE_GOLDEN=1)'.format(path))
+    with open(path, 'rb') as f:
+        expected = f.read()
+    if image != expected:
+        png = os.path.join(GOLDEN_DIR, name + '.actual.png')
+        panel.save_png(png)
+        pytest.fail('{} differs from golden image, actual frame saved to {}'.format(name, png))
+
+
+def test_text():
+    panel, display = make_display()
+    display.text('Hello', 0, 0, 1)
+    display.text('SCORE 123', 4, 20, 1)
+    display.text('clip', 110, 60, 1)    # 右邊超出畫面
+    display.text('top', 30, -4, 1)      # 上面超出畫面
+    display.fill_rect(0, 100, 128, 12, 1)
+    display.text('inverse', 8, 102, 0)  # 亮底暗字
+    display.show()
+    check_golden(panel, display, 'text')
+
+
+def test_fill_circle():
+    panel, display = make_display()
+    # 0 到 4 是預先畫好的小圖，其他的用點表
+    for i, radius in enumerate((0, 1, 2, 3, 4)):
+        display.fill_circle(8 + i * 12, 8, radius, 1)
+    display.fill_circle(30, 50, 20, 1)
+    display.fill_circle(30, 50, 4, 0)       # 亮底上挖洞 (小圖的反相路徑)
+    display.fill_circle(30, 50, 12, 0)
+    display.fill_circle(30, 50, 6, 1)
+    display.fill_circle(120, 120, 15, 1)    # 右下角超出畫面
+    display.fill_circle(-3, 100, 9, 1)      # 左邊超出畫面
+    display.draw_circle(90, 50, 25, 1)
+    display.draw_circle(90, 50, 3, 1)
+    display.show()
+    check_golden(panel, display, 'fill_circle')
+
+
+def test_draw_bitmap():
+    panel, display = make_display()
+    display.drawBitmap(0, 0, ARROW, 8, 8)
+    display.drawBitmap(10, 0, ARROW, 8, 8, invert=True)
+    display.drawBitmap(30, 0, STRIPE, 12, 3)
+    display.fill_rect(0, 20, 64, 20, 1)
+    display.drawBitmap(4, 26, ARROW, 8, 8)                    # 背景像素蓋掉亮底
+    display.drawBitmap(16, 26, ARROW, 8, 8, transparent=True) # 亮底上看不出來
+    display.drawBitmap(28, 26, ARROW, 8, 8, transparent=True, invert=True)
+    display.drawBitmap(40, 26, ARROW, 8, 8, invert=True)
+    display.drawBitmap(124, 60, ARROW, 8, 8)                  # 右邊裁切
+    display.drawBitmap(-4, 124, ARROW, 8, 8)                  # 左下角裁切
+    display.drawBitmap(60, 90, bytearray(STRIPE), 12, 3, transparent=True)
+    display.show()
+    check_golden(panel, display, 'draw_bitmap')
+
+
+def test_fill_triangle():
+    panel, display = make_display()
+    display.fill_triangle(10, 10, 50, 10, 30, 40, 1)      # 平頂
+    display.fill_triangle(70, 40, 90, 10, 110, 40, 1)     # 平底
+    display.fill_triangle(5, 60, 60, 70, 20, 110, 1)      # 一般
+    display.fill_triangle(25, 75, 35, 78, 28, 90, 0)      # 在亮的三角形裡挖洞
+    display.fill_triangle(80, 60, 80, 60, 80, 60, 1)      # 退化成一點
+    display.fill_triangle(70, 80, 120, 80, 95, 80, 1)     # 退化成水平線
+    display.fill_triangle(100, 90, 150, 100, 110, 140, 1) # 超出畫面
+    display.fill_triangles([40, 115, 50, 125, 35, 127, 55, 112, 65, 112, 60, 122], 1, dx=2, dy=-1)
+    display.show()
+    check_golden(panel, display, 'fill_triangle')
+
+
+def test_partial_flush():
+    panel, display = make_display()
+    display.fill_rect(0, 0, 128, 8, 1)
+    display.text('frame 1', 10, 40, 1)
+    display.fill_circle(100, 100, 10, 1)
+    display.show()
+    full = display.frame_bytes
+
+    # 只改一小塊：只有兩頁的一段行會重送
+    display.fill_rect(20, 60, 6, 10, 1)
+    stats = panel.measure(display.show)
+    assert display.frame_bytes == stats['bytes'] < full
+    assert stats['data_bytes'] == 2 * 6
+    assert stats['transactions'] == 4
+
+    # 沒有變動時什麼都不送
+    stats = panel.measure(display.show)
+    assert stats['transactions'] == 0 and display.frame_bytes == 0
+
+    # 分段更新：快照之後再畫的內容不會出現在這一幀
+    display.fill_circle(100, 100, 10, 0)
+    display.text('frame 2', 10, 40, 1)
+    display.begin_show()
+    display.fill_rect(0, 120, 128, 8, 1)
+    steps = 1
+    while not display.show_step(max_pages=1):
+        steps += 1
+    assert steps > 1
+    assert panel.get_pixel(0, 124) == 0
+    assert panel.framebuffer() == bytes(display._frame)
+    display.show()
+    check_golden(panel, display, 'partial_flush')
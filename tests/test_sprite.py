@@ -0,0 +1,217 @@
+'''
+Sprite.draw (一次 blit) 必須和原本逐像素畫字串圖案的結果完全一樣：
+把原本遊戲裡的字串圖案用舊的方式畫一次，再用遊戲現在的繪製函數畫一次，
+比較兩個 framebuf 的內容，背景先畫上圖樣以檢查 '0' (key=0) 是透明的。
+'''
+import types
+
+import framebuf
+import pytest
+
+import doodle_jump
+import space_shooter_game
+
+WIDTH = 128
+HEIGHT = 128
+
+# 原本 space_shooter_game 裡的字串圖案
+OLD_PLAYER = [
+    '00000100000',
+    '00001110000',
+    '00011111000',
+    '00111111100',
+    '01111111110',
+    '11111111111',
+    '00011111000',
+    '00001110000',
+    '00000100000',
+]
+OLD_ENEMIES = {
+    1: [
+        '00010000',
+        '00111000',
+        '11111110',
+        '00111000',
+        '00010000',
+        '00000000',
+        '00000000',
+        '00000000',
+    ],
+    2: [
+        '11111111',
+        '10000001',
+        '10011001',
+        '10011001',
+        '10000001',
+        '11111111',
+        '00000000',
+        '00000000',
+    ],
+    3: [
+        '00111100',
+        '01111110',
+        '11111111',
+        '11111111',
+        '11111111',
+        '01111110',
+        '00111100',
+        '00000000',
+    ],
+}
+OLD_ITEMS = {
+    'speed': [
+        '00010000',
+        '00111000',
+        '01111100',
+        '11111110',
+        '00111000',
+        '00111000',
+        '00111000',
+        '00000000',
+    ],
+    'shield': [
+        '01111110',
+        '11111111',
+        '11111111',
+        '11111111',
+        '11111111',
+        '01111110',
+        '00111100',
+        '00011000',
+    ],
+    'triple_shot': [
+        '00010000',
+        '00111000',
+        '01111100',
+        '11111110',
+        '01111100',
+        '00111000',
+        '00010000',
+        '00000000',
+    ],
+    'clone': [
+        '00100100',
+        '01111110',
+        '01111110',
+        '01111110',
+        '00111100',
+        '00011000',
+        '00000000',
+        '00000000',
+    ],
+}
+# 原本 doodle_jump 的 Doodler 圖案
+OLD_DOODLER = [
+    "0000000111100",
+    "0000001000010",
+    "0000010000001",
+    "0000100000001",
+    "1111101010001",
+    "1010000000001",
+    "1111100000001",
+    "0000111111111",
+    "0000100000001",
+    "0000100000001",
+    "0000111111111",
+    "0000010101010",
+    "0000010101010"
+]
+
+# 包含部分超出畫面四個邊的位置
+POSITIONS = [(0, 0), (37, 21), (-3, -2), (WIDTH - 5, HEIGHT - 4), (-6, HEIGHT - 7)]
+
+
+def screen():
+    # 背景是斜線條紋，圖案的 '0' 必須保留背景，'1' 蓋成 1
+    buf = bytearray(WIDTH * HEIGHT // 8)
+    fb = framebuf.FrameBuffer(buf, WIDTH, HEIGHT, framebuf.MONO_VLSB)
+    for y in range(HEIGHT):
+        for x in range(WIDTH):
+            if (x + 2 * y) % 5 == 0:
+                fb.pixel(x, y, 1)
+    return buf, fb
+
+
+def draw_old(fb, shape, x, y):
+    # space_shooter_game 原本的畫法
+    for row, line in enumerate(shape):
+        for col, pixel in enumerate(line):
+            if pixel == '1':
+                fb.fill_rect(x + col, y + row, 1, 1, 1)
+
+
+def compare(draw_new, shape, x, y):
+    old_buf, old_fb = screen()
+    new_buf, new_fb = screen()
+    draw_old(old_fb, shape, x, y)
+    draw_new(new_fb, x, y)
+    assert new_buf == old_buf
+
+
+@pytest.mark.parametrize('x, y', POSITIONS)
+def test_player_matches_string_art(x, y):
+    def draw(fb, x, y):
+        space_shooter_game.Game.draw_player(types.SimpleNamespace(oled=fb), x, y)
+    compare(draw, OLD_PLAYER, x, y)
+
+
+@pytest.mark.parametrize('enemy_type', sorted(OLD_ENEMIES))
+@pytest.mark.parametrize('x, y', POSITIONS)
+def test_enemies_match_string_art(enemy_type, x, y):
+    def draw(fb, x, y):
+        space_shooter_game.Game.draw_enemy(types.SimpleNamespace(oled=fb), enemy_type, x, y)
+    compare(draw, OLD_ENEMIES[enemy_type], x, y)
+
+
+@pytest.mark.parametrize('item_type', sorted(OLD_ITEMS))
+@pytest.mark.parametrize('x, y', POSITIONS)
+def test_items_match_string_art(item_type, x, y):
+    def draw(fb, x, y):
+        space_shooter_game.Game.draw_item(types.SimpleNamespace(oled=fb), item_type, x, y)
+    compare(draw, OLD_ITEMS[item_type], x, y)
+
+
+def test_unknown_types_draw_nothing():
+    # 原本的 else 分支是空圖案
+    buf, fb = screen()
+    before = bytes(buf)
+    game = types.SimpleNamespace(oled=fb)
+    space_shooter_game.Game.draw_enemy(game, 4, 10, 10)
+    space_shooter_game.Game.draw_item(game, 'unknown', 10, 10)
+    assert buf == before
+
+
+def show_old(doodler, display):
+    # doodle_jump 原本的 Doodler.show，反轉時從每一列的尾端讀回來
+    for row_idx, row in enumerate(OLD_DOODLER):
+        for col_idx in range(len(row)):
+            if doodler.is_flipped:
+                pixel = row[-(col_idx + 1)]
+            else:
+                pixel = row[col_idx]
+            if pixel == '1':
+                display.pixel(int(doodler.x - doodler.w//2 + col_idx), int(doodler.y - doodler.h//2 + row_idx), 1)
+
+
+@pytest.mark.parametrize('flipped', [False, True], ids=['normal', 'flipped'])
+@pytest.mark.parametrize('x, y', POSITIONS)
+def test_doodler_matches_string_art(flipped, x, y):
+    doodler = doodle_jump.Doodler(WIDTH, HEIGHT)
+    # show() 會用 int() 捨去小數；x 在左邊界外時原本逐欄 int() 會往 0 捨入，
+    # 把跨過 0 的兩欄疊在一起 (圖案變形)，blit 則整體平移，所以只在畫面內加小數
+    doodler.x = x + doodler.w // 2 + (0.4 if x >= 0 else 0)
+    doodler.y = y + doodler.h // 2
+    doodler.is_flipped = flipped
+    old_buf, old_fb = screen()
+    new_buf, new_fb = screen()
+    show_old(doodler, old_fb)
+    doodler.show(types.SimpleNamespace(display=new_fb))
+    assert new_buf == old_buf
+
+
+def test_doodler_flipped_sprite_is_the_mirror_image():
+    # DOODLER_SPRITE_FLIPPED 的每一列都是原圖案的反轉
+    sprite = doodle_jump.DOODLER_SPRITE_FLIPPED
+    for row, line in enumerate(OLD_DOODLER):
+        for col, pixel in enumerate(reversed(line)):
+            assert sprite.fb.pixel(col, row) == (pixel == '1')
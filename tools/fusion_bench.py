@@ -0,0 +1,463 @@
+'''
+fusion_bench.py
+在電腦上 (CPython + NumPy) 離線調整 libraries/fusion.py 的融合引擎參數。
+同一段 IMU 資料一次跑上千組參數 (每組參數是 NumPy 陣列的一個元素，時間軸一步一步走)，
+比較每個引擎最佳參數的準確度與每次更新的計算成本，挑出最便宜但仍夠穩定的引擎。
+
+使用範例
+python tools/fusion_bench.py                                   # 用合成資料 (含真實角度)
+python tools/fusion_bench.py imu_log.csv --max-error 3         # 錄下的資料，誤差上限 3 度
+python tools/fusion_bench.py imu.rec                           # imu_record.IMURecorder 在板子上錄的檔案
+python tools/fusion_bench.py imu_log.csv --cost mahony=95 --cost madgwick=120 --cost complementary=60
+
+資料格式 (CSV，第一列是欄位名稱)
+t_us, ax, ay, az, gx, gy, gz [, roll, pitch]
+    ax..az 單位 g，gx..gz 單位 rad/s，已補償反向放置 (與 MPU6050.update_mahony() 送進濾波器的值相同)
+    roll/pitch 若存在則當作真實角度 (度，與 get_angles() 相同的定義)；
+    沒有的話以零相位平滑後的加速度計方向當參考，只適合慢速動作的資料。
+也可以直接讀 libraries/imu_record.py 錄製的 .rec 檔，使用其中每一次 14 位元組的連續讀取 (0x3B)。
+
+計算成本
+預設使用電腦上以純 Python 執行 fusion.py kernel 的微秒數，只能看相對大小；
+在板子上執行 libraries/fusion.py 的 benchmark() 取得真正的 us/update 後用 --cost 傳進來。
+
+評分
+rms / max: 與參考角度的 roll/pitch 誤差 (度)，略過開頭 --settle 秒的收斂時間
+jitter: 每一步角度變化與參考角度變化之差的 RMS (度)，越小畫面越不會抖
+'''
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from libraries import fusion  # noqa: E402
+from libraries.imu_record import read_records  # noqa: E402
+
+# MPU6050 一開始假設裝置倒置
+_INITIAL_QUATERNION = (0.0, 1.0, 0.0, 0.0)
+# 與 Mpu6050_mahony.py 相同的換算 (±2g、±250 deg/s)
+_ACCEL_SCALE = 1.0 / 16384.0
+_GYRO_SCALE = np.pi / 180 / 131.0
+_TICKS_PERIOD = 1 << 30  # RP2040 上 ticks_us 繞回的週期
+
+
+# ==================== 資料 ====================
+
+def load_csv(path):
+    """
+    讀取 CSV 格式的 IMU 資料，回傳欄位名稱對應 NumPy 陣列的 dict。
+    """
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+    log = {}
+    for name in reader.fieldnames:
+        log[name.strip()] = np.array([float(row[name]) for row in rows])
+    return _with_dt(log)
+
+
+def load_recording(path):
+    """
+    讀取 imu_record.IMURecorder 錄製的檔案，把每一次 14 位元組的連續讀取換算成與
+    MPU6050.update_mahony() 送進濾波器相同的單位與方向，回傳與 load_csv() 相同格式的 dict。
+    """
+    _, records = read_records(path)
+    samples = [(ticks, data) for ticks, memaddr, data in records if memaddr == 0x3B and len(data) == 14]
+    if not samples:
+        raise ValueError('no 14-byte burst reads (0x3B) in {}'.format(path))
+    raw = np.array([np.frombuffer(data, dtype='>i2') for _, data in samples], dtype=float)
+    ticks = np.array([ticks for ticks, _ in samples], dtype=np.int64)
+    # ticks_us 會繞回，以相鄰差值 (取週期的餘數) 累加成遞增的時間
+    t_us = np.concatenate([[0], np.cumsum(np.diff(ticks) % _TICKS_PERIOD)]).astype(float)
+    log = {
+        't_us': t_us,
+        'ax': -raw[:, 0] * _ACCEL_SCALE,
+        'ay': -raw[:, 1] * _ACCEL_SCALE,
+        'az': raw[:, 2] * _ACCEL_SCALE,
+        'gx': -raw[:, 4] * _GYRO_SCALE,
+        'gy': -raw[:, 5] * _GYRO_SCALE,
+        'gz': raw[:, 6] * _GYRO_SCALE,
+    }
+    return _with_dt(log)
+
+
+def load_log(path):
+    """
+    依副檔名讀取 .rec 錄製檔或 CSV。
+    """
+    if path.endswith('.rec'):
+        return load_recording(path)
+    return load_csv(path)
+
+
+def synthetic_trace(seconds=30.0, rate_hz=100, seed=0):
+    """
+    產生一段模擬遊戲中手持傾斜的資料，包含真實的 roll/pitch。
+    陀螺儀有固定偏差與雜訊，加速度計有雜訊與間歇的搖晃 (線性加速度)。
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * rate_hz)
+    dt = 1.0 / rate_hz
+    t = np.arange(n) * dt
+    # 真實的 roll/pitch/yaw：幾個不同頻率的正弦波相加，傾斜幅度與玩遊戲時差不多 (約 ±40 度)
+    euler = np.zeros((n, 3))
+    for axis, amplitude in enumerate((np.radians(40), np.radians(40), np.radians(20))):
+        for _ in range(3):
+            frequency = rng.uniform(0.05, 1.0)
+            phase = rng.uniform(0, 2 * np.pi)
+            euler[:, axis] += amplitude / 3 * np.sin(2 * np.pi * frequency * t + phase)
+    euler[:, 0] += np.pi  # 感測器倒置安裝
+
+    q = _quaternion_from_euler(euler[:, 0], euler[:, 1], euler[:, 2])
+    # 機體角速度 ω = 2 * conj(q) ⊗ dq/dt 的向量部分
+    dq = np.gradient(q, dt, axis=0)
+    q0, q1, q2, q3 = q.T
+    d0, d1, d2, d3 = dq.T
+    omega = 2 * np.stack([
+        q0 * d1 - q1 * d0 - q2 * d3 + q3 * d2,
+        q0 * d2 + q1 * d3 - q2 * d0 - q3 * d1,
+        q0 * d3 - q1 * d2 + q2 * d1 - q3 * d0], axis=1)
+    gravity = np.stack(_gravity(q.T), axis=1)
+
+    shake = (rng.random(n) < 0.02).astype(float)
+    shake = np.convolve(shake, np.ones(20), mode='same')[:, None] * rng.normal(0, 0.3, (n, 3))
+    accel = gravity + rng.normal(0, 0.03, (n, 3)) + shake
+    gyro = omega + np.array([0.01, -0.02, 0.005]) + rng.normal(0, 0.01, (n, 3))
+    roll, pitch = _angles(gravity[:, 0], gravity[:, 1], gravity[:, 2])
+    log = {'t_us': t * 1e6, 'roll': roll, 'pitch': pitch}
+    for index, name in enumerate(('ax', 'ay', 'az')):
+        log[name] = accel[:, index]
+    for index, name in enumerate(('gx', 'gy', 'gz')):
+        log[name] = gyro[:, index]
+    return _with_dt(log)
+
+
+def _with_dt(log):
+    dt = np.diff(log['t_us'], prepend=log['t_us'][0]) / 1e6
+    if len(dt) > 1:
+        dt[0] = dt[1]
+    log['dt'] = dt
+    return log
+
+
+def _quaternion_from_euler(roll, pitch, yaw):
+    # ZYX 歐拉角 (弧度) 轉四元數，與 MPU6050._update_euler() 互為反運算
+    cr, sr = np.cos(roll / 2), np.sin(roll / 2)
+    cp, sp = np.cos(pitch / 2), np.sin(pitch / 2)
+    cy, sy = np.cos(yaw / 2), np.sin(yaw / 2)
+    return np.stack([
+        cr * cp * cy + sr * sp * sy,
+        sr * cp * cy - cr * sp * sy,
+        cr * sp * cy + sr * cp * sy,
+        cr * cp * sy - sr * sp * cy], axis=1)
+
+
+def _gravity(q):
+    # 機體座標中的重力方向，與 Mahony 的 halfv * 2 相同
+    q0, q1, q2, q3 = q
+    return np.array([2 * (q1 * q3 - q0 * q2), 2 * (q0 * q1 + q2 * q3), q0 * q0 - q1 * q1 - q2 * q2 + q3 * q3])
+
+
+def _angles(vx, vy, vz):
+    # 由重力方向算出 get_angles() 定義的 roll/pitch (度)
+    roll = np.degrees(np.arctan2(vy, -vz))
+    norm = np.sqrt(vx * vx + vy * vy + vz * vz)
+    pitch = np.degrees(np.arcsin(np.clip(-vx / np.where(norm == 0, 1, norm), -1, 1)))
+    return roll, pitch
+
+
+def reference_angles(log, tau=0.3):
+    """
+    回傳參考的 (roll, pitch)：資料裡有真實角度就直接用，
+    否則把加速度向量以時間常數 tau 秒做前後向 (零相位) 平滑後計算。
+    """
+    if 'roll' in log and 'pitch' in log:
+        return log['roll'], log['pitch']
+    accel = np.stack([log['ax'], log['ay'], log['az']], axis=1)
+    smoothed = accel.copy()
+    for order in (range(1, len(accel)), range(len(accel) - 2, -1, -1)):
+        step = 1 if order.step == 1 else -1
+        for i in order:
+            k = log['dt'][i] / (tau + log['dt'][i])
+            smoothed[i] = smoothed[i - step] + k * (smoothed[i] - smoothed[i - step])
+    return _angles(smoothed[:, 0], smoothed[:, 1], smoothed[:, 2])
+
+
+# ==================== 向量化的引擎 (每個參數組是陣列的一個元素) ====================
+
+def _normalize(*parts):
+    norm = np.sqrt(sum(p * p for p in parts))
+    safe = np.where(norm == 0, 1.0, norm)
+    return [p / safe for p in parts], norm
+
+
+class _BatchMahony:
+    name = 'mahony'
+
+    def __init__(self, params, count):
+        self.two_kp = params['two_kp']
+        self.two_ki = params['two_ki']
+        self.q = [np.full(count, v) for v in _INITIAL_QUATERNION]
+        self.integral = [np.zeros(count) for _ in range(3)]
+
+    def step(self, ax, ay, az, gx, gy, gz, dt):
+        q0, q1, q2, q3 = self.q
+        (ax, ay, az), norm = _normalize(ax, ay, az)
+        valid = norm != 0
+        halfvx = q1 * q3 - q0 * q2
+        halfvy = q0 * q1 + q2 * q3
+        halfvz = q0 * q0 - 0.5 + q3 * q3
+        halfex = (ay * halfvz - az * halfvy) * valid
+        halfey = (az * halfvx - ax * halfvz) * valid
+        halfez = (ax * halfvy - ay * halfvx) * valid
+        ix, iy, iz = self.integral
+        ix += self.two_ki * halfex * dt
+        iy += self.two_ki * halfey * dt
+        iz += self.two_ki * halfez * dt
+        gx = (gx + ix + self.two_kp * halfex) * (0.5 * dt)
+        gy = (gy + iy + self.two_kp * halfey) * (0.5 * dt)
+        gz = (gz + iz + self.two_kp * halfez) * (0.5 * dt)
+        self.q, _ = _normalize(
+            q0 + (-q1 * gx - q2 * gy - q3 * gz),
+            q1 + (q0 * gx + q2 * gz - q3 * gy),
+            q2 + (q0 * gy - q1 * gz + q3 * gx),
+            q3 + (q0 * gz + q1 * gy - q2 * gx))
+
+    def gravity(self):
+        return _gravity(self.q)
+
+
+class _BatchMadgwick:
+    name = 'madgwick'
+
+    def __init__(self, params, count):
+        self.beta = params['beta']
+        self.q = [np.full(count, v) for v in _INITIAL_QUATERNION]
+
+    def step(self, ax, ay, az, gx, gy, gz, dt):
+        q0, q1, q2, q3 = self.q
+        qdot0 = 0.5 * (-q1 * gx - q2 * gy - q3 * gz)
+        qdot1 = 0.5 * (q0 * gx + q2 * gz - q3 * gy)
+        qdot2 = 0.5 * (q0 * gy - q1 * gz + q3 * gx)
+        qdot3 = 0.5 * (q0 * gz + q1 * gy - q2 * gx)
+        (ax, ay, az), norm = _normalize(ax, ay, az)
+        if norm != 0:
+            q0q0, q1q1, q2q2, q3q3 = q0 * q0, q1 * q1, q2 * q2, q3 * q3
+            s0 = 4 * q0 * q2q2 + 2 * q2 * ax + 4 * q0 * q1q1 - 2 * q1 * ay
+            s1 = (4 * q1 * q3q3 - 2 * q3 * ax + 4 * q0q0 * q1 - 2 * q0 * ay - 4 * q1 +
+                  8 * q1 * q1q1 + 8 * q1 * q2q2 + 4 * q1 * az)
+            s2 = (4 * q0q0 * q2 + 2 * q0 * ax + 4 * q2 * q3q3 - 2 * q3 * ay - 4 * q2 +
+                  8 * q2 * q1q1 + 8 * q2 * q2q2 + 4 * q2 * az)
+            s3 = 4 * q1q1 * q3 - 2 * q1 * ax + 4 * q2q2 * q3 - 2 * q2 * ay
+            (s0, s1, s2, s3), _ = _normalize(s0, s1, s2, s3)
+            qdot0 = qdot0 - self.beta * s0
+            qdot1 = qdot1 - self.beta * s1
+            qdot2 = qdot2 - self.beta * s2
+            qdot3 = qdot3 - self.beta * s3
+        self.q, _ = _normalize(q0 + qdot0 * dt, q1 + qdot1 * dt, q2 + qdot2 * dt, q3 + qdot3 * dt)
+
+    def gravity(self):
+        return _gravity(self.q)
+
+
+class _BatchComplementary:
+    name = 'complementary'
+
+    def __init__(self, params, count):
+        self.alpha = params['alpha']
+        self.v = [np.full(count, v) for v in _gravity(_INITIAL_QUATERNION)]
+
+    def step(self, ax, ay, az, gx, gy, gz, dt):
+        vx, vy, vz = self.v
+        nx = vx + (vy * gz - vz * gy) * dt
+        ny = vy + (vz * gx - vx * gz) * dt
+        nz = vz + (vx * gy - vy * gx) * dt
+        norm = np.sqrt(ax * ax + ay * ay + az * az)
+        if norm != 0:
+            k = (1.0 - self.alpha) / norm
+            nx = self.alpha * nx + k * ax
+            ny = self.alpha * ny + k * ay
+            nz = self.alpha * nz + k * az
+        self.v, _ = _normalize(nx, ny, nz)
+
+    def gravity(self):
+        return self.v
+
+
+_BATCH_ENGINES = {
+    'mahony': _BatchMahony,
+    'madgwick': _BatchMadgwick,
+    'complementary': _BatchComplementary,
+}
+
+
+def default_grid(engine, points=40):
+    """
+    回傳引擎的參數網格 {參數名稱: 陣列}，每個陣列長度相同，每個位置是一組參數。
+    """
+    if engine == 'mahony':
+        two_kp = np.geomspace(0.1, 50.0, points)
+        two_ki = np.concatenate([[0.0], np.geomspace(0.001, 1.0, points // 2)])
+        kp, ki = np.meshgrid(two_kp, two_ki)
+        return {'two_kp': kp.ravel(), 'two_ki': ki.ravel()}
+    if engine == 'madgwick':
+        return {'beta': np.geomspace(0.001, 3.0, points * 10)}
+    if engine == 'complementary':
+        return {'alpha': 1.0 - np.geomspace(1e-4, 0.5, points * 10)}
+    raise ValueError(engine)
+
+
+def run_batch(engine, log, params, settle=1.0):
+    """
+    以所有參數組同時跑完整段資料，回傳 {'rms', 'max', 'jitter'} (度，每組參數一個值)。
+    發散 (NaN) 的參數組誤差為無限大。
+    """
+    count = len(next(iter(params.values())))
+    batch = _BATCH_ENGINES[engine](params, count)
+    ref_roll, ref_pitch = reference_angles(log)
+    t = (log['t_us'] - log['t_us'][0]) / 1e6
+    sq_sum = np.zeros(count)
+    worst = np.zeros(count)
+    jitter_sum = np.zeros(count)
+    samples = 0
+    prev = None
+    columns = [log[name] for name in ('ax', 'ay', 'az', 'gx', 'gy', 'gz')]
+    for i in range(len(t)):
+        batch.step(*(column[i] for column in columns), log['dt'][i])
+        if t[i] < settle:
+            continue
+        roll, pitch = _angles(*batch.gravity())
+        roll_error = (roll - ref_roll[i] + 180.0) % 360.0 - 180.0
+        pitch_error = pitch - ref_pitch[i]
+        sq_sum += roll_error * roll_error + pitch_error * pitch_error
+        worst = np.maximum(worst, np.maximum(np.abs(roll_error), np.abs(pitch_error)))
+        if prev is not None:
+            d_roll = roll_error - prev[0]
+            d_roll = (d_roll + 180.0) % 360.0 - 180.0
+            d_pitch = pitch_error - prev[1]
+            jitter_sum += d_roll * d_roll + d_pitch * d_pitch
+        prev = (roll_error, pitch_error)
+        samples += 1
+    samples = max(samples, 1)
+    result = {
+        'rms': np.sqrt(sq_sum / (2 * samples)),
+        'max': worst,
+        'jitter': np.sqrt(jitter_sum / (2 * samples)),
+    }
+    for key in result:
+        result[key] = np.where(np.isfinite(result[key]), result[key], np.inf)
+    return result
+
+
+# ==================== 計算成本 ====================
+
+def host_cost(engine, updates=20000):
+    """
+    以 CPython 執行 fusion.py 的 kernel，回傳每次更新的微秒數 (只能比較相對大小)。
+    """
+    instance = fusion.ENGINES[engine]()
+    instance.reset(*_INITIAL_QUATERNION)
+    kernel = instance.kernel
+    state = instance.state
+    start = time.perf_counter()
+    for _ in range(updates):
+        kernel(state, 0.01, -0.02, -1.0, 0.001, -0.002, 0.0005, 0.01)
+    return (time.perf_counter() - start) * 1e6 / updates
+
+
+# ==================== 報告 ====================
+
+def sweep(log, engines=None, points=40, settle=1.0, costs=None):
+    """
+    掃描每個引擎的參數網格，回傳每個引擎的結果列表 (依 rms 由小到大排序)。
+    """
+    costs = costs or {}
+    summary = {}
+    for engine in engines or _BATCH_ENGINES:
+        params = default_grid(engine, points)
+        start = time.perf_counter()
+        result = run_batch(engine, log, params, settle)
+        elapsed = time.perf_counter() - start
+        order = np.argsort(result['rms'])
+        rows = []
+        for index in order:
+            rows.append({
+                'params': {name: float(values[index]) for name, values in params.items()},
+                'rms': float(result['rms'][index]),
+                'max': float(result['max'][index]),
+                'jitter': float(result['jitter'][index]),
+            })
+        cost = costs.get(engine)
+        summary[engine] = {
+            'rows': rows,
+            'count': len(order),
+            'seconds': elapsed,
+            'cost': cost if cost is not None else host_cost(engine),
+            'cost_source': 'board' if cost is not None else 'host',
+        }
+    return summary
+
+
+def recommend(summary, max_error):
+    """
+    回傳 rms 誤差不超過 max_error 的最便宜引擎與其最佳參數，沒有的話回傳 None。
+    """
+    candidates = []
+    for engine, info in summary.items():
+        best = info['rows'][0]
+        if best['rms'] <= max_error:
+            candidates.append((info['cost'], engine, best))
+    if not candidates:
+        return None
+    candidates.sort(key=lambda item: item[0])
+    cost, engine, best = candidates[0]
+    return engine, best, cost
+
+
+def _format_params(params):
+    return ' '.join('{}={:.4g}'.format(name, value) for name, value in params.items())
+
+
+def print_report(summary, max_error, top=3):
+    for engine, info in summary.items():
+        print('{}: {} parameter sets in {:.1f} s, cost {:.1f} us/update ({})'.format(
+            engine, info['count'], info['seconds'], info['cost'], info['cost_source']))
+        for row in info['rows'][:top]:
+            print('    {:<32} rms {:6.2f}  max {:6.2f}  jitter {:5.3f}'.format(
+                _format_params(row['params']), row['rms'], row['max'], row['jitter']))
+    choice = recommend(summary, max_error)
+    if choice is None:
+        print('no engine reaches rms <= {:.2f} deg'.format(max_error))
+    else:
+        engine, best, cost = choice
+        print('cheapest engine with rms <= {:.2f} deg: {} {} ({:.1f} us/update)'.format(
+            max_error, engine, _format_params(best['params']), cost))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sweep sensor-fusion gains over a recorded IMU log.')
+    parser.add_argument('log', nargs='?', help='.rec recording or CSV log (t_us, ax, ay, az, gx, gy, gz[, roll, pitch]); synthetic if omitted')
+    parser.add_argument('--engine', action='append', choices=sorted(_BATCH_ENGINES), help='engine to sweep (default: all)')
+    parser.add_argument('--points', type=int, default=40, help='grid density per parameter')
+    parser.add_argument('--settle', type=float, default=1.0, help='seconds skipped while the filter converges')
+    parser.add_argument('--max-error', type=float, default=3.0, help='rms error (deg) a game can tolerate')
+    parser.add_argument('--cost', action='append', default=[], metavar='ENGINE=US',
+                        help='us/update measured on the board with fusion.benchmark()')
+    args = parser.parse_args(argv)
+
+    costs = {}
+    for item in args.cost:
+        name, value = item.split('=')
+        costs[name] = float(value)
+    log = load_log(args.log) if args.log else synthetic_trace()
+    summary = sweep(log, args.engine, args.points, args.settle, costs)
+    print_report(summary, args.max_error)
+    return summary
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+'''
+framebuf.py
+電腦上 (CPython) 用的 MicroPython framebuf 替代品，讓 libraries/sh1107.py 與 tools/sh1107_emulator.py
+不用板子就能畫圖、跑測試。只實作這個專案用到的部分：
+MONO_VLSB / MONO_HLSB / MONO_HMSB 格式，pixel、fill、fill_rect、hline、vline、rect、line、text、blit。
+
+與板子上的差別
+- text() 的字形不是 MicroPython 內建的 8x8 字型，而是由字元碼產生的固定圖樣 (每個字元不同、結果固定)，
+  位置、裁切與顏色的行為相同，但畫出來的字不能拿來跟板子的截圖比對。
+- 速度慢很多，只適合測試與模擬。
+'''
+
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+
+
+def _glyph(ch):
+    # 8x8 的字形，回傳 8 個直行 (低位元在上)，第 0 與第 7 行留白當字距
+    code = ord(ch) & 0x7F
+    if code == 0x20:
+        return (0,) * 8
+    columns = [0]
+    for col in range(1, 7):
+        columns.append(((code ^ (col * 0x15)) & 0x7F) | 0x01)
+    columns.append(0)
+    return columns
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        self.buffer = buffer
+        self.width = width
+        self.height = height
+        self.format = format
+        self.stride = width if stride is None else stride
+        if format not in (MONO_VLSB, MONO_HLSB, MONO_HMSB):
+            raise ValueError('invalid format')
+
+    # ==================== 像素 ====================
+
+    def _locate(self, x, y):
+        # 回傳 (位元組索引, 位元遮罩)
+        if self.format == MONO_VLSB:
+            return (y >> 3) * self.stride + x, 1 << (y & 7)
+        index = (y * ((self.stride + 7) >> 3)) + (x >> 3)
+        if self.format == MONO_HLSB:
+            return index, 0x80 >> (x & 7)
+        return index, 1 << (x & 7)
+
+    def _get(self, x, y):
+        index, mask = self._locate(x, y)
+        return 1 if self.buffer[index] & mask else 0
+
+    def _set(self, x, y, c):
+        index, mask = self._locate(x, y)
+        if c:
+            self.buffer[index] |= mask
+        else:
+            self.buffer[index] &= ~mask & 0xFF
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    # ==================== 圖形 ====================
+
+    def fill(self, c):
+        value = 0xFF if c else 0x00
+        buf = self.buffer
+        for i in range(len(buf)):
+            buf[i] = value
+
+    def fill_rect(self, x, y, w, h, c):
+        # 裁切到畫面內，w 或 h 不是正數時不畫
+        if w <= 0 or h <= 0:
+            return
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        x1 = min(x + w, self.width)
+        y1 = min(y + h, self.height)
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                self._set(xx, yy, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        # Bresenham，與 MicroPython 相同包含兩個端點
+        dx = abs(x2 - x1)
+        dy = -abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x1, y1, c)
+            if x1 == x2 and y1 == y2:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x1 += sx
+            if e2 <= dx:
+                err += dx
+                y1 += sy
+
+    def text(self, s, x, y, c=1):
+        for ch in s:
+            for col, bits in enumerate(_glyph(ch)):
+                for row in range(8):
+                    if bits & (1 << row):
+                        self.pixel(x + col, y + row, c)
+            x += 8
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        """
+        把 fbuf 畫到 (x, y)，顏色先經 palette 轉換，轉換後等於 key 的像素不畫 (與 MicroPython 相同)。
+        """
+        for sy in range(fbuf.height):
+            dy = y + sy
+            if not 0 <= dy < self.height:
+                continue
+            for sx in range(fbuf.width):
+                dx = x + sx
+                if not 0 <= dx < self.width:
+                    continue
+                col = fbuf._get(sx, sy)
+                if palette is not None:
+                    col = palette._get(col, 0)
+                if col != key:
+                    self._set(dx, dy, col)
@@ -0,0 +1,49 @@
+'''
+utime.py
+電腦上 (CPython) 用的 MicroPython utime 替代品。
+ticks_ms / ticks_us 與 RP2040 上一樣在 2**30 繞回，要用 ticks_diff / ticks_add 計算，
+所以在電腦上也測得到繞回的情況。
+'''
+import time as _time
+
+_TICKS_PERIOD = 1 << 30
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALF = _TICKS_PERIOD // 2
+
+
+def ticks_ms():
+    return (_time.perf_counter_ns() // 1000000) & _TICKS_MAX
+
+
+def ticks_us():
+    return (_time.perf_counter_ns() // 1000) & _TICKS_MAX
+
+
+def ticks_cpu():
+    return ticks_us()
+
+
+def ticks_diff(end, start):
+    return ((end - start + _TICKS_HALF) & _TICKS_MAX) - _TICKS_HALF
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MAX
+
+
+def sleep(seconds):
+    _time.sleep(seconds)
+
+
+def sleep_ms(ms):
+    if ms > 0:
+        _time.sleep(ms / 1000)
+
+
+def sleep_us(us):
+    if us > 0:
+        _time.sleep(us / 1000000)
+
+
+def time():
+    return int(_time.time())
@@ -0,0 +1,194 @@
+'''
+profile_report.py
+在電腦上 (CPython) 解析 libraries/profiler.py 經 USB 序列埠印出的 PROF 報告，
+整理成每個任務的總表，並畫出每個任務的執行時間隨時間的變化，找出卡頓時是哪個任務花太多時間。
+
+使用範例
+mpremote run space_shooter_game.py | tee serial.log         # 板子上開啟 PROFILE_MS 後記錄序列埠輸出
+python tools/profile_report.py serial.log                  # 總表 + 終端機文字圖表 (p95)
+python tools/profile_report.py serial.log --metric max     # 圖表改畫最大值 (mean / p95 / max / missed)
+python tools/profile_report.py serial.log --plot prof.png  # 用 matplotlib 存成圖檔 (需要另外安裝)
+mpremote run space_shooter_game.py | python tools/profile_report.py -   # 從標準輸入讀
+
+報告格式
+PROF <ticks_ms> <名稱>:<次數>/<平均>/<p95>/<最大>/<錯過的週期數> ...  (時間單位微秒)
+同一行以外的其他輸出 (print 的除錯訊息等) 會被略過。
+'''
+import argparse
+import sys
+
+_TICKS_PERIOD = 1 << 30  # RP2040 上 ticks_ms 繞回的週期
+METRICS = ('mean', 'p95', 'max', 'missed')
+_BARS = ' .:-=+*#%@'
+
+
+def parse_line(line):
+    """
+    解析一行 PROF 報告，回傳 (ticks_ms, {名稱: {'count', 'mean', 'p95', 'max', 'missed'}})；
+    不是報告的行回傳 None。
+    """
+    fields = line.split()
+    if 'PROF' not in fields:
+        return None
+    fields = fields[fields.index('PROF') + 1:]  # 序列埠偶爾會把別的輸出黏在同一行前面
+    try:
+        ticks = int(fields[0])
+        tasks = {}
+        for field in fields[1:]:
+            name, values = field.rsplit(':', 1)
+            count, mean, p95, maximum, missed = (int(v) for v in values.split('/'))
+            tasks[name] = {'count': count, 'mean': mean, 'p95': p95, 'max': maximum, 'missed': missed}
+    except (IndexError, ValueError):
+        return None  # 傳輸中斷造成的不完整行
+    return ticks, tasks
+
+
+def parse(lines):
+    """
+    解析所有報告，回傳 [(秒, tasks), ...]，秒數從第一份報告起算，ticks_ms 繞回已處理。
+    """
+    reports = []
+    start = last = None
+    offset = 0
+    for line in lines:
+        report = parse_line(line)
+        if report is None:
+            continue
+        ticks, tasks = report
+        if start is None:
+            start = ticks
+        elif ticks < last:
+            offset += _TICKS_PERIOD
+        last = ticks
+        reports.append(((ticks + offset - start) / 1000.0, tasks))
+    return reports
+
+
+def task_names(reports):
+    """
+    依第一次出現的順序回傳所有任務名稱。
+    """
+    names = []
+    for _, tasks in reports:
+        for name in tasks:
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def summarize(reports):
+    """
+    合併所有報告，回傳 {名稱: {'count', 'mean', 'p95', 'max', 'missed'}}：
+    次數與錯過的週期數相加，mean 以次數加權，p95 取各報告中最差的，max 取最大值。
+    """
+    summary = {}
+    for name in task_names(reports):
+        count = total = p95 = maximum = missed = 0
+        for _, tasks in reports:
+            task = tasks.get(name)
+            if task is None:
+                continue
+            count += task['count']
+            total += task['count'] * task['mean']
+            p95 = max(p95, task['p95'])
+            maximum = max(maximum, task['max'])
+            missed += task['missed']
+        summary[name] = {'count': count, 'mean': total // count if count else 0,
+                         'p95': p95, 'max': maximum, 'missed': missed}
+    return summary
+
+
+def series(reports, name, metric):
+    """
+    回傳 (秒數 list, 數值 list)，該報告中沒有這個任務時數值為 0。
+    """
+    times = []
+    values = []
+    for t, tasks in reports:
+        times.append(t)
+        values.append(tasks.get(name, {}).get(metric, 0))
+    return times, values
+
+
+def print_summary(reports):
+    summary = summarize(reports)
+    if not summary:
+        print('no PROF reports found')
+        return summary
+    span = reports[-1][0] if len(reports) > 1 else 0
+    print('{} reports over {:.1f} s (us)'.format(len(reports), span))
+    width = max(len(name) for name in summary)
+    print('{:<{w}} {:>8} {:>8} {:>8} {:>8} {:>7}'.format('task', 'calls', 'mean', 'p95', 'max', 'missed', w=width))
+    # 依總耗時排序，最花時間的任務在最上面
+    for name, task in sorted(summary.items(), key=lambda item: -item[1]['count'] * item[1]['mean']):
+        print('{:<{w}} {:>8} {:>8} {:>8} {:>8} {:>7}'.format(
+            name, task['count'], task['mean'], task['p95'], task['max'], task['missed'], w=width))
+    return summary
+
+
+def print_chart(reports, metric='p95', width=60):
+    """
+    在終端機以文字畫出每個任務的 metric 隨時間的變化 (每個字元一份或多份報告，取最大值)。
+    """
+    names = task_names(reports)
+    if not names:
+        return
+    label = max(len(name) for name in names)
+    per_char = max(1, -(-len(reports) // width))
+    print('{} per report, {} report(s) per column'.format(metric, per_char))
+    for name in names:
+        _, values = series(reports, name, metric)
+        columns = [max(values[i:i + per_char]) for i in range(0, len(values), per_char)]
+        peak = max(columns) or 1
+        bars = ''.join(_BARS[(value * (len(_BARS) - 1) + peak - 1) // peak] for value in columns)
+        print('{:<{w}} |{}| peak {}'.format(name, bars, max(columns), w=label))
+
+
+def plot(reports, path, metric='p95'):
+    """
+    用 matplotlib 把每個任務的 metric 畫成折線圖存檔。
+    """
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        raise SystemExit('--plot needs matplotlib (pip install matplotlib)')
+    fig, ax = plt.subplots(figsize=(10, 5))
+    for name in task_names(reports):
+        times, values = series(reports, name, metric)
+        ax.plot(times, values, marker='.', label=name)
+    ax.set_xlabel('time (s)')
+    ax.set_ylabel(metric if metric == 'missed' else metric + ' (us)')
+    ax.grid(True, alpha=0.3)
+    ax.legend(loc='upper left', fontsize='small')
+    fig.tight_layout()
+    fig.savefig(path)
+    print('saved', path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Summarize and chart PROF lines printed by libraries/profiler.py.')
+    parser.add_argument('log', help="serial console log, or '-' for stdin")
+    parser.add_argument('--metric', choices=METRICS, default='p95', help='value charted over time')
+    parser.add_argument('--width', type=int, default=60, help='text chart width in characters')
+    parser.add_argument('--plot', metavar='PNG', help='save a matplotlib chart instead of the text chart')
+    args = parser.parse_args(argv)
+
+    if args.log == '-':
+        reports = parse(sys.stdin)
+    else:
+        with open(args.log, errors='replace') as f:
+            reports = parse(f)
+    print_summary(reports)
+    if reports:
+        print()
+        if args.plot:
+            plot(reports, args.plot, args.metric)
+        else:
+            print_chart(reports, args.metric, args.width)
+    return reports
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+'''
+sh1107_emulator.py
+在電腦上 (CPython) 模擬 SH1107 面板的假 I2C 裝置。
+它解碼 SH1107_I2C 實際送出的指令/資料位元組流，還原出面板上的 128x128 畫面，
+並統計每次 show() 花了多少 I2C 傳輸次數與位元組，可以匯出 PBM/PNG 影像做為比對基準。
+
+使用範例
+from tools.sh1107_emulator import SH1107Emulator
+import libraries.sh1107 as sh1107
+
+panel = SH1107Emulator()
+display = sh1107.SH1107_I2C(128, 128, panel, None, 0x3c)
+display.fill_rect(10, 10, 20, 20, 1)
+stats = panel.measure(display.show)   # {'transactions': 2, 'bytes': ..., ...}
+panel.save_pbm('frame.pbm')
+assert panel.framebuffer() == bytes(display.buffer)
+
+電腦上沒有 MicroPython 的 framebuf 與 utime，import 這個模組時會把 tools/host 的替代品加到 sys.path
+(只有在找不到時才加，板子或 unix port 上的 MicroPython 仍用內建的)，上面的範例直接就能在 CPython 上執行。
+
+解碼的內容
+控制位元組: Co (bit7) 與 D/C# (bit6)。Co=1 時後面只跟一個位元組，之後又是控制位元組；
+           Co=0 時剩下的位元組全部是資料 (D/C#=1) 或全部是指令 (D/C#=0)。
+指令: 頁位址 0xB0-0xBF、低/高行位址 0x00-0x0F / 0x10-0x17、Segment remap 0xA0/0xA1、
+     COM 掃描方向 0xC0/0xC8、反相 0xA6/0xA7、全亮 0xA4/0xA5、顯示開關 0xAE/0xAF、
+     記憶體定址模式 0x20/0x21，以及帶一個參數的 0x81、0xA8、0xAD、0xD3、0xD5、0xD9、0xDA、0xDB、0xDC。
+行偏移: 驅動程式把畫面第 0 個像素寫到 RAM 第 2 行，column_offset 預設為 2，行位址在 128 行處繞回。
+'''
+import os
+import struct
+import sys
+import zlib
+
+try:
+    import framebuf
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'host'))
+
+# 帶一個參數的雙位元組指令
+_TWO_BYTE_COMMANDS = (0x81, 0xA8, 0xAD, 0xD3, 0xD5, 0xD9, 0xDA, 0xDB, 0xDC)
+
+
+class SH1107Emulator:
+    def __init__(self, width=128, height=128, addr=0x3c, column_offset=2):
+        """
+        :param width: 面板寬度 (像素)。
+        :param height: 面板高度 (像素)，必須是 8 的倍數。
+        :param addr: 回應的 I2C 位址，寫到其他位址會丟出 OSError (與真正的匯流排相同)。
+        :param column_offset: 面板第 0 個像素對應的 RAM 行。
+        """
+        self.width = width
+        self.height = height
+        self.pages = height // 8
+        self.addr = addr
+        self.column_offset = column_offset
+        self.ram = bytearray(128 * self.pages)
+        # 控制器狀態
+        self.page = 0
+        self.column = 0
+        self.vertical_addressing = False
+        self.segment_remap = False
+        self.com_reverse = False
+        self.inverted = False
+        self.entire_on = False
+        self.display_on = False
+        self.contrast = 0x80
+        self.parameters = {}  # 雙位元組指令最後一次的參數，例如 parameters[0xD3] 為顯示偏移
+        self._pending_command = None
+        self.reset_stats()
+
+    # ==================== I2C 介面 ====================
+
+    def writeto(self, addr, buf, stop=True):
+        if addr != self.addr:
+            raise OSError(19)  # ENODEV，跟 machine.I2C 找不到裝置時一樣
+        self._transaction(bytes(buf))
+        return len(buf)
+
+    def writevto(self, addr, vector, stop=True):
+        # 整個向量在同一次傳輸中送出
+        return self.writeto(addr, b''.join(bytes(part) for part in vector), stop)
+
+    def scan(self):
+        return [self.addr]
+
+    # ==================== 統計 ====================
+
+    def reset_stats(self):
+        self.transactions = 0
+        self.bytes = 0
+        self.command_bytes = 0
+        self.data_bytes = 0
+        self.control_bytes = 0
+
+    def stats(self):
+        return {
+            'transactions': self.transactions,
+            'bytes': self.bytes,
+            'command_bytes': self.command_bytes,
+            'data_bytes': self.data_bytes,
+            'control_bytes': self.control_bytes,
+        }
+
+    def measure(self, func, *args, **kwargs):
+        """
+        清除統計後執行 func (例如 display.show)，回傳這次呼叫的 I2C 統計。
+        """
+        self.reset_stats()
+        func(*args, **kwargs)
+        return self.stats()
+
+    # ==================== 解碼 ====================
+
+    def _transaction(self, buf):
+        self.transactions += 1
+        self.bytes += len(buf)
+        i = 0
+        while i < len(buf):
+            control = buf[i]
+            self.control_bytes += 1
+            i += 1
+            is_data = bool(control & 0x40)
+            if control & 0x80:
+                # Co=1：只跟一個位元組
+                if i < len(buf):
+                    self._byte(buf[i], is_data)
+                    i += 1
+            else:
+                # Co=0：剩下的全部同一種
+                for value in buf[i:]:
+                    self._byte(value, is_data)
+                return
+
+    def _byte(self, value, is_data):
+        if is_data:
+            self.data_bytes += 1
+            self.ram[self.page * 128 + self.column] = value
+            if self.vertical_addressing:
+                self.page = (self.page + 1) % self.pages
+            else:
+                self.column = (self.column + 1) & 0x7F
+            return
+        self.command_bytes += 1
+        if self._pending_command is not None:
+            command = self._pending_command
+            self._pending_command = None
+            self.parameters[command] = value
+            if command == 0x81:
+                self.contrast = value
+            return
+        if value in _TWO_BYTE_COMMANDS:
+            self._pending_command = value
+        elif 0xB0 <= value <= 0xBF:
+            self.page = (value & 0x0F) % self.pages
+        elif value <= 0x0F:
+            self.column = (self.column & 0x70) | value
+        elif 0x10 <= value <= 0x17:
+            self.column = (self.column & 0x0F) | ((value & 0x07) << 4)
+        elif value in (0x20, 0x21):
+            self.vertical_addressing = value == 0x21
+        elif value in (0xA0, 0xA1):
+            self.segment_remap = value == 0xA1
+        elif value in (0xA4, 0xA5):
+            self.entire_on = value == 0xA5
+        elif value in (0xA6, 0xA7):
+            self.inverted = value == 0xA7
+        elif value in (0xAE, 0xAF):
+            self.display_on = value == 0xAF
+        elif value in (0xC0, 0xC8):
+            self.com_reverse = value == 0xC8
+        # 其他單位元組指令 (例如 NOP 0xE3) 不影響畫面
+
+    # ==================== 畫面 ====================
+
+    def get_pixel(self, x, y):
+        """
+        面板上 (x, y) 實際顯示的亮度 (0/1)，已套用行偏移、翻轉、反相與顯示開關。
+        """
+        if not self.display_on:
+            return 0
+        if self.entire_on:
+            return 1
+        if self.segment_remap:
+            x = self.width - 1 - x
+        if self.com_reverse:
+            y = self.height - 1 - y
+        column = (x + self.column_offset) & 0x7F
+        bit = (self.ram[(y >> 3) * 128 + column] >> (y & 7)) & 1
+        return bit ^ self.inverted
+
+    def rows(self):
+        """
+        回傳面板畫面，每一列是長度為 width、內容為 0/1 的 bytearray。
+        """
+        return [bytearray(self.get_pixel(x, y) for x in range(self.width)) for y in range(self.height)]
+
+    def framebuffer(self):
+        """
+        以 MONO_VLSB 格式回傳面板畫面，可直接與 display.buffer 比較。
+        """
+        out = bytearray(self.pages * self.width)
+        for y in range(self.height):
+            for x in range(self.width):
+                if self.get_pixel(x, y):
+                    out[(y >> 3) * self.width + x] |= 1 << (y & 7)
+        return bytes(out)
+
+    def to_pbm(self):
+        """
+        以二進位 PBM (P4) 格式回傳畫面，1 代表點亮 (PBM 的黑色)。
+        """
+        row_bytes = (self.width + 7) // 8
+        body = bytearray()
+        for row in self.rows():
+            packed = bytearray(row_bytes)
+            for x, bit in enumerate(row):
+                if bit:
+                    packed[x >> 3] |= 0x80 >> (x & 7)
+            body += packed
+        return b'P4\n%d %d\n' % (self.width, self.height) + bytes(body)
+
+    def to_png(self):
+        """
+        以 1-bit 灰階 PNG 格式回傳畫面，點亮的像素為白色 (與 OLED 相同)。
+        """
+        raw = bytearray()
+        row_bytes = (self.width + 7) // 8
+        for row in self.rows():
+            raw.append(0)  # filter: None
+            packed = bytearray(row_bytes)
+            for x, bit in enumerate(row):
+                if bit:
+                    packed[x >> 3] |= 0x80 >> (x & 7)
+            raw += packed
+
+        def chunk(kind, data):
+            return (struct.pack('>I', len(data)) + kind + data +
+                    struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+        header = struct.pack('>IIBBBBB', self.width, self.height, 1, 0, 0, 0, 0)
+        return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+                chunk(b'IDAT', zlib.compress(bytes(raw))) + chunk(b'IEND', b''))
+
+    def save_pbm(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_pbm())
+
+    def save_png(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_png())
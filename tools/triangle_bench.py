@@ -0,0 +1,152 @@
+'''
+triangle_bench.py
+在電腦上 (CPython) 比較 SH1107.fill_triangle 的整數掃描線與原本以浮點數計算交點的多邊形掃描線
+(原始版本的 _fill_polygon，照抄在下面) 每秒能畫多少個三角形。
+
+hline 在板子上是 framebuf 的原生程式，這裡換成只記錄的假 hline，量到的是光柵化本身的成本；
+電腦上的數字只能看兩者的相對大小，板子上的實際速度要在板子上量。
+另外把同一批三角形分別畫到兩個畫面上，比較兩種寫法填滿的像素差了多少。
+
+使用範例
+python tools/triangle_bench.py                      # 預設 2000 個隨機三角形
+python tools/triangle_bench.py --count 5000 --size 12 --repeat 7
+python tools/triangle_bench.py --seed 3 --no-coverage
+'''
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from tools import sh1107_emulator  # noqa: E402,F401  (沒有 framebuf 時加入 tools/host)
+import framebuf  # noqa: E402
+from libraries.sh1107 import SH1107  # noqa: E402
+
+
+class SpanCounter:
+    """
+    只記錄 hline 呼叫的假畫面，fill_triangle 的兩種寫法都只會呼叫 hline。
+    """
+    def __init__(self):
+        self.spans = 0
+        self.pixels = 0
+
+    def hline(self, x, y, w, color):
+        self.spans += 1
+        if w > 0:
+            self.pixels += w
+
+
+class OldTriangle:
+    """
+    原本的 fill_triangle：三個頂點交給通用的浮點數多邊形掃描線。
+    """
+    def __init__(self, target):
+        self.hline = target.hline
+
+    def fill_triangle(self, x0, y0, x1, y1, x2, y2, color):
+        points = [(x0, y0), (x1, y1), (x2, y2)]
+        self._fill_polygon(points, color)
+
+    def _fill_polygon(self, points, color):
+        points.sort(key=lambda p: p[1])
+        for y in range(points[0][1], points[-1][1] + 1):
+            nodes = []
+            j = len(points) - 1
+            for i in range(len(points)):
+                if points[i][1] < y and points[j][1] >= y or points[j][1] < y and points[i][1] >= y:
+                    nodes.append(int(points[i][0] + (y - points[i][1]) / (points[j][1] - points[i][1]) * (points[j][0] - points[i][0])))
+                j = i
+            nodes.sort()
+            for i in range(0, len(nodes), 2):
+                if i + 1 < len(nodes):
+                    self.hline(nodes[i], y, nodes[i + 1] - nodes[i], color)
+
+
+def new_fill(target):
+    # 目前的 SH1107.fill_triangle，只需要 target 有 hline
+    fill = SH1107.fill_triangle
+    return lambda *args: fill(target, *args)
+
+
+def random_triangles(count, size, seed):
+    """
+    回傳 count 個三角形 (x0, y0, x1, y1, x2, y2)，中心在畫面內，頂點離中心最多 size 像素。
+    """
+    rng = random.Random(seed)
+    triangles = []
+    for _ in range(count):
+        cx = rng.randrange(0, 128)
+        cy = rng.randrange(0, 128)
+        triangles.append(tuple(c + rng.randint(-size, size) for c in (cx, cy, cx, cy, cx, cy)))
+    return triangles
+
+
+def time_fill(fill, triangles, repeat):
+    """
+    回傳畫完全部三角形最短的秒數 (重複 repeat 次取最快的)。
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for t in triangles:
+            fill(t[0], t[1], t[2], t[3], t[4], t[5], 1)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def benchmark(count=2000, size=24, repeat=5, seed=1):
+    """
+    回傳 {'old': 每秒三角形數, 'new': 每秒三角形數, 'speedup': new / old}。
+    """
+    triangles = random_triangles(count, size, seed)
+    old = time_fill(OldTriangle(SpanCounter()).fill_triangle, triangles, repeat)
+    new = time_fill(new_fill(SpanCounter()), triangles, repeat)
+    return {'old': count / old, 'new': count / new, 'speedup': old / new}
+
+
+def coverage(count=200, size=24, seed=1):
+    """
+    把每個三角形分別用兩種寫法畫到空白畫面上，回傳
+    {'pixels': 新寫法總像素, 'only_new': 只有新寫法點亮的, 'only_old': 只有舊寫法點亮的}。
+    舊寫法不畫每一列的右端點與最上面的頂點列，所以 only_new 會比 only_old 多。
+    """
+    width = height = 128
+    totals = {'pixels': 0, 'only_new': 0, 'only_old': 0}
+    for t in random_triangles(count, size, seed):
+        old_fb = framebuf.FrameBuffer(bytearray(width * height // 8), width, height, framebuf.MONO_VLSB)
+        new_fb = framebuf.FrameBuffer(bytearray(width * height // 8), width, height, framebuf.MONO_VLSB)
+        OldTriangle(old_fb).fill_triangle(*t, 1)
+        new_fill(new_fb)(*t, 1)
+        for a, b in zip(new_fb.buffer, old_fb.buffer):
+            totals['pixels'] += bin(a).count('1')
+            totals['only_new'] += bin(a & ~b & 0xFF).count('1')
+            totals['only_old'] += bin(b & ~a & 0xFF).count('1')
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare triangles/sec of the integer and the old float triangle fill.')
+    parser.add_argument('--count', type=int, default=2000, help='number of random triangles')
+    parser.add_argument('--size', type=int, default=24, help='max vertex distance from the centre (pixels)')
+    parser.add_argument('--repeat', type=int, default=5, help='timing runs, the fastest is reported')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-coverage', action='store_true', help='skip the pixel comparison')
+    args = parser.parse_args(argv)
+
+    result = benchmark(args.count, args.size, args.repeat, args.seed)
+    print('{} triangles, size {} (host, hline not counted)'.format(args.count, args.size))
+    print('old float scanline   {:>10.0f} triangles/s'.format(result['old']))
+    print('integer fill_triangle {:>9.0f} triangles/s'.format(result['new']))
+    print('speedup               {:>9.2f}x'.format(result['speedup']))
+    if not args.no_coverage:
+        cov = coverage(min(args.count, 200), args.size, args.seed)
+        print('pixels {}  only new {}  only old {}'.format(cov['pixels'], cov['only_new'], cov['only_old']))
+    return result
+
+
+if __name__ == '__main__':
+    main()